@@ -1,6 +1,8 @@
 -- Fix Daylight Savings Timestamps
 -- Adjusts all timestamps between 06-10-2024 and 06-04-2025 by subtracting 1 hour
 -- This corrects for the daylight savings issue
+-- Only for data imported before team-changes/job_timestamps.py converted times
+-- with DST; current extractor output is already correct and must not be shifted
 
 -- Update time_entries table
 -- Adjust clock_in_time
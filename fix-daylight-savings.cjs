@@ -1,3 +1,5 @@
+// Only for data imported before team-changes/job_timestamps.py converted times
+// with DST; current extractor output is already correct and must not be shifted
 const { Pool } = require('pg');
 require('dotenv').config();
 
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Benchmark the extraction scripts on synthetic workbooks of any size.
+
+Generates the inputs with synthetic_workbook.py (or reuses them from an
+earlier run with the same parameters), then runs the job extractor and the
+team tracker over them stage by stage:
+
+- load: parse every weekly sheet into workbook rows (no row cache)
+- reference: read source_customer_details.xlsx (or its snapshot) and source_users.csv
+- group: group rows into jobs and time entries, then number them
+- track: build team_id_tracker.csv from the same rows
+- customers: collect and build the customer records
+- write: write the jobs, time_entries and customers sheets
+
+Each stage records its wall time, its peak traced memory (tracemalloc) and
+the process's max RSS. Results are saved as JSON; --compare prints the
+ratio of every stage against an earlier results file and exits with status
+1 when a stage got slower than --threshold.
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import job_extractor
+import team_id_tracker_dynamic
+from instrumentation import max_rss_mb
+from synthetic_workbook import PRESETS, generate, generation_params
+from workbook_cache import read_sheet_names
+from workbook_extraction import EXCLUDED_SHEETS, parse_sheets, set_verbose
+
+RESULTS_VERSION = 1
+
+def git_revision():
+    """Short commit hash of the checkout, or None outside a git repository"""
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run_stage(stages, name, function, count=len, verbose=False):
+    """Run one stage, recording its time, memory and output rows in stages; return its result"""
+    if tracemalloc.is_tracing():
+        tracemalloc.reset_peak()
+        traced_before = tracemalloc.get_traced_memory()[0]
+    with contextlib.ExitStack() as stack:
+        if not verbose:
+            # The scripts report progress with print; keep it out of the timings
+            devnull = stack.enter_context(open(os.devnull, 'w'))
+            stack.enter_context(contextlib.redirect_stdout(devnull))
+        started = time.perf_counter()
+        result = function()
+        seconds = time.perf_counter() - started
+
+    stage = {'seconds': round(seconds, 4), 'rows': count(result)}
+    if tracemalloc.is_tracing():
+        traced_after, traced_peak = tracemalloc.get_traced_memory()
+        stage['peak_mb'] = round(traced_peak / (1 << 20), 2)
+        stage['retained_mb'] = round((traced_after - traced_before) / (1 << 20), 2)
+    stage['max_rss_mb'] = max_rss_mb()
+    stages[name] = stage
+    print(f"  {name:<10} {seconds:9.3f}s  {stage['rows']:>9} rows"
+          + (f"  peak {stage['peak_mb']:.1f} MB" if 'peak_mb' in stage else ''))
+    return result
+
+def load_rows(workbook_path, workers):
+    """Parse every included sheet without the row cache"""
+    included = [sheet_name for sheet_name in read_sheet_names(workbook_path) if sheet_name not in EXCLUDED_SHEETS]
+    return [row for _, sheet_rows in parse_sheets(workbook_path, included, workers) for row in sheet_rows]
+
+def group_jobs(rows, reference):
+    """Jobs and time entries, numbered the way job_extractor.main numbers them"""
+    all_job_data, all_time_entries = job_extractor.extract_jobs(rows, reference)
+    job_extractor.assign_ids(all_job_data, all_time_entries)
+    return all_job_data, all_time_entries
+
+def build_customers(all_job_data, reference):
+    """Customer records, numbered the way job_extractor.main numbers them"""
+    customer_names = job_extractor.collect_customer_names(all_job_data, reference['customer_combined_df'])
+    all_customers_data = job_extractor.build_customers(customer_names, all_job_data, reference)
+    job_extractor.assign_customer_ids(all_customers_data, all_job_data)
+    return all_customers_data
+
+def run_benchmark(work_dir, params, workers=1, output_format='xlsx', trace_memory=True, verbose=False):
+    """Generate (or reuse) the inputs in work_dir and time every stage; return the results dict"""
+    workbook_path = os.path.abspath(generate(work_dir, params))
+    stages = {}
+    started = time.perf_counter()
+    previous_dir = os.getcwd()
+    # The scripts read the reference files and write their outputs in the working directory
+    os.chdir(work_dir)
+    if trace_memory:
+        tracemalloc.start()
+    try:
+        print(f"Benchmarking {workbook_path}")
+        rows = run_stage(stages, 'load', lambda: load_rows(workbook_path, workers), verbose=verbose)
+        reference = run_stage(stages, 'reference', job_extractor.load_reference_data,
+                              count=lambda result: len(result['name_to_id']), verbose=verbose)
+        all_job_data, all_time_entries = run_stage(stages, 'group', lambda: group_jobs(rows, reference),
+                                                   count=lambda result: len(result[0]) + len(result[1]), verbose=verbose)
+        run_stage(stages, 'track', lambda: team_id_tracker_dynamic.main(rows), count=lambda result: len(rows), verbose=verbose)
+        all_customers_data = run_stage(stages, 'customers', lambda: build_customers(all_job_data, reference), verbose=verbose)
+        run_stage(stages, 'write', lambda: job_extractor.write_output(job_extractor.OUTPUT_FILE, all_job_data, all_time_entries,
+                                                                     all_customers_data, output_format=output_format),
+                  count=lambda result: len(all_job_data) + len(all_time_entries) + len(all_customers_data), verbose=verbose)
+    finally:
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+        os.chdir(previous_dir)
+
+    return {
+        'version': RESULTS_VERSION,
+        'created_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'git_revision': git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'params': dict(params, workers=workers, output_format=output_format, trace_memory=trace_memory),
+        'input_rows': len(rows),
+        'jobs': len(all_job_data),
+        'time_entries': len(all_time_entries),
+        'customers': len(all_customers_data),
+        'total_seconds': round(time.perf_counter() - started, 4),
+        'stages': stages,
+    }
+
+def compare_results(baseline, current, threshold=1.1):
+    """Print each stage's time and peak memory against a baseline run; return the stages slower than threshold"""
+    if baseline['params'] != current['params']:
+        print("Warning: the baseline was run with different parameters:")
+        for key in sorted(set(baseline['params']) | set(current['params'])):
+            if baseline['params'].get(key) != current['params'].get(key):
+                print(f"  {key}: {baseline['params'].get(key)} -> {current['params'].get(key)}")
+
+    print(f"\nAgainst {baseline.get('git_revision') or 'baseline'} ({baseline['created_at']}):")
+    print(f"  {'stage':<10} {'before':>9} {'after':>9} {'ratio':>7}  {'peak MB before/after':>21}")
+    regressions = []
+    for name, stage in current['stages'].items():
+        before = baseline['stages'].get(name)
+        if before is None:
+            print(f"  {name:<10} {'-':>9} {stage['seconds']:8.3f}s")
+            continue
+        ratio = stage['seconds'] / before['seconds'] if before['seconds'] else float('inf')
+        memory = f"{before.get('peak_mb', '-')}/{stage.get('peak_mb', '-')}"
+        flag = '  SLOWER' if ratio > threshold else ''
+        print(f"  {name:<10} {before['seconds']:8.3f}s {stage['seconds']:8.3f}s {ratio:6.2f}x  {memory:>21}{flag}")
+        if ratio > threshold:
+            regressions.append(name)
+    return regressions
+
+def main(preset='small', sheets=None, rows_per_sheet=None, teams=None, customers=None, seed=0, work_dir=None,
+         output=None, compare=None, threshold=1.1, workers=1, output_format='xlsx', trace_memory=True, verbose=False):
+    """Run the benchmark, save the results JSON and optionally compare against a baseline; return the exit status"""
+    sizes = PRESETS[preset]
+    params = generation_params(sheets or sizes['sheets'], rows_per_sheet or sizes['rows_per_sheet'], teams, customers, seed=seed)
+    label = preset if sheets is None and rows_per_sheet is None else f"{params['sheets']}x{params['rows_per_sheet']}"
+
+    if work_dir is None:
+        with tempfile.TemporaryDirectory(prefix='benchmark_extraction_') as temporary_dir:
+            results = run_benchmark(temporary_dir, params, workers, output_format, trace_memory, verbose)
+    else:
+        results = run_benchmark(work_dir, params, workers, output_format, trace_memory, verbose)
+
+    output = output or f"benchmark_{label}_{results['git_revision'] or 'local'}.json"
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"Total {results['total_seconds']:.2f}s for {results['input_rows']} rows; results saved to {output}")
+
+    if compare:
+        with open(compare, encoding='utf-8') as f:
+            regressions = compare_results(json.load(f), results, threshold)
+        if regressions:
+            print(f"Slower than {threshold:.2f}x the baseline: {', '.join(regressions)}")
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time the extraction stages on a synthetic workbook")
+    parser.add_argument('--preset', choices=PRESETS, default='small',
+                        help="Size preset, sheets x rows per sheet: "
+                             + ', '.join(f"{name} {size['sheets']}x{size['rows_per_sheet']}" for name, size in PRESETS.items())
+                             + " (default: small)")
+    parser.add_argument('--sheets', type=int, default=None, help="Weekly sheets (overrides the preset)")
+    parser.add_argument('--rows-per-sheet', type=int, default=None, help="Rows per weekly sheet (overrides the preset)")
+    parser.add_argument('--teams', type=int, default=None, help="Teams (default: about four jobs per team per day)")
+    parser.add_argument('--customers', type=int, default=None, help="Customers (default: one per row of a sheet)")
+    parser.add_argument('--seed', type=int, default=0, help="Random seed for the synthetic workbook (default: 0)")
+    parser.add_argument('--work-dir', default=None,
+                        help="Keep the generated inputs and outputs here and reuse them on later runs (default: a temporary directory)")
+    parser.add_argument('--output', default=None, help="Results JSON file (default: benchmark_<size>_<git revision>.json)")
+    parser.add_argument('--compare', default=None, metavar='BASELINE', help="Earlier results JSON to compare against")
+    parser.add_argument('--threshold', type=float, default=1.1, help="Time ratio above which a stage counts as slower (default: 1.1)")
+    parser.add_argument('--workers', type=int, default=1, help="Parse sheets across this many processes (default: 1)")
+    parser.add_argument('--format', choices=job_extractor.OUTPUT_FORMATS, default='xlsx', help="Output format of the write stage (default: xlsx)")
+    parser.add_argument('--no-memory', action='store_true', help="Skip tracemalloc, which slows the stages down, and time them only")
+    parser.add_argument('--verbose', action='store_true', help="Show the scripts' own output")
+    args = parser.parse_args()
+    set_verbose(args.verbose)
+    sys.exit(main(args.preset, args.sheets, args.rows_per_sheet, args.teams, args.customers, args.seed, args.work_dir,
+                  args.output, args.compare, args.threshold, args.workers, args.format, not args.no_memory, args.verbose))
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Bulk-load the COPY files written by `job_extractor.py --format copy`.
+
+Replaces the row-at-a-time inserts of import-exported-data.ts. In one
+transaction the customers, jobs and time_entries tables are cleared, the
+MyHome_Data_<table>.copy files are streamed in with COPY ... FROM STDIN,
+and each table's id sequence is moved past the loaded IDs. Any failure
+rolls the whole load back.
+
+Against PostgreSQL this needs psycopg2 (or psycopg 3) and DATABASE_URL from
+../.env (config env_file). --sqlite loads the same files into a SQLite database instead, as a
+local stand-in for trying the pipeline without a server.
+"""
+
+import argparse
+import os
+import sqlite3
+import time
+
+from config import CONFIG
+from db_export import DB_COLUMNS, DB_TABLES
+from output_writer import sheet_path
+
+# job_extractor.OUTPUT_FILE, without importing the extractor
+DEFAULT_OUTPUT_FILE = CONFIG['output_file']
+
+# COPY text-format escapes, reversed
+COPY_UNESCAPES = {'\\\\': '\\', '\\t': '\t', '\\n': '\n', '\\r': '\r'}
+
+def copy_file_paths(output_file):
+    """{table: COPY file path} for the extractor run that wrote output_file"""
+    paths = {table: sheet_path(output_file, table, 'copy') for table in DB_TABLES}
+    missing = [path for path in paths.values() if not os.path.exists(path)]
+    if missing:
+        raise FileNotFoundError(f"COPY files not found: {', '.join(missing)} (run job_extractor.py --format copy)")
+    return paths
+
+def connect_postgres(database_url):
+    """Open a PostgreSQL connection with psycopg2, falling back to psycopg 3"""
+    try:
+        import psycopg2
+        return psycopg2.connect(database_url)
+    except ImportError:
+        pass
+    try:
+        import psycopg
+    except ImportError:
+        raise RuntimeError("Loading into PostgreSQL needs psycopg2 or psycopg (pip install psycopg2-binary)")
+    return psycopg.connect(database_url)
+
+def copy_into(cursor, table, path):
+    """Stream one COPY file into a table"""
+    statement = f"COPY {table} ({', '.join(DB_COLUMNS[table])}) FROM STDIN"
+    with open(path, encoding='utf-8') as f:
+        if hasattr(cursor, 'copy_expert'):
+            cursor.copy_expert(statement, f)
+        else:
+            # psycopg 3
+            with cursor.copy(statement) as copy:
+                while True:
+                    block = f.read(1 << 20)
+                    if not block:
+                        break
+                    copy.write(block)
+
+def load_postgres(database_url, paths):
+    """Replace the tables' contents from the COPY files in one transaction; return row counts"""
+    connection = connect_postgres(database_url)
+    counts = {}
+    try:
+        with connection.cursor() as cursor:
+            # Clear in reverse load order so foreign keys are never violated
+            for table in reversed(DB_TABLES):
+                cursor.execute(f"DELETE FROM {table}")
+            for table in DB_TABLES:
+                copy_into(cursor, table, paths[table])
+                counts[table] = cursor.rowcount
+            for table in DB_TABLES:
+                # The next serial ID follows the highest loaded one (or starts at 1 when empty)
+                cursor.execute(
+                    f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+                    f"COALESCE(MAX(id), 1), MAX(id) IS NOT NULL) FROM {table}"
+                )
+        connection.commit()
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        connection.close()
+    return counts
+
+def parse_copy_field(field):
+    """Inverse of output_writer.copy_field for one field"""
+    if field == '\\N':
+        return None
+    if '\\' not in field:
+        return field
+    parts = []
+    position = 0
+    while position < len(field):
+        escape = field[position:position + 2]
+        if escape in COPY_UNESCAPES:
+            parts.append(COPY_UNESCAPES[escape])
+            position += 2
+        else:
+            parts.append(field[position])
+            position += 1
+    return ''.join(parts)
+
+def iter_copy_rows(path):
+    """Yield each line of a COPY text file as a tuple of field values"""
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            yield tuple(parse_copy_field(field) for field in line.rstrip('\n').split('\t'))
+
+def load_sqlite(database_path, paths):
+    """Load the COPY files into a SQLite stand-in database in one transaction; return row counts"""
+    connection = sqlite3.connect(database_path)
+    counts = {}
+    try:
+        with connection:
+            for table in DB_TABLES:
+                columns = DB_COLUMNS[table]
+                connection.execute(f"CREATE TABLE IF NOT EXISTS {table} (id INTEGER PRIMARY KEY, {', '.join(columns[1:])})")
+            for table in reversed(DB_TABLES):
+                connection.execute(f"DELETE FROM {table}")
+            for table in DB_TABLES:
+                columns = DB_COLUMNS[table]
+                placeholders = ', '.join('?' for _ in columns)
+                cursor = connection.executemany(
+                    f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})",
+                    iter_copy_rows(paths[table]),
+                )
+                counts[table] = cursor.rowcount
+            # INTEGER PRIMARY KEY continues from MAX(id), so there is no sequence to reset
+    finally:
+        connection.close()
+    return counts
+
+def main(output_file=DEFAULT_OUTPUT_FILE, database_url=None, sqlite_path=None):
+    """Load the COPY files into PostgreSQL, or into SQLite when sqlite_path is given"""
+    paths = copy_file_paths(output_file)
+    started = time.perf_counter()
+    if sqlite_path:
+        counts = load_sqlite(sqlite_path, paths)
+        target = sqlite_path
+    else:
+        # The .env file is only read when DATABASE_URL is actually needed
+        from dotenv import load_dotenv
+        load_dotenv(CONFIG['env_file'])
+        database_url = database_url or os.getenv('DATABASE_URL')
+        if not database_url:
+            raise RuntimeError("DATABASE_URL environment variable is required (or pass --sqlite)")
+        counts = load_postgres(database_url, paths)
+        target = 'PostgreSQL'
+    elapsed = time.perf_counter() - started
+
+    for table in DB_TABLES:
+        print(f"Loaded {counts[table]} rows into {table}")
+    print(f"Bulk load into {target} committed in {elapsed:.2f}s")
+
+def cli(argv=None, prog=None):
+    """Parse the command line (argv, or sys.argv when None) and run the script"""
+    parser = argparse.ArgumentParser(prog=prog, description="Bulk-load the COPY files from job_extractor.py --format copy")
+    parser.add_argument('--output-file', default=DEFAULT_OUTPUT_FILE,
+                        help=f"Output file the extractor was run with; the COPY files sit next to it (default: {DEFAULT_OUTPUT_FILE})")
+    parser.add_argument('--database-url', default=None, help="PostgreSQL connection string (default: $DATABASE_URL)")
+    parser.add_argument('--sqlite', default=None, metavar='PATH', help="Load into this SQLite database instead of PostgreSQL")
+    args = parser.parse_args(argv)
+    main(output_file=args.output_file, database_url=args.database_url, sqlite_path=args.sqlite)
+
+if __name__ == "__main__":
+    cli()
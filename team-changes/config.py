@@ -0,0 +1,74 @@
+"""
+Shared paths and sheet exclusions for the team-changes scripts.
+
+The defaults below can be overridden by a JSON file holding any subset of
+the same keys: the file named by $TEAM_CHANGES_CONFIG (set by
+`team_changes.py --config`), or else team_changes.json in the working
+directory when it exists. Relative paths are relative to the working
+directory, as they always were.
+
+Only the standard library is imported here, so every script and the
+team_changes.py CLI can read the settings without slowing their start-up.
+"""
+
+import json
+import os
+
+CONFIG_ENV = 'TEAM_CHANGES_CONFIG'
+CONFIG_FILE = 'team_changes.json'
+
+DEFAULTS = {
+    # Master workbook and the sheets that are never imported
+    'workbook': "MyHome Wages Macros app.xlsm",
+    'excluded_sheets': ["Totals", "Parameters", "Active Jobs", "17 May 25", "23 May 25", "30 May 25",
+                        "25 April 25", "6 June 25", "9 May 25"],
+    # Reference data
+    'customer_details': "source_customer_details.xlsx",
+    'users': "source_users.csv",
+    # Extra staff aliases, nickname -> full name as in the users file
+    'staff_nicknames': {},
+    # job_extractor.py outputs and incremental-mode state
+    'output_file': "MyHome_Data.xlsx",
+    'delta_output_file': "MyHome_Data_delta.xlsx",
+    'manifest': "extract_manifest.json",
+    # Scratch database of job_extractor.py --out-of-core
+    'spill_file': "extract_spill.sqlite",
+    # Team periods
+    'tracker_file': "team_id_tracker.csv",
+    'fixed_periods_file': "team_id_periods_fixed_final.csv",
+    'period_changes_file': "team_id_periods_changes.csv",
+    # validate-teams input (jobs export with team_members_at_creation) and report
+    'team_jobs_file': "jobs - team_at_creation.csv",
+    'team_validation_file': "team_at_creation_validation.csv",
+    # Staff names job_extractor.py could not match to a user
+    'unresolved_staff_file': "unresolved_staff.csv",
+    # Rows each script dropped or flagged, one <script>_rejects.csv per script
+    'rejects_dir': "rejects",
+    # find_missing_customers.py output
+    'suggestions_file': "missing_customers_suggestions.csv",
+    # Sidecar caches
+    'cache_dir': ".workbook_cache",
+    'geocode_cache': ".geocode_cache.json",
+    # API keys and DATABASE_URL
+    'env_file': "../.env",
+}
+
+def load_config(path=None):
+    """Defaults overlaid with the config file; a path given explicitly (or via $TEAM_CHANGES_CONFIG) must exist"""
+    explicit = path or os.getenv(CONFIG_ENV)
+    path = explicit or CONFIG_FILE
+    config = dict(DEFAULTS)
+    if not os.path.exists(path):
+        if explicit:
+            raise FileNotFoundError(f"Config file not found: {path}")
+        return config
+
+    with open(path, encoding='utf-8') as f:
+        overrides = json.load(f)
+    unknown = sorted(set(overrides) - set(DEFAULTS))
+    if unknown:
+        raise ValueError(f"Unknown settings in {path}: {', '.join(unknown)} (expected some of {', '.join(DEFAULTS)})")
+    config.update(overrides)
+    return config
+
+CONFIG = load_config()
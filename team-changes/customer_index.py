@@ -0,0 +1,69 @@
+"""
+Precomputed customer-name index for the source_customer_details.xlsx sheets.
+
+Replaces per-customer DataFrame scans with one pass over a name column:
+exact case-insensitive matches are answered from a dict, and substring
+fallbacks are narrowed to candidate rows through a trigram index before the
+actual substring test. Both lookups return the first matching row in sheet
+order, the same row the old exact-then-partial DataFrame filters picked.
+"""
+
+NGRAM_SIZE = 3
+
+def ngrams(text, n=NGRAM_SIZE):
+    """Return the set of n-character substrings of text"""
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+class CustomerNameIndex:
+    """Case-insensitive exact and substring lookup over one column of names"""
+
+    def __init__(self, names):
+        # Normalized lowercase keys, built once; non-text cells never match
+        self.keys = [name.lower() if isinstance(name, str) else None for name in names]
+        self.exact = {}
+        self.postings = {}
+        for position, key in enumerate(self.keys):
+            if key is None:
+                continue
+            self.exact.setdefault(key, position)
+            for gram in ngrams(key):
+                # Positions are appended in order, so each posting list stays sorted
+                self.postings.setdefault(gram, []).append(position)
+
+    def find_exact(self, name):
+        """Return the position of the first row equal to name (ignoring case), or None"""
+        return self.exact.get(name.lower())
+
+    def find_partial(self, name):
+        """Return the position of the first row containing name (ignoring case), or None"""
+        needle = name.lower()
+        if len(needle) < NGRAM_SIZE:
+            # Too short for the trigram index; fall back to a scan
+            candidates = range(len(self.keys))
+        else:
+            posting_lists = []
+            for gram in ngrams(needle):
+                posting_list = self.postings.get(gram)
+                if posting_list is None:
+                    return None
+                posting_lists.append(posting_list)
+            # Intersect starting from the rarest trigram
+            posting_lists.sort(key=len)
+            candidates = set(posting_lists[0])
+            for posting_list in posting_lists[1:]:
+                candidates.intersection_update(posting_list)
+                if not candidates:
+                    return None
+            candidates = sorted(candidates)
+        for position in candidates:
+            key = self.keys[position]
+            if key is not None and needle in key:
+                return position
+        return None
+
+    def find(self, name):
+        """Return the first exact match, falling back to the first partial match, or None"""
+        position = self.find_exact(name)
+        if position is None:
+            position = self.find_partial(name)
+        return position
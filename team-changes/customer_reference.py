@@ -0,0 +1,145 @@
+"""
+Cached reader for the source_customer_details.xlsx reference workbook.
+
+Every sheet is read in one pd.read_excel(sheet_name=None) pass and kept as
+an Arrow snapshot in the sidecar cache directory:
+
+    .workbook_cache/customer_details/
+        manifest.json              file hash, sheet order and column dtypes
+        <file hash>_<n>.arrow      sheet n as an Arrow IPC file
+
+Later runs load the snapshot, which takes milliseconds instead of a full
+workbook parse, until the file's hash changes. Typed columns are stored as
+Arrow arrays and object columns cell by cell with workbook_cache's
+encoding, so loading a snapshot never executes anything stored in it.
+Without pyarrow the workbook is read on every run. The name lookups are
+built from the 'combined' sheet with whole-column string operations.
+"""
+
+import json
+import os
+
+import pandas as pd
+
+from config import CONFIG
+from workbook_cache import (
+    CACHE_DIR, CacheError, arrow_available, decode_column, encode_column, hash_file, read_arrow_file, write_arrow_file,
+)
+
+CUSTOMER_DETAILS_FILE = CONFIG['customer_details']
+
+# Bump when the snapshot layout changes so old snapshots are rebuilt
+SNAPSHOT_VERSION = 2
+SNAPSHOT_DIR = 'customer_details'
+
+# The first sheet, which holds each customer's database id and name
+COMBINED_SHEET = 'combined'
+
+def snapshot_dir(cache_dir):
+    """Return the directory holding the customer details snapshot"""
+    return os.path.join(cache_dir, SNAPSHOT_DIR)
+
+def encode_sheet(sheet):
+    """Arrow table and [column, dtype] pairs for one sheet's DataFrame"""
+    import pyarrow as pa
+    if not all(isinstance(column, str) for column in sheet.columns):
+        raise CacheError("non-text column names")
+    arrays = []
+    try:
+        for column in sheet.columns:
+            values = sheet[column]
+            if values.dtype == object:
+                arrays.append(encode_column(values.tolist()))
+            else:
+                arrays.append(pa.Array.from_pandas(values))
+    except (pa.ArrowException, OverflowError) as e:
+        raise CacheError(f"cannot store column {column!r}: {e}")
+    return pa.table(arrays, names=list(sheet.columns)), [[column, str(sheet[column].dtype)] for column in sheet.columns]
+
+def decode_sheet(table, dtypes):
+    """DataFrame for a table written by encode_sheet"""
+    columns = {}
+    for column, dtype in dtypes:
+        array = table.column(column).combine_chunks()
+        if dtype == 'object':
+            columns[column] = pd.Series(decode_column(array), dtype=object)
+        else:
+            columns[column] = array.to_pandas().astype(dtype)
+    return pd.DataFrame(columns, index=pd.RangeIndex(table.num_rows))
+
+def load_snapshot(cache_dir, file_hash):
+    """Return the cached sheets for file_hash, or None when missing, stale or unreadable"""
+    directory = snapshot_dir(cache_dir)
+    try:
+        with open(os.path.join(directory, 'manifest.json'), encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(manifest, dict) or manifest.get('version') != SNAPSHOT_VERSION or manifest.get('file_hash') != file_hash:
+        return None
+    try:
+        return {entry['name']: decode_sheet(read_arrow_file(os.path.join(directory, entry['file']), entry['checksum']), entry['dtypes'])
+                for entry in manifest['sheets']}
+    except (CacheError, KeyError, TypeError, ValueError) as e:
+        print(f"Ignoring customer details snapshot: {e}")
+        return None
+
+def save_snapshot(cache_dir, file_hash, sheets):
+    """Replace the snapshot with the sheets read from the file with file_hash
+
+    Sheet files are named by the file hash and the manifest is replaced
+    last, so an interrupted save leaves the previous snapshot usable.
+    """
+    directory = snapshot_dir(cache_dir)
+    entries = []
+    for index, (name, sheet) in enumerate(sheets.items()):
+        table, dtypes = encode_sheet(sheet)
+        file_name = f"{file_hash}_{index}.arrow"
+        entries.append({'name': name, 'file': file_name, 'checksum': write_arrow_file(os.path.join(directory, file_name), table),
+                        'dtypes': dtypes})
+    path = os.path.join(directory, 'manifest.json')
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'version': SNAPSHOT_VERSION, 'file_hash': file_hash, 'sheets': entries}, f, indent=2)
+    os.replace(tmp_path, path)
+
+    live_files = {entry['file'] for entry in entries}
+    for file_name in os.listdir(directory):
+        if file_name.endswith('.arrow') and file_name not in live_files:
+            os.remove(os.path.join(directory, file_name))
+    # Left over from the pickle-based snapshot
+    legacy_path = os.path.join(cache_dir, 'customer_details.pkl')
+    if os.path.exists(legacy_path):
+        os.remove(legacy_path)
+
+def read_customer_sheets(file_path=CUSTOMER_DETAILS_FILE, cache_dir=CACHE_DIR):
+    """Return {sheet name: DataFrame} for every sheet, re-reading the workbook only when it changed
+
+    cache_dir=None (or a missing pyarrow) always reads the workbook and keeps no snapshot.
+    """
+    if cache_dir is None or not arrow_available():
+        return pd.read_excel(file_path, sheet_name=None)
+
+    file_hash = hash_file(file_path)
+    sheets = load_snapshot(cache_dir, file_hash)
+    if sheets is None:
+        sheets = pd.read_excel(file_path, sheet_name=None)
+        try:
+            save_snapshot(cache_dir, file_hash, sheets)
+            print(f"Customer details snapshot rebuilt from {file_path}")
+        except CacheError as e:
+            print(f"Customer details not snapshotted: {e}")
+    return sheets
+
+def combined_names(sheets):
+    """The combined sheet's customer names as stripped strings"""
+    return sheets[COMBINED_SHEET]['name'].astype(str).str.strip()
+
+def customer_ids_by_name(sheets):
+    """{customer name: database id} from the combined sheet (a repeated name keeps its last id)"""
+    return dict(zip(combined_names(sheets), sheets[COMBINED_SHEET]['id'].astype(int).tolist()))
+
+def customer_names_by_key(sheets):
+    """{lowercase customer name: customer name} from the combined sheet"""
+    names = combined_names(sheets)
+    return dict(zip(names.str.lower(), names))
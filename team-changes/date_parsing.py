@@ -0,0 +1,153 @@
+"""
+Shared date parsing for the team-changes scripts.
+
+A source column sticks to one date format, and the weekly sheets repeat the
+same handful of dates thousands of times. So instead of trying strptime
+formats per value and catching the misses, a DateParser:
+
+- recognises a format by matching the value against a regular expression
+  built from it, trying first the format that matched the previous new
+  value (the column's detected format)
+- remembers every distinct value it has seen, so a repeated date costs one
+  dict lookup and the hot loop raises and catches nothing
+
+parse_date_column() is the vectorized path for whole pandas columns: it
+detects the formats present and hands each group of values to
+pd.to_datetime with that explicit format.
+"""
+
+import re
+from datetime import datetime
+from functools import lru_cache
+
+# Text dates in the workbook's Column A (most cells are already datetimes)
+WORKBOOK_DATE_FORMATS = ("%Y-%m-%d", "%d/%m/%Y", "%d-%m-%Y", "%Y-%m-%d %H:%M:%S")
+
+# Period dates in team_id_tracker.csv and the fixed periods file
+TRACKER_DATE_FORMATS = ("%d/%m/%Y",)
+
+# created_at in the combined customer sheet, e.g. "25-06-26 04:00:00+00" (YY-MM-DD)
+DB_TIMESTAMP_FORMATS = ("%y-%m-%d %H:%M:%S+00", "%y-%m-%d")
+
+# Created dates in the customer export sheets, e.g. "6th Sep 24" or
+# "Mon 7th Jul 25"; ordinal suffixes are dropped before matching
+CUSTOMER_DATE_FORMATS = ("%d %b %y", "%a %d %b %y", "%d %B %y", "%d %b %Y", "%d/%m/%Y")
+
+ORDINAL_SUFFIX = re.compile(r'(?<=\d)(?:st|nd|rd|th)\b', re.IGNORECASE)
+
+# Regular expression for each strptime directive the formats above use
+DIRECTIVE_PATTERNS = {
+    'Y': r'\d{4}',
+    'y': r'\d{2}',
+    'm': r'\d{1,2}',
+    'd': r'[ \d]?\d',
+    'H': r'\d{1,2}',
+    'M': r'\d{1,2}',
+    'S': r'\d{1,2}',
+    'b': r'[A-Za-z]{3}',
+    'a': r'[A-Za-z]{3}',
+    'B': r'[A-Za-z]+',
+}
+
+# Memo marker for a value seen before that matched no format
+_UNPARSED = object()
+
+@lru_cache(maxsize=None)
+def format_pattern(fmt):
+    """Compiled regular expression for the values strptime could parse with fmt
+
+    The pattern only checks the shape of a value; strptime still validates
+    the fields (a 31st of February matches but does not parse).
+    """
+    parts = re.split(r'%(.)', fmt)
+    # Odd positions are directive letters, even positions literal text
+    pattern = ''.join(DIRECTIVE_PATTERNS[part] if i % 2 else re.escape(part) for i, part in enumerate(parts))
+    return re.compile(pattern, re.IGNORECASE)
+
+def strip_ordinals(text):
+    """'6th Sep 24' -> '6 Sep 24'"""
+    return ORDINAL_SUFFIX.sub('', text)
+
+def detect_format(text, formats, preferred=None):
+    """First of formats whose shape text has, trying preferred first (None when none fits)"""
+    if preferred is not None and format_pattern(preferred).fullmatch(text):
+        return preferred
+    for fmt in formats:
+        if format_pattern(fmt).fullmatch(text):
+            return fmt
+    return None
+
+class DateParser:
+    """Memoized parser for one column's date cells
+
+    datetime cells pass through; text cells are stripped (and cleaned by
+    clean, e.g. strip_ordinals) and parsed with the first matching format.
+    Anything else, or text matching no format, parses to None.
+    """
+
+    def __init__(self, formats=WORKBOOK_DATE_FORMATS, clean=None):
+        self.formats = formats
+        self.clean = clean
+        # Format of the last new value parsed, tried first for the next one
+        self.format = None
+        self.memo = {}
+
+    def __call__(self, value):
+        if isinstance(value, datetime):
+            return value
+        if not isinstance(value, str):
+            return None
+        parsed = self.memo.get(value)
+        if parsed is None:
+            parsed = self.memo[value] = self.parse_new(value)
+        return None if parsed is _UNPARSED else parsed
+
+    def parse_new(self, value):
+        """Parse a value not seen before; _UNPARSED when no format fits"""
+        text = value.strip()
+        if self.clean is not None:
+            text = self.clean(text)
+        fmt = detect_format(text, self.formats, self.format)
+        if fmt is None:
+            return _UNPARSED
+        try:
+            parsed = datetime.strptime(text, fmt)
+        except ValueError:
+            # Right shape, impossible date
+            return _UNPARSED
+        self.format = fmt
+        return parsed
+
+def parse_date_column(values, formats=WORKBOOK_DATE_FORMATS, clean=None):
+    """Parse a column of date cells into a datetime64 Series (NaT where unparsable)
+
+    datetime cells are kept. The text cells are grouped by the format of
+    the first value of each group, and every group is converted by one
+    pd.to_datetime call with that explicit format, so a column in a
+    single format costs one detection and one vectorized parse.
+    """
+    import pandas as pd
+
+    values = pd.Series(values)
+    parsed = pd.Series(pd.NaT, index=values.index, dtype='datetime64[ns]')
+    is_datetime = values.map(lambda value: isinstance(value, datetime)).astype(bool)
+    if is_datetime.any():
+        parsed[is_datetime] = pd.to_datetime(values[is_datetime])
+
+    is_text = values.map(lambda value: isinstance(value, str)).astype(bool)
+    text = values[is_text].str.strip()
+    if clean is not None:
+        text = text.map(clean)
+    preferred = None
+    while not text.empty:
+        fmt = detect_format(text.iloc[0], formats, preferred)
+        if fmt is None:
+            # The first value fits no format; drop every value that fits none
+            fits = text.map(lambda value: detect_format(value, formats) is not None).astype(bool)
+            text = text[fits]
+            continue
+        matches = text.str.fullmatch(format_pattern(fmt).pattern, flags=re.IGNORECASE)
+        parsed[text.index[matches]] = pd.to_datetime(text[matches], format=fmt, errors='coerce')
+        text = text[~matches]
+        preferred = fmt
+    return parsed
@@ -0,0 +1,136 @@
+"""
+COPY-ready rows for the customers, jobs and time_entries database tables.
+
+Turns the extractor's records into rows in the column order of
+server/db/schema.ts, with values converted the way import-exported-data.ts
+converts them on insert: clean frequencies mapped to the enum, empty
+optional fields as NULL, integer prices, booleans defaulting to false.
+One deliberate difference: active is the spreadsheet's value, while the
+TS import stores `customer.active || true` and so loads every customer as
+active. Time entries whose staff did not resolve to a user are left out
+and sent to the rejects file, since time_entries.user_id is NOT NULL.
+output_writer writes them in PostgreSQL's COPY text format and bulk_load.py
+streams the files into the database.
+"""
+
+import math
+
+from rejects import NULL_REJECTS
+
+# Column order of the tables in server/db/schema.ts
+DB_COLUMNS = {
+    'customers': ['id', 'name', 'address', 'latitude', 'longitude', 'phone', 'email', 'price',
+                  'clean_frequency', 'notes', 'target_time_minutes', 'average_wage_ratio',
+                  'is_friends_family', 'friends_family_minutes', 'active', 'created_at'],
+    'jobs': ['id', 'customer_id', 'team_id', 'price', 'customer_name', 'team_members_at_creation',
+             'additional_staff', 'status', 'created_at'],
+    'time_entries': ['id', 'user_id', 'job_id', 'clock_in_time', 'clock_out_time', 'lunch_break',
+                     'geofence_override', 'auto_lunch_deducted', 'staff'],
+}
+
+# Load order; foreign keys point from later tables to earlier ones
+DB_TABLES = ['customers', 'jobs', 'time_entries']
+
+# Spreadsheet clean_frequency labels to the clean_frequency enum
+CLEAN_FREQUENCIES = {
+    'Weekly': 'weekly',
+    'Fortnightly': 'fortnightly',
+    'Tri-weekly': 'tri-weekly',
+    'Monthly': 'monthly',
+    'One off': 'one-off',
+}
+
+def is_blank(value):
+    """True for None, empty strings and NaN"""
+    return value is None or value == '' or (isinstance(value, float) and math.isnan(value))
+
+def text_or_null(value):
+    """Text value, or None when blank"""
+    return None if is_blank(value) else str(value)
+
+def integer_or_null(value):
+    """Whole-number value, or None when blank or not a number"""
+    if is_blank(value):
+        return None
+    try:
+        return int(round(float(value)))
+    except (TypeError, ValueError):
+        return None
+
+def positive_integer_or_null(value):
+    """Like integer_or_null, but 0 also becomes None (an unset ID or price)"""
+    number = integer_or_null(value)
+    return number or None
+
+def flag(value):
+    """Boolean value, with blanks as false"""
+    return False if is_blank(value) else bool(value)
+
+def customer_row(customer):
+    """customers table row for a customer record"""
+    return (
+        customer.id,
+        customer.name,
+        text_or_null(customer.address) or '',
+        text_or_null(customer.latitude) or '',
+        text_or_null(customer.longitude) or '',
+        text_or_null(customer.phone),
+        text_or_null(customer.email),
+        integer_or_null(customer.price) or 0,
+        CLEAN_FREQUENCIES.get(customer.clean_frequency, 'weekly'),
+        text_or_null(customer.notes),
+        integer_or_null(customer.target_time_minutes),
+        integer_or_null(customer.average_wage_ratio),
+        flag(customer.is_friends_family),
+        integer_or_null(customer.friends_family_minutes),
+        flag(customer.active),
+        customer.created_at,
+    )
+
+def job_row(job):
+    """jobs table row for a job record"""
+    return (
+        job.id,
+        positive_integer_or_null(job.customer_id),
+        positive_integer_or_null(job.team_id),
+        positive_integer_or_null(job.price),
+        text_or_null(job.customer_name),
+        job.team_members_at_creation,
+        job.additional_staff,
+        job.status or 'completed',
+        job.created_at,
+    )
+
+def time_entry_row(time_entry):
+    """time_entries table row for a time-entry record"""
+    return (
+        time_entry.id,
+        positive_integer_or_null(time_entry.user_id),
+        time_entry.job_id,
+        text_or_null(time_entry.clock_in_time),
+        text_or_null(time_entry.clock_out_time),
+        flag(time_entry.lunch_break),
+        flag(time_entry.geofence_override),
+        flag(time_entry.auto_lunch_deducted),
+        text_or_null(time_entry.staff),
+    )
+
+def loadable_time_entries(all_time_entries, rejects=NULL_REJECTS):
+    """Time entries with a user; the rest go to rejects, as time_entries.user_id is NOT NULL
+
+    One NULL user_id would abort bulk_load.py's whole COPY transaction.
+    """
+    for time_entry in all_time_entries:
+        if positive_integer_or_null(time_entry.user_id) is None:
+            rejects.reject('time_entry_without_user',
+                           detail=f"{time_entry.staff} (time entry {time_entry.id}, job {time_entry.job_id})")
+            continue
+        yield time_entry
+
+def db_sheets(all_job_data, all_time_entries, all_customers_data, rejects=NULL_REJECTS):
+    """Return (table, columns, rows) for each table, in load order"""
+    return [
+        ('customers', DB_COLUMNS['customers'], map(customer_row, all_customers_data)),
+        ('jobs', DB_COLUMNS['jobs'], map(job_row, all_job_data)),
+        ('time_entries', DB_COLUMNS['time_entries'], map(time_entry_row, loadable_time_entries(all_time_entries, rejects))),
+    ]
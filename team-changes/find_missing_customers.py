@@ -1,70 +1,56 @@
-import pandas as pd
-import openpyxl
-from datetime import datetime, time, timedelta
+import argparse
+import csv
+from config import CONFIG
+from customer_reference import CUSTOMER_DETAILS_FILE, customer_names_by_key, read_customer_sheets
+from fuzzy_match import FuzzyNameMatcher
+from instrumentation import NULL_PROFILER, add_profile_arguments, profiler_from_args
+from rejects import RejectSink, rejects_path
+from workbook_extraction import WORKBOOK_PATH, EXCLUDED_SHEETS, add_verbose_argument, iter_cached_workbook_rows, set_verbose
 
-def parse_date(date_val):
-    if isinstance(date_val, datetime):
-        return date_val
-    elif isinstance(date_val, str):
-        try:
-            return datetime.strptime(date_val, '%d/%m/%Y')
-        except ValueError:
-            try:
-                return datetime.strptime(date_val, '%Y-%m-%d')
-            except ValueError:
-                return None
-    return None
+SUGGESTIONS_FILE = CONFIG['suggestions_file']
 
-def main():
+def main(rows=None, suggestions=3, profiler=NULL_PROFILER):
+    """Report workbook customers missing from source_customer_details.xlsx
+
+    rows may be a pre-read row stream (see workbook_extraction) so several
+    scripts can share one parse of the workbook. Each missing customer is
+    listed with up to `suggestions` closest reference names. profiler
+    collects per-stage timings and counters (see instrumentation).
+    """
     # Load customer details for mapping
-    customer_details = pd.read_excel("source_customer_details.xlsx")
-    reference_customers = {str(row['name']).strip().lower(): str(row['name']).strip() for _, row in customer_details.iterrows()}
+    with profiler.stage('reference'):
+        reference_customers = customer_names_by_key(read_customer_sheets(CUSTOMER_DETAILS_FILE))
     
     print(f"Reference customers loaded: {len(reference_customers)}")
     
-    # Load the workbook
-    file_path = "MyHome Wages Macros app.xlsm"
-    workbook = openpyxl.load_workbook(file_path, data_only=True)
+    # Stream rows from the workbook (via the sidecar cache) unless they were supplied
+    if rows is None:
+        rows = iter_cached_workbook_rows(WORKBOOK_PATH, EXCLUDED_SHEETS)
     
-    # Sheets to exclude
-    excluded_sheets = ["Totals", "Parameters", "Active Jobs", "17 May 25", "23 May 25", "30 May 25", "25 April 25", "6 June 25", "9 May 25"]
+    # Rows without a customer go to a rejects file
+    rejects = RejectSink('find_missing_customers', rejects_path('find_missing_customers'), profiler)
     
     # Track all customers found in source
     source_customers = set()
     missing_customers = set()
     
-    # Process each sheet
-    for sheet_name in workbook.sheetnames:
-        if sheet_name in excluded_sheets:
-            continue
-        
-        print(f"\nProcessing sheet: {sheet_name}")
-        sheet = workbook[sheet_name]
-        
-        # Get data from the sheet
-        for row in sheet.iter_rows(min_row=2, values_only=True):
-            # Check if row has enough columns
-            if len(row) < 13:
-                continue
-                
-            # Extract customer name
-            customer_name = row[2]  # Column C - Client/Customer name
-            
+    # Parsing happens lazily as the rows are scanned, so it is timed per row
+    with profiler.stage('scan'):
+        for row in profiler.timed_iter('load', rows):
             # Skip if customer name is empty
-            if not customer_name:
-                continue
-            
-            # Clean customer name
-            customer_name_clean = str(customer_name).strip()
-            if not customer_name_clean:
+            if not row.customer:
+                rejects.reject_row('missing_customer', row)
                 continue
             
             # Add to source customers
-            source_customers.add(customer_name_clean)
+            source_customers.add(row.customer)
             
             # Check if in reference
-            if customer_name_clean.lower() not in reference_customers:
-                missing_customers.add(customer_name_clean)
+            if row.customer.lower() not in reference_customers:
+                missing_customers.add(row.customer)
+    profiler.count('source_customers', len(source_customers))
+    profiler.count('missing_customers', len(missing_customers))
+    rejects.close()
     
     print(f"\n{'='*50}")
     print(f"SUMMARY:")
@@ -76,8 +62,17 @@ def main():
     if missing_customers:
         print(f"\nMISSING CUSTOMERS (in source but not in reference):")
         print(f"{'='*50}")
-        for customer in sorted(missing_customers):
-            print(f"- {customer}")
+        # Suggest the closest reference names for each missing customer
+        matcher = FuzzyNameMatcher(reference_customers.values())
+        with profiler.stage('suggest'), open(SUGGESTIONS_FILE, 'w', newline='', encoding='utf-8') as csvfile:
+            writer = csv.writer(csvfile)
+            writer.writerow(['missing_customer', 'rank', 'suggestion', 'score'])
+            for customer in sorted(missing_customers):
+                print(f"- {customer}")
+                for rank, (suggestion, score) in enumerate(matcher.top_k(customer, suggestions), start=1):
+                    print(f"    {rank}. {suggestion} ({score:.2f})")
+                    writer.writerow([customer, rank, suggestion, score])
+        print(f"\nSuggestions saved to {SUGGESTIONS_FILE}")
     else:
         print("\n✅ All customers in source are found in reference file!")
     
@@ -88,5 +83,17 @@ def main():
     for i, customer in enumerate(sorted(reference_customers.values())[:10]):
         print(f"{i+1}. {customer}")
 
+def cli(argv=None, prog=None):
+    """Parse the command line (argv, or sys.argv when None) and run the script"""
+    parser = argparse.ArgumentParser(prog=prog, description="Report workbook customers missing from source_customer_details.xlsx")
+    parser.add_argument('--suggestions', type=int, default=3, help="Closest reference names to suggest per missing customer (default: 3)")
+    add_profile_arguments(parser, 'find_missing_customers')
+    add_verbose_argument(parser)
+    args = parser.parse_args(argv)
+    set_verbose(args.verbose)
+    profiler = profiler_from_args(args, 'find_missing_customers')
+    main(suggestions=args.suggestions, profiler=profiler)
+    profiler.finish()
+
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    cli()
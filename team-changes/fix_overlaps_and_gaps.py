@@ -1,209 +1,308 @@
 #!/usr/bin/env python3
 """
-Fix overlapping dates and gaps in team assignments
-Based on the specific issues identified:
-- Green lines represent overlapping dates that need to be split
-- Blue lines represent gaps that need to be filled
+Fix overlapping dates, inverted ranges and gaps in team assignments
+
+Works on any team-period table with team_id, start_date and end_date columns
+(DD/MM/YYYY), such as team_id_tracker.csv. Rows of the same team_id and
+dates form one period; in member-per-row tables that is every member of the
+team, and they are split or moved together. Per team_id:
+- Inverted ranges (start after end) are clipped, swapped or dropped
+- Overlaps are resolved with a sweep line over the period start and end
+  days: each day goes to the winning period among those covering it,
+  by default the shortest, so the longer period is split around it
+- Gaps between consecutive periods are filled from a neighbour, up to a
+  maximum length
+
+Every change is recorded in a change log written next to the fixed table.
 """
 
+import argparse
 import csv
-from datetime import datetime, date
+import heapq
+from datetime import timedelta
+
+from config import CONFIG
+from date_parsing import TRACKER_DATE_FORMATS, DateParser
+
+INPUT_FILE = CONFIG['tracker_file']
+OUTPUT_FILE = CONFIG['fixed_periods_file']
+CHANGES_FILE = CONFIG['period_changes_file']
+
+# Which period keeps the overlapping days
+OVERLAP_RULES = {
+    'split-longer': lambda period: (period['length'], period['start_date']),  # Shorter period wins
+    'keep-earlier': lambda period: (period['start_date'], period['length']),  # Earlier-starting period wins
+    'keep-later': lambda period: (-period['start_date'].toordinal(), period['length']),  # Later-starting period wins
+}
+
+# What to do with a period whose start date is after its end date
+INVERTED_RULES = ('clip', 'swap', 'drop')
+
+# Which neighbour fills a gap between two periods
+GAP_RULES = ('extend-previous', 'extend-next', 'leave')
+
+# Gaps longer than this many days are left alone (e.g. a team that stopped working)
+MAX_GAP_DAYS = 7
+
+CHANGE_FIELDS = ['team_id', 'team', 'action', 'old_start_date', 'old_end_date', 'new_start_date', 'new_end_date', 'detail']
+
+ONE_DAY = timedelta(days=1)
+
+# Shared by every read of a periods file; each distinct date string is parsed once
+_parse_period_date = DateParser(TRACKER_DATE_FORMATS)
 
 def parse_date(date_str):
     """Parse date in DD/MM/YYYY format"""
-    return datetime.strptime(date_str, '%d/%m/%Y').date()
+    parsed = _parse_period_date(date_str)
+    if parsed is None:
+        raise ValueError(f"time data {date_str!r} does not match format '%d/%m/%Y'")
+    return parsed.date()
 
 def format_date(date_obj):
     """Format date as DD/MM/YYYY"""
     return date_obj.strftime('%d/%m/%Y')
 
-def fix_overlaps_and_gaps():
-    """Fix the specific overlapping and gap issues"""
-    
-    # Start with the current problematic data
-    current_data = [
-        {'team_id': '1', 'name': 'Orla Shelly & Julie Roccati', 'start_date': '02/12/2024', 'end_date': '04/12/2024'},
-        {'team_id': '1', 'name': 'Orla Shelly & Tia', 'start_date': '05/12/2024', 'end_date': '13/12/2024'},
-        {'team_id': '1', 'name': 'Orla Shelly & Sheyda', 'start_date': '11/12/2024', 'end_date': '11/12/2024'},
-        {'team_id': '1', 'name': 'Tia', 'start_date': '16/12/2024', 'end_date': '23/12/2024'},
-        {'team_id': '1', 'name': 'Aoife O\'Gorman & Aoife Carroll', 'start_date': '07/01/2025', 'end_date': '17/01/2025'},
-        {'team_id': '1', 'name': 'Aoife O\'Gorman & Aoife Carroll & Orla Shelly', 'start_date': '10/01/2025', 'end_date': '10/01/2025'},
-        {'team_id': '2', 'name': 'Julie Roccati & Sheyda', 'start_date': '05/12/2024', 'end_date': '03/01/2025'},
-        {'team_id': '2', 'name': 'Sheyda', 'start_date': '06/01/2025', 'end_date': '06/01/2025'},
-        {'team_id': '2', 'name': 'Julie Roccati & Sheyda & Orla Shelly', 'start_date': '13/01/2025', 'end_date': '03/01/2025'},
-        {'team_id': '2', 'name': 'Orla Shelly & Julie Roccati', 'start_date': '14/01/2025', 'end_date': '17/01/2025'},
-    ]
-    
-    # Convert to date objects
-    for entry in current_data:
-        entry['start_date'] = parse_date(entry['start_date'])
-        entry['end_date'] = parse_date(entry['end_date'])
-    
-    # Fix the specific issues:
-    
-    # 1. Team ID 1 - Orla Shelly & Tia overlaps with Orla Shelly & Sheyda on 11/12/2024
-    # Split Orla Shelly & Tia into two periods: 05/12/2024 to 10/12/2024 and 12/12/2024 to 13/12/2024
-    
-    # 2. Team ID 1 - Tia overlaps with Orla Shelly & Tia on 16/12/2024 to 23/12/2024
-    # This should be handled by creating separate entries
-    
-    # 3. Team ID 2 - Gap between Sheyda ending 06/01/2025 and Julie Roccati & Sheyda & Orla Shelly starting 13/01/2025
-    # Need to fill the gap from 07/01/2025 to 12/01/2025
-    
-    fixed_data = []
-    
-    # Team ID 1 fixes
-    # Orla Shelly & Julie Roccati (02/12/2024 to 04/12/2024) - no change
-    fixed_data.append({
-        'team_id': '1',
-        'name': 'Orla Shelly & Julie Roccati',
-        'start_date': date(2024, 12, 2),
-        'end_date': date(2024, 12, 4)
-    })
-    
-    # Orla Shelly & Tia - split due to overlap with Orla Shelly & Sheyda on 11/12/2024
-    fixed_data.append({
-        'team_id': '1',
-        'name': 'Orla Shelly & Tia',
-        'start_date': date(2024, 12, 5),
-        'end_date': date(2024, 12, 10)
-    })
-    
-    # Orla Shelly & Sheyda (11/12/2024) - no change
-    fixed_data.append({
-        'team_id': '1',
-        'name': 'Orla Shelly & Sheyda',
-        'start_date': date(2024, 12, 11),
-        'end_date': date(2024, 12, 11)
-    })
-    
-    # Orla Shelly & Tia - second period after Sheyda
-    fixed_data.append({
-        'team_id': '1',
-        'name': 'Orla Shelly & Tia',
-        'start_date': date(2024, 12, 12),
-        'end_date': date(2024, 12, 13)
-    })
-    
-    # Tia (16/12/2024 to 23/12/2024) - no change
-    fixed_data.append({
-        'team_id': '1',
-        'name': 'Tia',
-        'start_date': date(2024, 12, 16),
-        'end_date': date(2024, 12, 23)
-    })
-    
-    # Aoife O'Gorman & Aoife Carroll - split into two periods
-    # First period: 07/01/2025 to 09/01/2025
-    fixed_data.append({
-        'team_id': '1',
-        'name': 'Aoife O\'Gorman & Aoife Carroll',
-        'start_date': date(2025, 1, 7),
-        'end_date': date(2025, 1, 9)
-    })
-    
-    # Aoife O'Gorman & Aoife Carroll & Orla Shelly (10/01/2025) - no change
-    fixed_data.append({
-        'team_id': '1',
-        'name': 'Aoife O\'Gorman & Aoife Carroll & Orla Shelly',
-        'start_date': date(2025, 1, 10),
-        'end_date': date(2025, 1, 10)
-    })
-    
-    # Aoife O'Gorman & Aoife Carroll - second period: 11/01/2025 to 17/01/2025
-    fixed_data.append({
-        'team_id': '1',
-        'name': 'Aoife O\'Gorman & Aoife Carroll',
-        'start_date': date(2025, 1, 11),
-        'end_date': date(2025, 1, 17)
-    })
-    
-    # Team ID 2 fixes
-    # Julie Roccati & Sheyda (05/12/2024 to 03/01/2025) - no change
-    fixed_data.append({
-        'team_id': '2',
-        'name': 'Julie Roccati & Sheyda',
-        'start_date': date(2024, 12, 5),
-        'end_date': date(2025, 1, 3)
-    })
-    
-    # Sheyda (06/01/2025) - no change
-    fixed_data.append({
-        'team_id': '2',
-        'name': 'Sheyda',
-        'start_date': date(2025, 1, 6),
-        'end_date': date(2025, 1, 6)
-    })
-    
-    # Julie Roccati & Sheyda (07/01/2025 to 12/01/2025) - changed from just Sheyda
-    fixed_data.append({
-        'team_id': '2',
-        'name': 'Julie Roccati & Sheyda',
-        'start_date': date(2025, 1, 7),
-        'end_date': date(2025, 1, 12)
-    })
-    
-    # Julie Roccati & Sheyda & Orla Shelly (13/01/2025) - fix end date
-    fixed_data.append({
-        'team_id': '2',
-        'name': 'Julie Roccati & Sheyda & Orla Shelly',
-        'start_date': date(2025, 1, 13),
-        'end_date': date(2025, 1, 13)  # Fix: should end on 13/01/2025, not 03/01/2025
-    })
-    
-    # Orla Shelly & Julie Roccati (14/01/2025 to 17/01/2025) - no change
-    fixed_data.append({
-        'team_id': '2',
-        'name': 'Orla Shelly & Julie Roccati',
-        'start_date': date(2025, 1, 14),
-        'end_date': date(2025, 1, 17)
+def team_sort_key(team_id):
+    """Numeric team IDs in number order, anything else after them"""
+    return (0, int(team_id), '') if str(team_id).isdigit() else (1, 0, str(team_id))
+
+def load_periods(filename, label_column=None):
+    """Read a team-period table into periods, returning (fieldnames, periods)
+
+    Rows with the same team_id and dates are one period: in member-per-row
+    tables those are the members of one team. The period's team label is
+    label_column when given, else original_team when the table has it,
+    else the rows' names joined with ' & '. With a label column, rows with
+    different labels stay separate periods even when their team_id and
+    dates match, so the overlap rules decide between them.
+    """
+    with open(filename, newline='', encoding='utf-8') as csvfile:
+        reader = csv.DictReader(csvfile)
+        # Drop unnamed columns left by trailing commas
+        fieldnames = [field for field in reader.fieldnames if field]
+        if label_column is None and 'original_team' in fieldnames:
+            label_column = 'original_team'
+        periods = {}
+        for row in reader:
+            row = {field: row[field] for field in fieldnames}
+            if not row['team_id'] or not row['start_date'] or not row['end_date']:
+                continue
+            label = row[label_column] if label_column else ''
+            key = (row['team_id'], label, row['start_date'], row['end_date'])
+            if key not in periods:
+                periods[key] = {
+                    'team_id': row['team_id'],
+                    'start_date': parse_date(row['start_date']),
+                    'end_date': parse_date(row['end_date']),
+                    'rows': [],
+                }
+            periods[key]['rows'].append(row)
+    for period in periods.values():
+        if label_column:
+            period['team'] = period['rows'][0][label_column]
+        else:
+            period['team'] = ' & '.join(row['name'] for row in period['rows'])
+    return fieldnames, list(periods.values())
+
+def log_change(changes, period, action, new_start=None, new_end=None, detail=''):
+    """Record one change to a period"""
+    changes.append({
+        'team_id': period['team_id'],
+        'team': period['team'],
+        'action': action,
+        'old_start_date': format_date(period['start_date']),
+        'old_end_date': format_date(period['end_date']),
+        'new_start_date': format_date(new_start) if new_start else '',
+        'new_end_date': format_date(new_end) if new_end else '',
+        'detail': detail,
     })
-    
-    # Sort by team_id and start_date
-    fixed_data.sort(key=lambda x: (x['team_id'], x['start_date']))
-    
-    return fixed_data
-
-def save_to_csv(data, filename='team_id_periods_fixed_final.csv'):
-    """Save the fixed data to CSV"""
+
+def fix_inverted(periods, rule, changes):
+    """Apply the inverted-range rule, returning the periods that remain"""
+    kept = []
+    for period in periods:
+        if period['start_date'] <= period['end_date']:
+            kept.append(period)
+            continue
+        if rule == 'drop':
+            log_change(changes, period, 'inverted-dropped')
+            continue
+        if rule == 'swap':
+            new_start, new_end = period['end_date'], period['start_date']
+        else:
+            # clip: a single day at the start date
+            new_start, new_end = period['start_date'], period['start_date']
+        log_change(changes, period, f'inverted-{rule}', new_start, new_end)
+        period['start_date'], period['end_date'] = new_start, new_end
+        kept.append(period)
+    return kept
+
+def resolve_overlaps(periods, rule, changes):
+    """Sweep one team's periods into non-overlapping pieces, in start order
+
+    Boundaries are every start day and every day after an end. Between two
+    boundaries the set of covering periods is fixed, so the winner is read
+    off a heap ordered by the overlap rule; periods that have ended are
+    popped lazily. Consecutive days won by the same period are merged.
+    """
+    priority = OVERLAP_RULES[rule]
+    for period in periods:
+        period['length'] = (period['end_date'] - period['start_date']).days + 1
+    by_start = sorted(range(len(periods)), key=lambda i: periods[i]['start_date'])
+    boundaries = sorted({period['start_date'] for period in periods} | {period['end_date'] + ONE_DAY for period in periods})
+
+    pieces = []  # [period index, start, end]
+    active = []
+    next_start = 0
+    for boundary, next_boundary in zip(boundaries, boundaries[1:]):
+        while next_start < len(by_start) and periods[by_start[next_start]]['start_date'] == boundary:
+            index = by_start[next_start]
+            heapq.heappush(active, (priority(periods[index]), index))
+            next_start += 1
+        while active and periods[active[0][1]]['end_date'] < boundary:
+            heapq.heappop(active)
+        if not active:
+            continue
+        winner = active[0][1]
+        if pieces and pieces[-1][0] == winner and pieces[-1][2] == boundary - ONE_DAY:
+            pieces[-1][2] = next_boundary - ONE_DAY
+        else:
+            pieces.append([winner, boundary, next_boundary - ONE_DAY])
+
+    # Log what happened to every period that did not survive intact
+    pieces_by_period = {}
+    for index, start, end in pieces:
+        pieces_by_period.setdefault(index, []).append((start, end))
+    for index, period in enumerate(periods):
+        own = pieces_by_period.get(index, [])
+        if not own:
+            log_change(changes, period, 'overlap-dropped', detail='covered by other periods')
+        elif len(own) > 1:
+            ranges = ', '.join(f"{format_date(start)}-{format_date(end)}" for start, end in own)
+            for start, end in own:
+                log_change(changes, period, 'overlap-split', start, end, f"split into {ranges}")
+        elif own[0] != (period['start_date'], period['end_date']):
+            log_change(changes, period, 'overlap-trimmed', own[0][0], own[0][1])
+
+    return [{**periods[index], 'start_date': start, 'end_date': end} for index, start, end in pieces]
+
+def merge_adjacent(pieces, changes):
+    """Merge consecutive pieces of the same team with no days between them"""
+    merged = []
+    for piece in pieces:
+        previous = merged[-1] if merged else None
+        if previous and previous['team'] == piece['team'] and previous['end_date'] + ONE_DAY == piece['start_date']:
+            log_change(changes, piece, 'merged', previous['start_date'], piece['end_date'],
+                       f"joined to period starting {format_date(previous['start_date'])}")
+            # Same team, so the previous piece's rows already list its members
+            previous['end_date'] = piece['end_date']
+        else:
+            merged.append(dict(piece))
+    return merged
+
+def fill_gaps(pieces, rule, max_gap_days, changes):
+    """Close gaps between consecutive pieces from a neighbour, up to max_gap_days"""
+    if rule == 'leave':
+        return pieces
+    for previous, following in zip(pieces, pieces[1:]):
+        gap_days = (following['start_date'] - previous['end_date']).days - 1
+        if gap_days <= 0:
+            continue
+        if max_gap_days is not None and gap_days > max_gap_days:
+            log_change(changes, previous, 'gap-left', detail=f"{gap_days} day gap before {following['team']}")
+            continue
+        if rule == 'extend-previous':
+            new_end = following['start_date'] - ONE_DAY
+            log_change(changes, previous, 'gap-filled', previous['start_date'], new_end, f"{gap_days} day gap")
+            previous['end_date'] = new_end
+        else:
+            new_start = previous['end_date'] + ONE_DAY
+            log_change(changes, following, 'gap-filled', new_start, following['end_date'], f"{gap_days} day gap")
+            following['start_date'] = new_start
+    return pieces
+
+def fix_overlaps_and_gaps(periods, overlap_rule='split-longer', inverted_rule='clip', gap_rule='extend-previous',
+                          max_gap_days=MAX_GAP_DAYS):
+    """Fix inverted ranges, overlaps and gaps for every team; return (fixed periods, change log)"""
+    changes = []
+    teams = {}
+    for period in fix_inverted(periods, inverted_rule, changes):
+        teams.setdefault(period['team_id'], []).append(period)
+
+    fixed = []
+    for team_id in sorted(teams, key=team_sort_key):
+        pieces = resolve_overlaps(teams[team_id], overlap_rule, changes)
+        pieces = merge_adjacent(pieces, changes)
+        fixed.extend(fill_gaps(pieces, gap_rule, max_gap_days, changes))
+    return fixed, changes
+
+def save_to_csv(periods, fieldnames, filename=OUTPUT_FILE):
+    """Save the fixed periods to CSV, one row per original row of each period"""
     with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
-        fieldnames = ['team_id', 'name', 'start_date', 'end_date']
         writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-        
+
         writer.writeheader()
-        for entry in data:
-            writer.writerow({
-                'team_id': entry['team_id'],
-                'name': entry['name'],
-                'start_date': format_date(entry['start_date']),
-                'end_date': format_date(entry['end_date'])
-            })
-    
+        for period in periods:
+            for row in period['rows']:
+                writer.writerow({
+                    **row,
+                    'start_date': format_date(period['start_date']),
+                    'end_date': format_date(period['end_date'])
+                })
+
     print(f"Fixed data saved to {filename}")
 
-def main():
+def save_changes(changes, filename=CHANGES_FILE):
+    """Save the change log to CSV"""
+    with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=CHANGE_FIELDS)
+        writer.writeheader()
+        writer.writerows(changes)
+
+    print(f"Change log saved to {filename}")
+
+def main(input_file=INPUT_FILE, output_file=OUTPUT_FILE, changes_file=CHANGES_FILE, label_column=None,
+         overlap_rule='split-longer', inverted_rule='clip', gap_rule='extend-previous', max_gap_days=MAX_GAP_DAYS):
     """Main function"""
     print("Fixing overlapping dates and gaps...")
     print("-" * 40)
-    
-    # Get the fixed data
-    fixed_data = fix_overlaps_and_gaps()
-    
-    # Save to CSV
-    save_to_csv(fixed_data)
-    
+
+    fieldnames, periods = load_periods(input_file, label_column)
+    fixed_data, changes = fix_overlaps_and_gaps(periods, overlap_rule, inverted_rule, gap_rule, max_gap_days)
+
+    save_to_csv(fixed_data, fieldnames, output_file)
+    save_changes(changes, changes_file)
+
     # Print summary
     print(f"\n{'='*40}")
     print(f"FIXED TEAM ID CSV GENERATED!")
     print(f"{'='*40}")
-    print(f"Total team periods: {len(fixed_data)}")
-    
-    # Show the fixed data
-    print(f"\nFixed data:")
-    for i, entry in enumerate(fixed_data, 1):
-        start_date_str = format_date(entry['start_date'])
-        end_date_str = format_date(entry['end_date'])
-        print(f"  {i}. Team ID: {entry['team_id']}, Name: '{entry['name']}', Period: {start_date_str} to {end_date_str}")
+    print(f"Team periods in: {len(periods)}, out: {len(fixed_data)}")
+    counts = {}
+    for change in changes:
+        counts[change['action']] = counts.get(change['action'], 0) + 1
+    for action, count in sorted(counts.items()):
+        print(f"  {action}: {count}")
+
+def cli(argv=None, prog=None):
+    """Parse the command line (argv, or sys.argv when None) and run the script"""
+    parser = argparse.ArgumentParser(prog=prog, description="Fix overlapping, inverted and gapped team periods")
+    parser.add_argument('--input', default=INPUT_FILE, help=f"Team-period table to fix (default: {INPUT_FILE})")
+    parser.add_argument('--output', default=OUTPUT_FILE, help=f"Fixed table (default: {OUTPUT_FILE})")
+    parser.add_argument('--changes', default=CHANGES_FILE, help=f"Change log (default: {CHANGES_FILE})")
+    parser.add_argument('--label-column', default=None,
+                        help="Column naming the team of a period (default: original_team if present, else the joined names)")
+    parser.add_argument('--overlap-rule', choices=sorted(OVERLAP_RULES), default='split-longer',
+                        help="Which period keeps overlapping days (default: split-longer, the shorter period wins)")
+    parser.add_argument('--inverted-rule', choices=INVERTED_RULES, default='clip',
+                        help="Fix for start after end: clip to the start day, swap the dates, or drop (default: clip)")
+    parser.add_argument('--gap-rule', choices=GAP_RULES, default='extend-previous',
+                        help="Neighbour that fills a gap between periods (default: extend-previous)")
+    parser.add_argument('--max-gap-days', type=int, default=MAX_GAP_DAYS,
+                        help=f"Only fill gaps up to this many days (default: {MAX_GAP_DAYS})")
+    args = parser.parse_args(argv)
+    main(args.input, args.output, args.changes, args.label_column, args.overlap_rule, args.inverted_rule,
+         args.gap_rule, args.max_gap_days)
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    cli()
@@ -0,0 +1,104 @@
+"""
+Fuzzy customer-name matching backed by a trigram candidate index.
+
+Each reference name is normalized (lowercase, punctuation folded to spaces,
+whitespace collapsed) and indexed by its padded trigrams. A query only
+scores the reference names that share trigrams with it: the Dice overlap
+picks a small candidate pool, which is then ranked by difflib's sequence
+similarity. Lookups take around a millisecond against tens of thousands of
+names, instead of comparing every pair.
+"""
+
+import heapq
+import re
+from collections import Counter
+from difflib import SequenceMatcher
+
+from customer_index import ngrams
+
+# Candidates re-ranked per query, relative to the number of results asked for
+CANDIDATE_FACTOR = 5
+MIN_CANDIDATES = 20
+
+# Trigrams found in more than this share of reference names are skipped when
+# the query has at least MIN_SELECTIVE_GRAMS rarer ones
+COMMON_GRAM_SHARE = 0.02
+MIN_SELECTIVE_GRAMS = 3
+
+NON_ALPHANUMERIC = re.compile(r'[^0-9a-z]+')
+
+def normalize_name(name):
+    """Lowercase a name and fold punctuation and runs of whitespace to single spaces"""
+    return NON_ALPHANUMERIC.sub(' ', str(name).lower()).strip()
+
+def name_trigrams(normalized):
+    """Padded trigrams so short names and word boundaries still produce grams"""
+    return ngrams(f"  {normalized} ")
+
+class FuzzyNameMatcher:
+    """Top-k closest reference names for a query, with a similarity score in [0, 1]"""
+
+    def __init__(self, reference_names, min_score=0.9):
+        self.min_score = min_score
+        self.names = []
+        self.normalized = []
+        self.gram_counts = []
+        self.postings = {}
+        seen = set()
+        for name in reference_names:
+            name = str(name).strip()
+            if not name or name in seen:
+                continue
+            seen.add(name)
+            normalized = normalize_name(name)
+            grams = name_trigrams(normalized)
+            position = len(self.names)
+            self.names.append(name)
+            self.normalized.append(normalized)
+            self.gram_counts.append(len(grams))
+            for gram in grams:
+                self.postings.setdefault(gram, []).append(position)
+        self._best_cache = {}
+
+    def top_k(self, name, k=3):
+        """Return up to k (reference_name, score) pairs, best first"""
+        normalized = normalize_name(name)
+        grams = name_trigrams(normalized)
+        posting_lists = sorted((self.postings[gram] for gram in grams if gram in self.postings), key=len)
+        # Grams shared by a large share of the index (common first names,
+        # padding around frequent letters) add cost but barely discriminate,
+        # so skip them as long as enough selective grams remain
+        common_limit = max(COMMON_GRAM_SHARE * len(self.names), MIN_CANDIDATES)
+        selective = [postings for postings in posting_lists if len(postings) <= common_limit]
+        if len(selective) >= MIN_SELECTIVE_GRAMS:
+            posting_lists = selective
+        shared = Counter()
+        for postings in posting_lists:
+            shared.update(postings)
+        if not shared:
+            return []
+
+        # Dice overlap on trigrams narrows the field to a few candidates
+        pool_size = max(k * CANDIDATE_FACTOR, MIN_CANDIDATES)
+        candidates = heapq.nlargest(
+            pool_size, shared,
+            key=lambda position: 2 * shared[position] / (len(grams) + self.gram_counts[position]),
+        )
+
+        scored = []
+        for position in candidates:
+            score = SequenceMatcher(None, normalized, self.normalized[position]).ratio()
+            scored.append((self.names[position], round(score, 3)))
+        scored.sort(key=lambda match: (-match[1], match[0]))
+        return scored[:k]
+
+    def best(self, name):
+        """Return the closest reference name if it scores at least min_score, else None"""
+        if name not in self._best_cache:
+            matches = self.top_k(name, k=1)
+            self._best_cache[name] = matches[0] if matches and matches[0][1] >= self.min_score else None
+        return self._best_cache[name]
+
+    def resolved(self):
+        """Return {query: (reference_name, score)} for every query best() resolved"""
+        return {name: match for name, match in self._best_cache.items() if match is not None}
@@ -0,0 +1,164 @@
+"""
+Batch geocoding of customer addresses with a persistent cache.
+
+Addresses are normalized (lowercase, whitespace and comma runs collapsed) and
+looked up in a JSON cache on disk first, so reruns only go to the network for
+addresses that have never been resolved. The remaining addresses are sent
+through a pooled requests session by a bounded thread pool. OVER_QUERY_LIMIT
+and transient HTTP failures are retried with exponential backoff.
+
+The endpoint defaults to the Google Maps Geocoding API and can be pointed
+elsewhere (for example a local stub server) with GEOCODE_URL or the url
+argument; any endpoint returning the same JSON shape works.
+"""
+
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from config import CONFIG
+
+GEOCODE_URL = "https://maps.googleapis.com/maps/api/geocode/json"
+GEOCODE_CACHE_PATH = CONFIG['geocode_cache']
+
+# Concurrent requests in flight at once
+GEOCODE_WORKERS = 8
+
+# Retries for OVER_QUERY_LIMIT and transient failures, doubling the delay each time
+MAX_RETRIES = 5
+BACKOFF_SECONDS = 0.5
+REQUEST_TIMEOUT = 10
+
+# Statuses that are a definite answer for the address and can be cached
+FINAL_STATUSES = {'OK', 'ZERO_RESULTS'}
+RETRY_STATUSES = {'OVER_QUERY_LIMIT', 'UNKNOWN_ERROR'}
+
+SEPARATOR_RUNS = re.compile(r'\s*,[\s,]*')
+WHITESPACE_RUNS = re.compile(r'\s+')
+
+def normalize_address(address):
+    """Cache key for an address: lowercase with whitespace and comma runs collapsed"""
+    text = WHITESPACE_RUNS.sub(' ', str(address).strip().lower())
+    return SEPARATOR_RUNS.sub(', ', text).strip(' ,')
+
+def load_geocode_cache(cache_path):
+    """Load the {normalized address: [lat, lng] or None} cache, or an empty one"""
+    if not os.path.exists(cache_path):
+        return {}
+    try:
+        with open(cache_path, encoding='utf-8') as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        print(f"Warning: ignoring unreadable geocode cache {cache_path}")
+        return {}
+    return cache if isinstance(cache, dict) else {}
+
+def save_geocode_cache(cache_path, cache):
+    """Write the cache atomically so an interrupted run never leaves it half written"""
+    temp_path = f"{cache_path}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(cache, f, indent=2, sort_keys=True)
+    os.replace(temp_path, cache_path)
+
+class Geocoder:
+    """Resolve many addresses to (lat, lng) strings through the cache and a bounded pool"""
+
+    def __init__(self, api_key=None, url=None, cache_path=GEOCODE_CACHE_PATH, workers=GEOCODE_WORKERS, region_suffix=', Australia'):
+        self.api_key = api_key if api_key is not None else os.getenv('GOOGLE_MAPS_API_KEY')
+        self.url = url or os.getenv('GEOCODE_URL') or GEOCODE_URL
+        self.cache_path = cache_path
+        self.cache = load_geocode_cache(cache_path)
+        self.workers = max(1, workers)
+        self.region_suffix = region_suffix
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.workers)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.lock = threading.Lock()
+        self.stats = {'cached': 0, 'fetched': 0, 'failed': 0, 'retries': 0}
+
+    def fetch(self, address):
+        """Query the endpoint for one address; return (lat, lng), None for no result, or raise"""
+        params = {'address': f"{address}{self.region_suffix}"}
+        if self.api_key:
+            params['key'] = self.api_key
+        delay = BACKOFF_SECONDS
+        for attempt in range(MAX_RETRIES + 1):
+            try:
+                response = self.session.get(self.url, params=params, timeout=REQUEST_TIMEOUT)
+                if response.status_code >= 500 or response.status_code == 429:
+                    status = 'UNKNOWN_ERROR'
+                else:
+                    response.raise_for_status()
+                    data = response.json()
+                    status = data.get('status')
+            except requests.RequestException:
+                status = 'UNKNOWN_ERROR'
+            if status in FINAL_STATUSES:
+                if status == 'OK' and data.get('results'):
+                    location = data['results'][0]['geometry']['location']
+                    return str(location['lat']), str(location['lng'])
+                return None
+            if status not in RETRY_STATUSES or attempt == MAX_RETRIES:
+                raise RuntimeError(f"geocoding failed with status {status}")
+            with self.lock:
+                self.stats['retries'] += 1
+            time.sleep(delay)
+            delay *= 2
+
+    def resolve(self, key, address):
+        """Fetch one uncached address and record the answer in the cache"""
+        try:
+            location = self.fetch(address)
+        except RuntimeError as e:
+            print(f"Error geocoding '{address}': {e}")
+            with self.lock:
+                self.stats['failed'] += 1
+            return
+        with self.lock:
+            self.cache[key] = list(location) if location else None
+            self.stats['fetched'] += 1
+
+    def geocode_many(self, addresses):
+        """Return {address: (lat, lng)} for every address that resolved; failures are left out"""
+        pending = {}
+        for address in addresses:
+            if not address or not str(address).strip():
+                continue
+            key = normalize_address(address)
+            if key in self.cache:
+                self.stats['cached'] += 1
+            else:
+                pending.setdefault(key, str(address).strip())
+
+        if pending and not self.api_key and self.url == GEOCODE_URL:
+            print(f"Warning: GOOGLE_MAPS_API_KEY not found in environment variables; {len(pending)} addresses left ungeocoded")
+            pending = {}
+
+        if pending:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                futures = {executor.submit(self.resolve, key, address): address for key, address in pending.items()}
+                for future in as_completed(futures):
+                    # resolve() handles failed lookups; anything else (e.g. a malformed
+                    # response body) would otherwise vanish with the future
+                    try:
+                        future.result()
+                    except Exception as e:
+                        print(f"Error geocoding '{futures[future]}': {e!r}")
+                        with self.lock:
+                            self.stats['failed'] += 1
+            save_geocode_cache(self.cache_path, self.cache)
+
+        results = {}
+        for address in addresses:
+            if address and str(address).strip():
+                location = self.cache.get(normalize_address(address))
+                if location:
+                    results[address] = tuple(location)
+        return results
@@ -0,0 +1,235 @@
+"""
+Per-stage instrumentation for the team-changes scripts (--profile).
+
+A Profiler collects, for one script run:
+
+- named stage timers (exclusive: time spent in a nested stage or in a timed
+  row iterator is booked to that stage, not to the one around it)
+- row counters and rejected-row counters keyed by reason
+- peak traced memory (tracemalloc) per stage
+- optionally a cProfile of every top-level stage, of which only the
+  slowest (including the stages and row iterators nested in it) is dumped
+
+finish() writes the machine-readable JSON report and prints a summary.
+A disabled profiler (NULL_PROFILER, the default everywhere) does nothing,
+so the hooks can stay in the scripts at no measurable cost.
+"""
+
+import cProfile
+import json
+import pstats
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+REPORT_VERSION = 1
+
+def max_rss_mb():
+    """Peak resident set size of this process so far, in MB (None where unsupported)"""
+    if resource is None:
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS and kilobytes elsewhere
+    return max_rss / (1 << 20) if sys.platform == 'darwin' else max_rss / 1024
+
+def megabytes(size):
+    """Bytes as MB rounded for the report"""
+    return round(size / (1 << 20), 2)
+
+class Profiler:
+    """Stage timers, counters and memory peaks for one script run
+
+    report_path enables the profiler; cprofile_path additionally profiles
+    each top-level stage with cProfile and dumps the slowest one there.
+    """
+
+    def __init__(self, script, report_path=None, cprofile_path=None):
+        self.script = script
+        self.report_path = report_path
+        self.cprofile_path = cprofile_path
+        self.enabled = report_path is not None
+        self.stages = {}
+        self.counters = {}
+        self.rejected = {}
+        # Top-level stage name -> [pstats.Stats, inclusive seconds]
+        self.profiles = {}
+        # Open stages, innermost last
+        self.stack = []
+        self.peak = 0
+        self.started = time.perf_counter()
+        self.started_tracing = False
+        if self.enabled and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.started_tracing = True
+
+    def stage_stats(self, name):
+        """Accumulated stats for a stage, created on first use"""
+        stats = self.stages.get(name)
+        if stats is None:
+            stats = self.stages[name] = {'seconds': 0.0, 'calls': 0, 'rows': 0, 'peak_mb': None}
+        return stats
+
+    def note_peak(self):
+        """Fold the traced peak since the last note into every open stage, then restart it"""
+        peak = tracemalloc.get_traced_memory()[1]
+        self.peak = max(self.peak, peak)
+        for frame in self.stack:
+            frame['peak'] = max(frame['peak'], peak)
+        tracemalloc.reset_peak()
+
+    @contextmanager
+    def stage(self, name):
+        """Time the enclosed block as stage name, with its peak memory"""
+        if not self.enabled:
+            yield
+            return
+        self.note_peak()
+        frame = {'child_seconds': 0.0, 'peak': 0}
+        profile = cProfile.Profile() if self.cprofile_path and not self.stack else None
+        self.stack.append(frame)
+        if profile is not None:
+            profile.enable()
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            if profile is not None:
+                profile.disable()
+                if name in self.profiles:
+                    self.profiles[name][0].add(profile)
+                    self.profiles[name][1] += elapsed
+                else:
+                    self.profiles[name] = [pstats.Stats(profile), elapsed]
+            self.note_peak()
+            self.stack.pop()
+            if self.stack:
+                self.stack[-1]['child_seconds'] += elapsed
+            stats = self.stage_stats(name)
+            stats['seconds'] += elapsed - frame['child_seconds']
+            stats['calls'] += 1
+            stats['peak_mb'] = max(stats['peak_mb'] or 0, megabytes(frame['peak']))
+
+    def timed_iter(self, name, iterable):
+        """Wrap a row iterator so the time spent producing rows is booked to stage name
+
+        Used for lazily read workbook rows, whose parsing otherwise hides
+        inside whichever stage consumes them. Memory is left to that stage.
+        """
+        if not self.enabled:
+            return iterable
+        return self.iter_timed(name, iterable)
+
+    def iter_timed(self, name, iterable):
+        """Generator behind timed_iter"""
+        stats = self.stage_stats(name)
+        stats['calls'] += 1
+        iterator = iter(iterable)
+        while True:
+            started = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                elapsed = time.perf_counter() - started
+                stats['seconds'] += elapsed
+                if self.stack:
+                    self.stack[-1]['child_seconds'] += elapsed
+            stats['rows'] += 1
+            yield item
+
+    def count(self, name, amount=1):
+        """Add to a named row counter"""
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def reject(self, reason, amount=1):
+        """Count rows dropped for reason"""
+        if self.enabled:
+            self.rejected[reason] = self.rejected.get(reason, 0) + amount
+
+    def hottest_stage(self):
+        """Name of the stage with the most exclusive time"""
+        if not self.stages:
+            return None
+        return max(self.stages, key=lambda name: self.stages[name]['seconds'])
+
+    def cprofile_stage(self):
+        """Name of the profiled top-level stage with the most inclusive time"""
+        if not self.profiles:
+            return None
+        return max(self.profiles, key=lambda name: self.profiles[name][1])
+
+    def report(self):
+        """The run's stats as a JSON-ready dict"""
+        if tracemalloc.is_tracing():
+            self.note_peak()
+        stages = {name: dict(stats, seconds=round(stats['seconds'], 4)) for name, stats in self.stages.items()}
+        return {
+            'version': REPORT_VERSION,
+            'script': self.script,
+            'created_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'total_seconds': round(time.perf_counter() - self.started, 4),
+            'peak_mb': megabytes(self.peak),
+            'max_rss_mb': max_rss_mb(),
+            'hottest_stage': self.hottest_stage(),
+            'stages': stages,
+            'counters': dict(self.counters),
+            'rejected': dict(sorted(self.rejected.items())),
+            'cprofile': self.cprofile_path,
+            'cprofile_stage': self.cprofile_stage(),
+        }
+
+    def finish(self):
+        """Write the report (and the cProfile dump of the slowest stage) and print a summary"""
+        if not self.enabled:
+            return None
+        report = self.report()
+        if self.started_tracing:
+            tracemalloc.stop()
+        profiled = report['cprofile_stage']
+        if profiled is not None:
+            self.profiles[profiled][0].dump_stats(self.cprofile_path)
+        else:
+            report['cprofile'] = None
+        with open(self.report_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+        print(f"\nProfile of {self.script} ({report['total_seconds']:.2f}s, peak {report['peak_mb']:.1f} MB traced):")
+        for name, stats in report['stages'].items():
+            peak = f"{stats['peak_mb']:8.1f} MB" if stats['peak_mb'] is not None else f"{'-':>11}"
+            rows = f"  {stats['rows']} rows" if stats['rows'] else ''
+            print(f"  {name:<14} {stats['seconds']:9.3f}s {peak}{rows}")
+        for name, value in report['counters'].items():
+            print(f"  {name}: {value}")
+        for reason, value in report['rejected'].items():
+            print(f"  rejected {reason}: {value}")
+        print(f"Profile report written to {self.report_path}")
+        if report['cprofile']:
+            print(f"cProfile of the slowest stage ({profiled}) written to {self.cprofile_path}")
+        return report
+
+# Shared disabled profiler, the default for every instrumented function
+NULL_PROFILER = Profiler(None)
+
+def add_profile_arguments(parser, script):
+    """Add the --profile and --profile-dump options to a script's argument parser"""
+    parser.add_argument('--profile', nargs='?', const=f"{script}_profile.json", default=None, metavar='REPORT',
+                        help=f"Time each stage and write a JSON report (default: {script}_profile.json)")
+    parser.add_argument('--profile-dump', default=None, metavar='PROF',
+                        help="Also write a cProfile dump of the slowest stage, for pstats or snakeviz (implies --profile)")
+
+def profiler_from_args(args, script):
+    """Profiler for the parsed --profile / --profile-dump options (disabled when neither is given)"""
+    report_path = args.profile
+    if report_path is None and args.profile_dump:
+        report_path = f"{script}_profile.json"
+    return Profiler(script, report_path, args.profile_dump)
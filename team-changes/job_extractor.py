@@ -1,325 +1,316 @@
+import argparse
+import csv
 import pandas as pd
-import openpyxl
 import json
-from datetime import datetime, time, timedelta
-import csv
 import os
-import requests
-import time as time_module
-from dotenv import load_dotenv
-
-# Load environment variables from parent directory
-load_dotenv('../.env')
-
-def parse_date(date_val):
-    """Parse date value which could be datetime object or string in various formats"""
-    if isinstance(date_val, datetime):
-        return date_val
-    elif isinstance(date_val, str):
-        # Try different date formats
-        for fmt in ("%Y-%m-%d", "%d/%m/%Y", "%d-%m-%Y", "%Y-%m-%d %H:%M:%S"):
-            try:
-                return datetime.strptime(date_val, fmt)
-            except:
-                continue
-    return None
-
-def geocode_address(address):
-    """Geocode an address using Google Maps API"""
-    api_key = os.getenv('GOOGLE_MAPS_API_KEY')
-    if not api_key:
-        print("Warning: GOOGLE_MAPS_API_KEY not found in environment variables")
-        return None, None
-    
-    try:
-        response = requests.get(
-            f"https://maps.googleapis.com/maps/api/geocode/json",
-            params={
-                'address': f"{address}, Australia",
-                'key': api_key
-            }
-        )
+from operator import attrgetter
+from config import CONFIG
+from customer_index import CustomerNameIndex
+from customer_reference import CUSTOMER_DETAILS_FILE, customer_ids_by_name, read_customer_sheets
+from date_parsing import CUSTOMER_DATE_FORMATS, DB_TIMESTAMP_FORMATS, parse_date_column, strip_ordinals
+from db_export import db_sheets
+from fuzzy_match import FuzzyNameMatcher
+from instrumentation import NULL_PROFILER, add_profile_arguments, profiler_from_args
+from job_records import (JOB_COLUMNS, TIME_ENTRY_COLUMNS, CUSTOMER_COLUMNS, JobRecord, TimeEntryRecord,
+                         CustomerRecord, record_columns, record_rows)
+from job_timestamps import build_job_timestamps
+from output_writer import OUTPUT_FORMATS, output_paths, write_sheets
+from rejects import NULL_REJECTS, RejectSink, rejects_path
+from spill_store import SpillStore
+from staff_index import StaffIndex
+from workbook_cache import read_sheet_names
+from workbook_extraction import (WORKBOOK_PATH, EXCLUDED_SHEETS, add_verbose_argument, group_rows_by_sheet,
+                                 iter_cached_workbook_rows, rows_digest, set_verbose)
+
+# Paths come from the shared settings (see config)
+OUTPUT_FILE = CONFIG['output_file']
+USERS_FILE = CONFIG['users']
+UNRESOLVED_STAFF_FILE = CONFIG['unresolved_staff_file']
+
+# Incremental mode: the manifest remembers processed sheets and their IDs,
+# and each run writes only the new or changed rows to the delta file
+MANIFEST_PATH = CONFIG['manifest']
+DELTA_OUTPUT_FILE = CONFIG['delta_output_file']
+
+# Out-of-core mode: scratch SQLite file for the spilled sheets, deleted after the run
+SPILL_FILE = CONFIG['spill_file']
+
+def iter_job_rows(rows, profiler=NULL_PROFILER, rejects=NULL_REJECTS):
+    """Yield the workbook rows that can contribute to a job"""
+    for row in rows:
+        # Skip if customer name is empty
+        if not row.customer:
+            rejects.reject_row('missing_customer', row)
+            continue
         
-        data = response.json()
+        # Skip if any other required field is empty
+        if not row.date or not row.start_time:
+            rejects.reject_row('missing_date_or_start', row, row.customer)
+            continue
+        
+        profiler.count('job_rows')
+        yield row
+
+def group_customer_jobs(job_rows):
+    """Group streamed job rows by date and customer to handle additional staff for jobs"""
+    customer_jobs = {}
+    for row in job_rows:
+        # Create a unique key for this customer job (date + customer)
+        job_key = f"{row.date}_{row.customer}"
         
-        if data['status'] == 'OK' and data['results']:
-            location = data['results'][0]['geometry']['location']
-            return str(location['lat']), str(location['lng'])
+        if job_key not in customer_jobs:
+            customer_jobs[job_key] = {
+                'date': row.date,
+                'customer_name': row.customer,
+                'start_time': row.start_time,
+                'finish_time': row.finish_time,
+                'lunch_break': row.lunch_break,
+                'price': row.price,
+                'team_members': [],
+                'additional_staff': [],
+                'team_id': None,
+                # Where the job starts in the workbook, for the rejects file
+                'sheet': row.sheet,
+                'row_number': row.row_number,
+            }
+        
+        # Add team member to appropriate list
+        if row.team:
+            if row.team_id:  # Has team ID = core team member
+                customer_jobs[job_key]['team_members'].append(row.team)
+                customer_jobs[job_key]['team_id'] = row.team_id
+            else:  # No team ID = additional staff
+                customer_jobs[job_key]['additional_staff'].append(row.team)
+    return customer_jobs
+
+def load_reference_data(fuzzy_min_score=None):
+    """Load the customer details and staff lookups used to build jobs and customers
+
+    With fuzzy_min_score set, customer names missing from
+    source_customer_details.xlsx are resolved to their closest reference
+    name when it scores at least that high.
+    """
+    # Load every customer details sheet in one read (or from the cached snapshot)
+    customer_sheets = read_customer_sheets(CUSTOMER_DETAILS_FILE)
+    name_to_id = customer_ids_by_name(customer_sheets)
+    customer_all_df = customer_sheets['all']
+    customer_regular_df = customer_sheets['regular-customers-wins']
+    customer_combined_df = customer_sheets['combined']
+    
+    # Load users for staff mapping (full names, unambiguous first names and nicknames)
+    staff_index = StaffIndex.from_csv(USERS_FILE, CONFIG['staff_nicknames'])
+    
+    return {
+        'name_to_id': name_to_id,
+        'customer_all_df': customer_all_df,
+        'customer_regular_df': customer_regular_df,
+        'customer_combined_df': customer_combined_df,
+        'staff_index': staff_index,
+        'customer_matcher': FuzzyNameMatcher(name_to_id, fuzzy_min_score) if fuzzy_min_score is not None else None,
+    }
+
+def build_sheet_jobs(customer_jobs, name_to_id, staff_index, customer_matcher=None, rejects=NULL_REJECTS):
+    """Yield (job_key, job, time_entries) for each valid customer job of one sheet
+
+    Job and time-entry IDs are left as None for the caller to assign.
+    Skipped jobs, unknown customers and unresolved staff go to rejects.
+    """
+    for job_key, job_data in customer_jobs.items():
+        location = (job_data['sheet'], job_data['row_number'])
+        # Skip if no team members at all
+        if not job_data['team_members'] and not job_data['additional_staff']:
+            rejects.reject('no_team_members', *location, job_data['customer_name'])
+            continue
+
+        # Skip if team_id is not a valid integer
+        try:
+            team_id_str = str(job_data['team_id'])
+            int_team_id = int(team_id_str)
+        except (ValueError, TypeError):
+            rejects.reject('invalid_team_id', *location, f"team_id={job_data['team_id']!r}")
+            continue
+
+        # Map customer name to customer_id
+        customer_id = name_to_id.get(job_data['customer_name'])
+        if customer_id is None and customer_matcher is not None:
+            # Resolve near-miss spellings to the closest reference customer
+            match = customer_matcher.best(job_data['customer_name'])
+            if match:
+                job_data['customer_name'] = match[0]
+                customer_id = name_to_id[match[0]]
+        if customer_id is None:
+            # Not in source_customer_details.xlsx: use 0 as default for missing customers
+            rejects.flag('unknown_customer', *location, job_data['customer_name'])
+            customer_id = 0
+
+        # If price is empty, set to 0
+        if job_data['price'] is None or job_data['price'] == "":
+            price = 0
         else:
-            print(f"Geocoding failed for '{address}': {data['status']}")
-            return None, None
-    except Exception as e:
-        print(f"Error geocoding '{address}': {e}")
-        return None, None
-
-def main():
-    # File path
-    file_path = "MyHome Wages Macros app.xlsm"
-    
-    # Load customer details for mapping
-    customer_details = pd.read_excel("source_customer_details.xlsx")
-    name_to_id = {str(row['name']).strip(): int(row['id']) for _, row in customer_details.iterrows()}
-    
-    # Load additional customer data sources
-    customer_all_df = pd.read_excel("source_customer_details.xlsx", sheet_name='all')
-    customer_regular_df = pd.read_excel("source_customer_details.xlsx", sheet_name='regular-customers-wins')
-    customer_combined_df = pd.read_excel("source_customer_details.xlsx", sheet_name='combined')
-    
-    # Load users for staff mapping
-    users_df = pd.read_csv("source_users.csv")
-    staff_name_to_id = {}
-    staff_name_to_full = {}
-    for _, row in users_df.iterrows():
-        first = str(row['first_name']).strip()
-        last = str(row['last_name']).strip()
-        full = f"{first} {last}".strip()
-        staff_name_to_id[full.lower()] = str(row['id'])
-        staff_name_to_full[full.lower()] = full
-    
-    # Sheets to exclude
-    excluded_sheets = ["Totals", "Parameters", "Active Jobs", "17 May 25", "23 May 25", "30 May 25", "25 April 25", "6 June 25", "9 May 25"]
-    
-    # Load the workbook
-    workbook = openpyxl.load_workbook(file_path, data_only=True)
-    
-    print("All sheet names:")
-    for sheet_name in workbook.sheetnames:
-        print(f"  '{sheet_name}'")
-    print()
-    
-    all_job_data = []
-    all_time_entries = []
+            price = job_data['price']
+
+        job = JobRecord(
+            id=None,  # Assigned by the caller
+            customer_id=customer_id,
+            team_id=str(int_team_id),
+            status='completed',
+            created_at=None,  # Filled in by apply_job_timestamps
+            price=price,
+            customer_name=job_data['customer_name'],
+            team_members_at_creation=json.dumps(job_data['team_members']),
+            additional_staff=json.dumps(job_data['additional_staff']),
+            # Raw cells for the columnar timestamp stage
+            date=job_data['date'],
+            start_time=job_data['start_time'],
+            finish_time=job_data['finish_time'],
+            lunch_break=job_data['lunch_break'],
+        )
+        time_entries = []
+
+        # Add time entry for each staff member who worked on this job (both team and additional)
+        all_staff = job_data['team_members'] + job_data['additional_staff']
+        for staff_group in all_staff:
+            # Create a time entry for each individual staff member ('&' separates several in one entry)
+            for staff_member, user_id in staff_index.resolve_group(staff_group):
+                if not user_id:
+                    rejects.flag('unresolved_staff', *location, staff_member)
+                time_entries.append(TimeEntryRecord(
+                    id=None,  # Assigned by the caller
+                    user_id=user_id,
+                    staff=staff_member,
+                    job_id=None,  # Assigned by the caller
+                    clock_in_time=None,  # Filled in by apply_job_timestamps
+                    clock_out_time=None,  # Lunch-adjusted finish, filled in by apply_job_timestamps
+                    lunch_break='',  # Remove lunch_break values
+                    geofence_override='',
+                    auto_lunch_deducted=''
+                ))
+        
+        yield job_key, job, time_entries
+
+def iter_sheet_extracts(rows, reference, profiler=NULL_PROFILER, rejects=NULL_REJECTS):
+    """Yield (jobs, time_entries) for each sheet, numbered in extraction order across all sheets"""
     job_counter = 0  # Track job IDs as we create them
+    time_entry_counter = 0
     
     # Process each sheet
-    for sheet_name in workbook.sheetnames:
-        if sheet_name in excluded_sheets:
-            continue
-        
-        print(f"Processing sheet: {sheet_name}")
-        sheet = workbook[sheet_name]
-        
-        # Group rows by customer to handle additional staff for jobs
-        customer_jobs = {}
-        
-        # First pass: collect all rows for each customer
-        for row in sheet.iter_rows(min_row=2, values_only=True):
-            # Check if row has enough columns
-            if len(row) < 13:
-                continue
-                
-            # Extract required fields
-            date_val = row[0]  # Column A - Date
-            team_members = row[1]  # Column B - Team members
-            customer_name = row[2]  # Column C - Client/Customer name
-            start_time = row[3]  # Column D - Start time
-            finish_time = row[4]  # Column E - Finish time
-            lunch_break = row[5]  # Column F - Lunch Break (NEW)
-            price = row[7]  # Column H - Quoted H
-            team_id = row[12]  # Column M - Team ID
-            
-            # Skip if customer name is empty
-            if not customer_name:
-                continue
-                
-            # Skip if any other required field is empty
-            if not date_val or not start_time:
-                continue
-            
-            # Clean customer name
-            customer_name_clean = str(customer_name).strip()
-            if not customer_name_clean:
-                continue
-            
-            # Create a unique key for this customer job (date + customer)
-            job_key = f"{date_val}_{customer_name_clean}"
-            
-            if job_key not in customer_jobs:
-                customer_jobs[job_key] = {
-                    'date_val': date_val,
-                    'customer_name': customer_name_clean,
-                    'start_time': start_time,
-                    'finish_time': finish_time,
-                    'lunch_break': lunch_break,
-                    'price': price,
-                    'team_members': [],
-                    'additional_staff': [],
-                    'team_id': None
-                }
-            
-            # Add team member to appropriate list
-            if team_members:
-                staff_member = str(team_members).strip()
-                if staff_member:
-                    if team_id and str(team_id).strip():  # Has team ID = core team member
-                        customer_jobs[job_key]['team_members'].append(staff_member)
-                        customer_jobs[job_key]['team_id'] = team_id
-                    else:  # No team ID = additional staff
-                        customer_jobs[job_key]['additional_staff'].append(staff_member)
+    for sheet_name, sheet_rows in group_rows_by_sheet(rows):
+        # First pass: stream the sheet's rows into customer jobs
+        customer_jobs = group_customer_jobs(iter_job_rows(sheet_rows, profiler, rejects))
+        sheet_jobs = []
+        sheet_time_entries = []
         
         # Second pass: create jobs and time entries
-        for job_key, job_data in customer_jobs.items():
-            # Skip if no team members at all
-            if not job_data['team_members'] and not job_data['additional_staff']:
-                continue
-                
-            # Skip if team_id is not a valid integer
-            try:
-                team_id_str = str(job_data['team_id'])
-                int_team_id = int(team_id_str)
-            except (ValueError, TypeError):
-                continue
-                
-            # Parse date
-            parsed_date = parse_date(job_data['date_val'])
-            if not parsed_date:
-                continue
-            
-            # Map customer name to customer_id
-            customer_id = name_to_id.get(job_data['customer_name'])
-            if customer_id is None:
-                print(f"Warning: Customer name '{job_data['customer_name']}' not found in source_customer_details.xlsx. Using customer_id = 0.")
-                customer_id = 0  # Use 0 as default for missing customers
-            
-            # Combine date and start time
-            if isinstance(job_data['start_time'], time):
-                combined_start_datetime = datetime.combine(parsed_date.date(), job_data['start_time'])
-            else:
-                # If start_time is not a time object, use just the date
-                combined_start_datetime = parsed_date
-            
-            # Combine date and finish time
-            if isinstance(job_data['finish_time'], time):
-                combined_finish_datetime = datetime.combine(parsed_date.date(), job_data['finish_time'])
-            else:
-                # If finish_time is not a time object, use just the date
-                combined_finish_datetime = parsed_date
-            
-            # Convert to UTC by subtracting 10 hours
-            utc_start_datetime = combined_start_datetime - timedelta(hours=10)
-            utc_finish_datetime = combined_finish_datetime - timedelta(hours=10)
-            
-            # Process lunch break data
-            lunch_break_value = ''
-            if job_data['lunch_break'] is not None and str(job_data['lunch_break']).strip():
-                lunch_break_value = str(job_data['lunch_break']).strip()
-            
-            # Calculate clock_out_lunch_break
-            clock_out_lunch_break = ''
-            if lunch_break_value.strip().lower() == 'yes':
-                # If lunch_break is "Yes", calculate finish time minus 30 minutes
-                if isinstance(job_data['finish_time'], time):
-                    actual_finish_time = combined_finish_datetime
-                    lunch_break_finish_time = actual_finish_time - timedelta(minutes=30)
-                    utc_lunch_break_finish = lunch_break_finish_time - timedelta(hours=10)
-                    clock_out_lunch_break = utc_lunch_break_finish.strftime('%Y-%m-%d %H:%M:%S+00')
-                else:
-                    lunch_break_finish_time = combined_finish_datetime - timedelta(minutes=30)
-                    utc_lunch_break_finish = lunch_break_finish_time - timedelta(hours=10)
-                    clock_out_lunch_break = utc_lunch_break_finish.strftime('%Y-%m-%d %H:%M:%S+00')
-            elif lunch_break_value.strip().lower() == 'no':
-                # If lunch_break is "No", use the finish time as is
-                if isinstance(job_data['finish_time'], time):
-                    actual_finish_time = combined_finish_datetime
-                    utc_finish_time = actual_finish_time - timedelta(hours=10)
-                    clock_out_lunch_break = utc_finish_time.strftime('%Y-%m-%d %H:%M:%S+00')
-                else:
-                    utc_finish_time = combined_finish_datetime - timedelta(hours=10)
-                    clock_out_lunch_break = utc_finish_time.strftime('%Y-%m-%d %H:%M:%S+00')
-            
-            # If price is empty, set to 0
-            if job_data['price'] is None or job_data['price'] == "":
-                price = 0
-            else:
-                price = job_data['price']
-            
+        for job_key, job, time_entries in build_sheet_jobs(customer_jobs, reference['name_to_id'], reference['staff_index'], reference['customer_matcher'], rejects):
             # Increment job counter
             job_counter += 1
+            job.id = job_counter
+            job.sheet = sheet_name
+            job.job_key = job_key
+            sheet_jobs.append(job)
             
-            all_job_data.append({
-                'id': job_counter,
-                'customer_id': customer_id,
-                'team_id': str(int_team_id),
-                'status': 'completed',
-                'created_at': utc_start_datetime,
-                'price': price,
-                'customer_name': job_data['customer_name'],
-                'team_members_at_creation': json.dumps(job_data['team_members']),
-                'additional_staff': json.dumps(job_data['additional_staff'])
-            })
-            
-            # Add time entry for each staff member who worked on this job (both team and additional)
-            all_staff = job_data['team_members'] + job_data['additional_staff']
-            for staff_group in all_staff:
-                # Split staff names by '&' if multiple staff in one entry
-                if '&' in staff_group:
-                    individual_staff = [member.strip() for member in staff_group.split('&') if member.strip()]
-                else:
-                    individual_staff = [staff_group.strip()]
-                
-                # Create a time entry for each individual staff member
-                for staff_member in individual_staff:
-                    staff_key = staff_member.lower()
-                    user_id = staff_name_to_id.get(staff_key, '')
-                    all_time_entries.append({
-                        'id': len(all_time_entries) + 1,
-                        'user_id': user_id,
-                        'staff': staff_member,
-                        'job_id': job_counter,
-                        'clock_in_time': utc_start_datetime,
-                        'clock_out_time': clock_out_lunch_break,  # Use clock_out_lunch_break value
-                        'lunch_break': '',  # Remove lunch_break values
-                        'geofence_override': '',
-                        'auto_lunch_deducted': ''
-                    })
-    
-    # Sort by created_at, then by customer_id, then by team_id
-    all_job_data.sort(key=lambda x: (x['created_at'], x['customer_id'], int(x['team_id'])))
-    
-    # Reassign IDs starting at 1 for the sorted jobs
-    job_id_mapping = {}
-    for i, job in enumerate(all_job_data):
-        old_id = job['id']
-        new_id = i + 1
-        job['id'] = new_id
-        job_id_mapping[old_id] = new_id
-    
-    # Update time entries with new job_ids
+            for time_entry in time_entries:
+                time_entry_counter += 1
+                time_entry.id = time_entry_counter
+                time_entry.job_id = job_counter
+                sheet_time_entries.append(time_entry)
+        yield sheet_jobs, sheet_time_entries
+
+def extract_jobs(rows, reference, profiler=NULL_PROFILER, rejects=NULL_REJECTS):
+    """Build jobs and time entries sheet by sheet, numbering them in extraction order"""
+    all_job_data = []
+    all_time_entries = []
+    for sheet_jobs, sheet_time_entries in iter_sheet_extracts(rows, reference, profiler, rejects):
+        all_job_data.extend(sheet_jobs)
+        all_time_entries.extend(sheet_time_entries)
+    
+    with profiler.stage('timestamps'):
+        apply_job_timestamps(all_job_data, all_time_entries)
+    profiler.count('jobs', len(all_job_data))
+    profiler.count('time_entries', len(all_time_entries))
+    return all_job_data, all_time_entries
+
+def apply_job_timestamps(all_job_data, all_time_entries):
+    """Fill in created_at and the time-entry clock times for every job in one columnar pass"""
+    if not all_job_data:
+        return
+    cells = record_columns(all_job_data, ['date', 'start_time', 'finish_time', 'lunch_break'])
+    created_at, clock_out = build_job_timestamps(cells['date'], cells['start_time'], cells['finish_time'], cells['lunch_break'])
+    for job, job_created_at in zip(all_job_data, created_at):
+        job.created_at = job_created_at
+        # The raw cells are not needed once the timestamps exist
+        job.date = job.start_time = job.finish_time = job.lunch_break = None
+    
+    # Job IDs are still the consecutive extraction-order IDs here
+    first_job_id = all_job_data[0].id
     for time_entry in all_time_entries:
-        if time_entry['job_id'] in job_id_mapping:
-            time_entry['job_id'] = job_id_mapping[time_entry['job_id']]
-    
+        position = time_entry.job_id - first_job_id
+        time_entry.clock_in_time = created_at[position]
+        time_entry.clock_out_time = clock_out[position]
+
+def merge_sheet_runs(records, key):
+    """Records (in extraction order) stably sorted by key, ties in extraction order
+
+    Extraction order is one contiguous, nearly sorted run per sheet.
+    sorted() finds those runs and merges them in C, which beats a
+    Python-level heap merge of the same runs.
+    """
+    return sorted(records, key=key)
+
+def job_sort_key(job):
+    """Jobs are ordered by created_at, then by customer_id, then by team_id"""
+    return (job.created_at, job.customer_id, int(job.team_id))
+
+def jobs_in_output_order(all_job_data):
+    """Iterate jobs (in extraction order) in output order"""
+    return merge_sheet_runs(all_job_data, job_sort_key)
+
+def time_entries_in_output_order(all_time_entries):
+    """Iterate time entries (in extraction order) by clock_in_time from oldest to newest"""
+    # clock_in_time is already a fixed-width UTC string, so it sorts chronologically
+    return merge_sheet_runs(all_time_entries, attrgetter('clock_in_time'))
+
+def extraction_job_lookup(all_job_data):
+    """Return time entry -> job, valid while the IDs are still consecutive extraction-order IDs"""
+    jobs = list(all_job_data)
+    first_job_id = jobs[0].id if jobs else 1
+    return lambda time_entry: jobs[time_entry.job_id - first_job_id]
+
+def assign_ids(all_job_data, all_time_entries):
+    """Put jobs and time entries in output order and number both from 1
+
+    Each list is sorted once and numbered in a single pass. Time entries
+    find their job by extraction-order position, so no old-to-new job ID
+    table is needed.
+    """
+    job_of = extraction_job_lookup(all_job_data)
+    all_job_data[:] = jobs_in_output_order(all_job_data)
+    for job_id, job in enumerate(all_job_data, start=1):
+        job.id = job_id
+    
+    all_time_entries[:] = time_entries_in_output_order(all_time_entries)
+    for time_entry_id, time_entry in enumerate(all_time_entries, start=1):
+        time_entry.id = time_entry_id
+        time_entry.job_id = job_of(time_entry).id
+
+def collect_customer_names(all_job_data, customer_combined_df):
+    """Return the customers to export: everyone with a job plus recent active customers"""
     # Collect unique customers from job data (MyHome Wages spreadsheet)
     # This ensures we only include customers who have completed work
     unique_customers = set()
     
     # Add customers from job data (MyHome Wages spreadsheet)
     for job in all_job_data:
-        unique_customers.add(job['customer_name'])
+        unique_customers.add(job.customer_name)
     
     # Add additional customers from combined sheet based on criteria:
     # - Column M (active) = TRUE
     # - Column N (created_at) >= 13/06/2025
-    target_date = pd.to_datetime('13/06/2025').tz_localize('UTC')
+    target_date = pd.Timestamp(2025, 6, 13, tz='UTC')
     
-    # Parse dates correctly (format is YY-MM-DD)
-    def parse_date_correctly(date_str):
-        if pd.isna(date_str):
-            return pd.NaT
-        try:
-            # Handle format like "25-06-26 04:00:00+00" (YY-MM-DD)
-            if isinstance(date_str, str) and len(date_str) >= 8:
-                year = int('20' + date_str[:2])  # Convert YY to 20YY
-                month = int(date_str[3:5])
-                day = int(date_str[6:8])
-                return pd.Timestamp(year, month, day).tz_localize('UTC')
-            else:
-                return pd.to_datetime(date_str)
-        except:
-            return pd.NaT
-    
-    # Apply correct date parsing
-    customer_combined_df['parsed_created_at'] = customer_combined_df['created_at'].apply(parse_date_correctly)
+    # Parse the whole column at once (format is YY-MM-DD, e.g. "25-06-26 04:00:00+00"), keeping the day
+    parsed_created_at = parse_date_column(customer_combined_df['created_at'], DB_TIMESTAMP_FORMATS)
+    customer_combined_df['parsed_created_at'] = parsed_created_at.dt.normalize().dt.tz_localize('UTC')
     
     additional_customers = customer_combined_df[
         (customer_combined_df['active'] == True) & 
@@ -329,177 +320,507 @@ def main():
     for _, row in additional_customers.iterrows():
         unique_customers.add(str(row['name']).strip())
     
+    return unique_customers
+
+def build_customers(customer_names, all_job_data, reference):
+    """Build a customer record for each name, numbering them in name order"""
+    name_to_id = reference['name_to_id']
+    customer_all_df = reference['customer_all_df']
+    customer_regular_df = reference['customer_regular_df']
+    customer_combined_df = reference['customer_combined_df']
+    
+    # Index each sheet's name column once instead of scanning it per customer
+    all_index = CustomerNameIndex(customer_all_df['Customer'])
+    combined_index = CustomerNameIndex(customer_combined_df['name'])
+    regular_index = CustomerNameIndex(customer_regular_df['Customer Name'])
+    
+    # Parse the 'all' sheet's Column F created dates (like "6th Sep 24") in one pass
+    all_created_dates = parse_date_column(customer_all_df.iloc[:, 5].astype(str), CUSTOMER_DATE_FORMATS, strip_ordinals)
+    
+    # First job price seen for each customer (Wages app.xlsx Column H)
+    job_price_by_name = {}
+    for job in all_job_data:
+        job_price_by_name.setdefault(job.customer_name.lower(), job.price)
+    
     # Create customers data
     all_customers_data = []
     customer_counter = 1
     
-    for customer_name in sorted(unique_customers):
+    for customer_name in sorted(customer_names):
         # Find customer in source data
         customer_id = name_to_id.get(customer_name, 0)
-        
-        # Get data from 'all' sheet (case-insensitive matching)
-        all_row = customer_all_df[customer_all_df['Customer'].str.lower() == customer_name.lower()]
-        if len(all_row) == 0:
-            # Try partial matching
-            all_row = customer_all_df[customer_all_df['Customer'].str.lower().str.contains(customer_name.lower(), na=False)]
-        
-        # Get data from 'combined' sheet (case-insensitive matching)
-        combined_row = customer_combined_df[customer_combined_df['name'].str.lower() == customer_name.lower()]
-        if len(combined_row) == 0:
-            # Try partial matching
-            combined_row = customer_combined_df[customer_combined_df['name'].str.lower().str.contains(customer_name.lower(), na=False)]
-        
+
+        # Get data from 'all' sheet (case-insensitive exact, then partial matching)
+        all_position = all_index.find(customer_name)
+        all_row = customer_all_df.iloc[all_position] if all_position is not None else None
+
+        # Get data from 'combined' sheet (case-insensitive exact, then partial matching)
+        combined_position = combined_index.find(customer_name)
+        combined_row = customer_combined_df.iloc[combined_position] if combined_position is not None else None
+
         # Get active status from combined sheet Column M
-        active_status = combined_row['active'].iloc[0] if len(combined_row) > 0 else False
-        
+        active_status = combined_row['active'] if combined_row is not None else False
+
         # Get price - if customer is from combined sheet, use combined sheet Column H, otherwise use job data
-        if len(combined_row) > 0:
-            price = combined_row['price'].iloc[0] if len(combined_row) > 0 else 0
+        if combined_row is not None:
+            price = combined_row['price']
         else:
             # Get price from job data (Wages app.xlsx Column H)
-            price = 0
-            for job in all_job_data:
-                if job['customer_name'].lower() == customer_name.lower():
-                    price = job['price']
-                    break
-        
+            price = job_price_by_name.get(customer_name.lower(), 0)
+
         # Get clean_frequency from regular-customers-wins sheet Column G
-        regular_row = customer_regular_df[customer_regular_df['Customer Name'].str.lower() == customer_name.lower()]
-        if len(regular_row) == 0:
-            # Try partial matching
-            regular_row = customer_regular_df[customer_regular_df['Customer Name'].str.lower().str.contains(customer_name.lower(), na=False)]
-        clean_frequency = str(regular_row['Frequency'].iloc[0]) if len(regular_row) > 0 else "One off"
-        
+        regular_position = regular_index.find(customer_name)
+        clean_frequency = str(customer_regular_df['Frequency'].iloc[regular_position]) if regular_position is not None else "One off"
+
         # Clean up frequency values
         if clean_frequency.lower() == '3weekly':
             clean_frequency = 'Tri-weekly'
         elif clean_frequency.lower() == '6weekly':
             clean_frequency = 'One off'
-        
+
         # Use combined sheet data if available, otherwise fall back to all sheet
-        if len(combined_row) > 0:
-            address = str(combined_row['address'].iloc[0]) if len(combined_row) > 0 else ''
+        if combined_row is not None:
+            address = str(combined_row['address'])
             latitude = ''  # Set to blank as requested
-            phone_raw = str(combined_row['phone'].iloc[0]) if len(combined_row) > 0 else ''
-            # Get created_at from all sheet Column F
-            created_at = str(all_row.iloc[0, 5]) if len(all_row) > 0 else ''  # Column F (index 5)
+            phone_raw = str(combined_row['phone'])
         else:
             # Fall back to all sheet data
-            address = str(all_row['Primary Address'].iloc[0]) if len(all_row) > 0 else ''
+            address = str(all_row['Primary Address']) if all_row is not None else ''
             latitude = ''  # Set to blank as requested
-            phone_raw = str(all_row['Phone No.'].iloc[0]) if len(all_row) > 0 else ''
-            created_at = str(all_row.iloc[0, 5]) if len(all_row) > 0 else ''  # Column F (index 5)
-        
+            phone_raw = str(all_row['Phone No.']) if all_row is not None else ''
+
         # Add leading "0" to phone numbers and remove trailing .0
         phone_raw_str = str(phone_raw) if phone_raw else ''
         phone = '0' + phone_raw_str if phone_raw_str and not phone_raw_str.startswith('0') else phone_raw_str
         phone = phone.replace('.0', '')  # Remove trailing .0
-        
+
         # Set other fields as requested
         email = ''  # Set to blank as requested
         notes = ''  # Set to blank as requested
         target_time_minutes = ''  # Set to blank as requested
         average_wage_ratio = ''  # Set to blank as requested
-        
-        # Set latitude and longitude to empty (disabled geocoding)
+
+        # Latitude and longitude stay empty unless geocode_customers fills them in
         latitude = ''
         longitude = ''
-        
-        # Format created_at date from Column F to YYYY-MM-DD 04:00:00+00 format
-        try:
-            # Parse date in format like "6th Sep 24"
-            if isinstance(created_at, str) and created_at.strip():
-                # Use pandas to parse the date with dayfirst=True
-                date_obj = pd.to_datetime(created_at, dayfirst=True)
-                year = date_obj.strftime('%Y')  # 4-digit year
-                month = date_obj.strftime('%m')  # 2-digit month
-                day = date_obj.strftime('%d')    # 2-digit day
-                formatted_date = f'{year}-{month}-{day} 04:00:00+00'
-                created_at = formatted_date
-            else:
-                created_at = '2025-01-01 04:00:00+00'
-        except:
-            created_at = '2025-01-01 04:00:00+00'  # Default if parsing fails
-        
-        all_customers_data.append({
-            'id': customer_counter,
-            'name': customer_name,
-            'address': address,
-            'latitude': latitude,  # Now geocoded from address
-            'longitude': longitude,  # Now geocoded from address
-            'phone': phone,  # Now with leading "0"
-            'email': email,  # Now blank as requested
-            'price': price,  # Now from job data
-            'clean_frequency': clean_frequency,  # Now from regular-customers-wins sheet
-            'notes': notes,  # Now blank as requested
-            'target_time_minutes': target_time_minutes,  # Now blank as requested
-            'average_wage_ratio': average_wage_ratio,  # Now blank as requested
-            'is_friends_family': False,  # Static FALSE
-            'friends_family_minutes': '',  # Blank as specified
-            'active': active_status,  # Now from combined sheet
-            'created_at': created_at
-        })
+
+        # Format created_at date from the all sheet's Column F to YYYY-MM-DD 04:00:00+00 format
+        created_date = all_created_dates.iloc[all_position] if all_position is not None else pd.NaT
+        if pd.notna(created_date):
+            created_at = created_date.strftime('%Y-%m-%d 04:00:00+00')
+        else:
+            created_at = '2025-01-01 04:00:00+00'  # Default if missing or unparsable
+
+        all_customers_data.append(CustomerRecord(
+            id=customer_counter,
+            name=customer_name,
+            address=address,
+            latitude=latitude,  # Geocoded from address with --geocode
+            longitude=longitude,  # Geocoded from address with --geocode
+            phone=phone,  # Now with leading "0"
+            email=email,  # Now blank as requested
+            price=price,  # Now from job data
+            clean_frequency=clean_frequency,  # Now from regular-customers-wins sheet
+            notes=notes,  # Now blank as requested
+            target_time_minutes=target_time_minutes,  # Now blank as requested
+            average_wage_ratio=average_wage_ratio,  # Now blank as requested
+            is_friends_family=False,  # Static FALSE
+            friends_family_minutes='',  # Blank as specified
+            active=active_status,  # Now from combined sheet
+            created_at=created_at
+        ))
         customer_counter += 1
-    
+
+    return all_customers_data
+
+def geocode_customers(all_customers_data, geocoder):
+    """Fill in latitude and longitude for every customer whose address geocodes"""
+    # Missing addresses come through build_customers as '' or the string 'nan'
+    addresses = [customer.address for customer in all_customers_data if customer.address not in ('', 'nan')]
+    locations = geocoder.geocode_many(addresses)
+    for customer in all_customers_data:
+        location = locations.get(customer.address)
+        if location:
+            customer.latitude, customer.longitude = location
+    stats = geocoder.stats
+    print(f"Geocoded {len(locations)} of {len(all_customers_data)} customers "
+          f"({stats['cached']} cached, {stats['fetched']} fetched, {stats['failed']} failed, {stats['retries']} retries)")
+
+def number_customers(all_customers_data):
+    """Sort customers by created_at and number them from 1; return {customer name: new ID}"""
     # Sort customers by created_at date (ascending) and reassign IDs
-    all_customers_data.sort(key=lambda x: x['created_at'])
+    all_customers_data.sort(key=lambda x: x.created_at)
     
     # Create mapping from old customer names to new IDs
     customer_name_to_new_id = {}
     for i, customer in enumerate(all_customers_data):
-        old_id = customer['id']
         new_id = i + 1
-        customer['id'] = new_id
-        customer_name_to_new_id[customer['name']] = new_id
+        customer.id = new_id
+        customer_name_to_new_id[customer.name] = new_id
+    return customer_name_to_new_id
+
+def assign_customer_ids(all_customers_data, all_job_data):
+    """Renumber customers by created_at and point every job at its customer's new ID"""
+    customer_name_to_new_id = number_customers(all_customers_data)
     
     # Update job customer IDs to match the new customer IDs
     for job in all_job_data:
-        customer_name = job['customer_name']
+        customer_name = job.customer_name
         if customer_name in customer_name_to_new_id:
-            job['customer_id'] = customer_name_to_new_id[customer_name]
+            job.customer_id = customer_name_to_new_id[customer_name]
         else:
-            job['customer_id'] = 0  # Default for missing customers
-    
-    # Create a new Excel workbook
-    output_file = "MyHome_Data.xlsx"
-    
-    # Create DataFrame for jobs
-    jobs_df = pd.DataFrame(all_job_data)
-    
-    # Convert created_at column to string format for Excel
-    jobs_df['created_at'] = pd.to_datetime(jobs_df['created_at']).dt.strftime('%Y-%m-%d %H:%M:%S+00')
-    
-    # Ensure price column is never empty (should already be handled above, but just in case)
-    jobs_df['price'] = jobs_df['price'].apply(lambda x: 0 if x is None or x == "" else x)
-    
-    # Create DataFrame for time entries
-    time_entries_df = pd.DataFrame(all_time_entries)
-    
-    # Convert time columns to string format for Excel
-    time_entries_df['clock_in_time'] = pd.to_datetime(time_entries_df['clock_in_time']).dt.strftime('%Y-%m-%d %H:%M:%S+00')
-    time_entries_df['clock_out_time'] = pd.to_datetime(time_entries_df['clock_out_time']).dt.strftime('%Y-%m-%d %H:%M:%S+00')
-    
-    # Sort time entries by clock_in_time from oldest to newest
-    time_entries_df = time_entries_df.sort_values('clock_in_time', ascending=True)
-    
-    # Reassign time entry IDs starting at 1 for the sorted entries
-    time_entries_df['id'] = range(1, len(time_entries_df) + 1)
-    
-    # Create DataFrame for customers
-    customers_df = pd.DataFrame(all_customers_data)
-    
-    # Write to Excel file
-    with pd.ExcelWriter(output_file, engine='openpyxl') as writer:
-        jobs_df.to_excel(writer, sheet_name='jobs', index=False)
-        time_entries_df.to_excel(writer, sheet_name='time_entries', index=False)
-        customers_df.to_excel(writer, sheet_name='customers', index=False)
-    
-    print(f"Generated {len(all_job_data)} job entries in {output_file}")
-    print(f"Generated {len(all_time_entries)} time entries in {output_file}")
-    print(f"Generated {len(all_customers_data)} customer entries in {output_file}")
+            job.customer_id = 0  # Default for missing customers
+
+def iter_job_output_rows(all_job_data):
+    """Yield job rows in JOB_COLUMNS order"""
+    price_position = JOB_COLUMNS.index('price')
+    for row in record_rows(all_job_data, JOB_COLUMNS):
+        # Ensure price column is never empty (should already be handled above, but just in case)
+        if row[price_position] is None or row[price_position] == "":
+            row = row[:price_position] + (0,) + row[price_position + 1:]
+        yield row
+
+def write_output(output_file, all_job_data, all_time_entries, all_customers_data, extra_sheets=None, output_format='xlsx',
+                 rejects=NULL_REJECTS):
+    """Stream the jobs, time_entries and customers sheets (plus any extra_sheets) to output_file
+
+    extra_sheets maps a sheet name to (columns, rows). created_at and the
+    clock times are already formatted by apply_job_timestamps. With the csv,
+    parquet and copy formats each sheet goes to its own file next to
+    output_file; copy writes the database tables instead (see db_export),
+    sending time entries it cannot load to rejects.
+    Returns {sheet name: file it was written to}.
+    """
+    if output_format == 'copy':
+        # Database tables in schema column order, for bulk_load.py
+        sheets = db_sheets(all_job_data, all_time_entries, all_customers_data, rejects)
+    else:
+        sheets = [
+            ('jobs', JOB_COLUMNS, iter_job_output_rows(all_job_data)),
+            ('time_entries', TIME_ENTRY_COLUMNS, record_rows(all_time_entries, TIME_ENTRY_COLUMNS)),
+            ('customers', CUSTOMER_COLUMNS, record_rows(all_customers_data, CUSTOMER_COLUMNS)),
+        ]
+    for sheet_name, (columns, rows) in (extra_sheets or {}).items():
+        sheets.append((sheet_name, columns, rows))
+    write_sheets(output_file, sheets, output_format)
+    return output_paths(output_file, [sheet_name for sheet_name, _, _ in sheets], output_format)
+
+def load_manifest(manifest_path):
+    """Load the incremental-extraction manifest, or an empty one on the first run"""
+    if not os.path.exists(manifest_path):
+        return {'max_job_id': 0, 'max_time_entry_id': 0, 'max_customer_id': 0, 'customers': {}, 'sheets': {}}
+    with open(manifest_path, encoding='utf-8') as f:
+        return json.load(f)
+
+def save_manifest(manifest_path, manifest):
+    """Atomically replace the incremental-extraction manifest"""
+    tmp_path = manifest_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, manifest_path)
+
+def assign_incremental_ids(all_job_data, all_time_entries, manifest, sheet_records):
+    """Number jobs and time entries, keeping the IDs recorded in the manifest; return the new maximum IDs"""
+    processed = manifest['sheets']
+    
+    # Jobs: keep recorded IDs, number new jobs after the maximum in full-run order
+    job_of = extraction_job_lookup(all_job_data)
+    all_job_data[:] = jobs_in_output_order(all_job_data)
+    next_job_id = manifest['max_job_id']
+    for job in all_job_data:
+        job_id = processed.get(job.sheet, {}).get('jobs', {}).get(job.job_key)
+        if job_id is None:
+            next_job_id += 1
+            job_id = next_job_id
+        job.id = job_id
+        sheet_records[job.sheet]['jobs'][job.job_key] = job_id
+    
+    # Time entries: keyed by their job, staff member and occurrence within the job
+    all_time_entries[:] = time_entries_in_output_order(all_time_entries)
+    next_time_entry_id = manifest['max_time_entry_id']
+    occurrences = {}
+    for time_entry in all_time_entries:
+        job = job_of(time_entry)
+        time_entry.job_id = job.id
+        entry_base = f"{job.job_key}|{time_entry.staff}"
+        occurrences[(job.sheet, entry_base)] = occurrences.get((job.sheet, entry_base), 0) + 1
+        entry_key = f"{entry_base}|{occurrences[(job.sheet, entry_base)]}"
+        time_entry_id = processed.get(job.sheet, {}).get('time_entries', {}).get(entry_key)
+        if time_entry_id is None:
+            next_time_entry_id += 1
+            time_entry_id = next_time_entry_id
+        time_entry.id = time_entry_id
+        sheet_records[job.sheet]['time_entries'][entry_key] = time_entry_id
+    return next_job_id, next_time_entry_id
+
+def run_incremental(reference, workers=1, manifest_path=MANIFEST_PATH, output_file=DELTA_OUTPUT_FILE, geocoder=None,
+                    output_format='xlsx', profiler=NULL_PROFILER, rejects=NULL_REJECTS):
+    """Extract only new or changed weekly sheets and write them as a delta with stable IDs
+
+    Jobs and time entries already recorded in the manifest keep their IDs;
+    new ones are numbered after the existing maximum, in the same order a
+    full run would use. Rows that disappeared from a changed or removed
+    sheet are listed in the delta's 'removed' sheet. New customers are
+    geocoded when a geocoder is given. Returns False when no sheet had
+    changed and nothing was extracted.
+    """
+    manifest = load_manifest(manifest_path)
+    processed = manifest['sheets']
+    
+    # A sheet has changed when its extracted values have, so formatting-only
+    # edits (which touch the shared styles and so every sheet's XML) do not count.
+    # The row cache makes reading the unchanged sheets cheap.
+    included = {sheet_name: rows_digest([]) for sheet_name in read_sheet_names(WORKBOOK_PATH) if sheet_name not in EXCLUDED_SHEETS}
+    changed_rows = {}
+    rows = profiler.timed_iter('load', iter_cached_workbook_rows(WORKBOOK_PATH, EXCLUDED_SHEETS, workers=workers))
+    for sheet_name, sheet_rows in group_rows_by_sheet(rows):
+        sheet_rows = list(sheet_rows)
+        included[sheet_name] = rows_digest(sheet_rows)
+        if processed.get(sheet_name, {}).get('key') != included[sheet_name]:
+            changed_rows[sheet_name] = sheet_rows
+    changed = [sheet_name for sheet_name, key in included.items() if processed.get(sheet_name, {}).get('key') != key]
+    removed_sheets = [sheet_name for sheet_name in processed if sheet_name not in included]
+    
+    if not changed and not removed_sheets:
+        print(f"No new or changed sheets since the last run; {manifest_path} is up to date")
+        return False
+    print(f"Incremental extract: {len(changed)} new or changed sheets, {len(removed_sheets)} removed sheets")
+    
+    with profiler.stage('group'):
+        rows = (row for sheet_name in changed for row in changed_rows.get(sheet_name, []))
+        all_job_data, all_time_entries = extract_jobs(rows, reference, profiler, rejects)
+    report_fuzzy_matches(reference)
+    report_unresolved_staff(reference)
+    
+    sheet_records = {sheet_name: {'key': included[sheet_name], 'jobs': {}, 'time_entries': {}} for sheet_name in changed}
+    
+    with profiler.stage('assign_ids'):
+        next_job_id, next_time_entry_id = assign_incremental_ids(all_job_data, all_time_entries, manifest, sheet_records)
+    
+    # Customers: only names not seen before are built and exported
+    known_customers = manifest['customers']
+    with profiler.stage('customers'):
+        customer_names = collect_customer_names(all_job_data, reference['customer_combined_df'])
+        new_customers = build_customers(customer_names - set(known_customers), all_job_data, reference)
+    profiler.count('customers', len(new_customers))
+    if geocoder is not None:
+        with profiler.stage('geocode'):
+            geocode_customers(new_customers, geocoder)
+    new_customers.sort(key=lambda x: x.created_at)
+    next_customer_id = manifest['max_customer_id']
+    for customer in new_customers:
+        next_customer_id += 1
+        customer.id = next_customer_id
+        known_customers[customer.name] = next_customer_id
+    for job in all_job_data:
+        job.customer_id = known_customers.get(job.customer_name, 0)
+    
+    # Anything previously recorded for a changed or removed sheet that is
+    # no longer there has to be deleted downstream
+    removed = []
+    for sheet_name in changed + removed_sheets:
+        previous = processed.get(sheet_name, {'jobs': {}, 'time_entries': {}})
+        current = sheet_records.get(sheet_name, {'jobs': {}, 'time_entries': {}})
+        for table in ('jobs', 'time_entries'):
+            live_ids = set(current[table].values())
+            removed.extend({'table': table, 'id': record_id} for record_id in sorted(previous[table].values()) if record_id not in live_ids)
+    
+    # Time entries are written in clock-in order; jobs are already sorted
+    with profiler.stage('write'):
+        paths = write_output(output_file, all_job_data, all_time_entries, new_customers,
+                             extra_sheets={'removed': (['table', 'id'], ((row['table'], row['id']) for row in removed))},
+                             output_format=output_format)
+    
+    for sheet_name in removed_sheets:
+        del processed[sheet_name]
+    processed.update(sheet_records)
+    manifest['max_job_id'] = max(manifest['max_job_id'], next_job_id)
+    manifest['max_time_entry_id'] = max(manifest['max_time_entry_id'], next_time_entry_id)
+    manifest['max_customer_id'] = max(manifest['max_customer_id'], next_customer_id)
+    save_manifest(manifest_path, manifest)
+    
+    print(f"Delta written to {', '.join(dict.fromkeys(paths.values()))}: {len(all_job_data)} jobs, {len(all_time_entries)} time entries, "
+          f"{len(new_customers)} new customers, {len(removed)} removed rows")
+    print(f"Manifest updated: {manifest_path}")
+    return True
+
+def run_out_of_core(reference, rows, spill_path=SPILL_FILE, output_file=OUTPUT_FILE, geocoder=None, output_format='xlsx',
+                    profiler=NULL_PROFILER, rejects=NULL_REJECTS):
+    """Full extract that spills each sheet's jobs and time entries to SQLite and orders them there
+
+    Produces the same output as the in-memory run, but only one sheet's
+    records and the customers are held in memory at a time (see spill_store).
+    """
+    store = SpillStore(spill_path)
+    try:
+        # Parsing happens lazily as the rows are grouped, so it is timed per row
+        with profiler.stage('group'):
+            for sheet_jobs, sheet_time_entries in iter_sheet_extracts(profiler.timed_iter('load', rows), reference, profiler, rejects):
+                with profiler.stage('timestamps'):
+                    apply_job_timestamps(sheet_jobs, sheet_time_entries)
+                with profiler.stage('spill'):
+                    store.add_sheet(sheet_jobs, sheet_time_entries)
+        profiler.count('jobs', store.job_count)
+        profiler.count('time_entries', store.time_entry_count)
+        report_fuzzy_matches(reference)
+        report_unresolved_staff(reference)
+        with profiler.stage('assign_ids'):
+            store.assign_job_ids()
+        
+        # Customers are few enough to build in memory from two streaming passes over the jobs
+        with profiler.stage('customers'):
+            customer_names = collect_customer_names(store.iter_jobs(), reference['customer_combined_df'])
+            all_customers_data = build_customers(customer_names, store.iter_jobs(), reference)
+        profiler.count('customers', len(all_customers_data))
+        if geocoder is not None:
+            with profiler.stage('geocode'):
+                geocode_customers(all_customers_data, geocoder)
+        with profiler.stage('assign_ids'):
+            store.set_customer_ids(number_customers(all_customers_data).items())
+        
+        with profiler.stage('write'):
+            paths = write_output(output_file, store.iter_jobs(), store.iter_time_entries(), all_customers_data,
+                                 output_format=output_format, rejects=rejects)
+    finally:
+        store.close()
+    
+    print(f"Generated {store.job_count} job entries, {store.time_entry_count} time entries and "
+          f"{len(all_customers_data)} customer entries in {', '.join(dict.fromkeys(paths.values()))} (out of core, via {spill_path})")
+
+def report_fuzzy_matches(reference):
+    """Print the customer names that were resolved by fuzzy matching"""
+    customer_matcher = reference['customer_matcher']
+    if customer_matcher is None:
+        return
+    resolved = customer_matcher.resolved()
+    print(f"Fuzzy-matched {len(resolved)} customer names to source_customer_details.xlsx:")
+    for name, (reference_name, score) in sorted(resolved.items()):
+        print(f"  '{name}' -> '{reference_name}' ({score:.2f})")
+
+def report_unresolved_staff(reference, report_file=UNRESOLVED_STAFF_FILE):
+    """Print and save the staff names that matched no user in source_users.csv"""
+    unresolved = reference['staff_index'].unresolved_report()
+    if not unresolved:
+        return
+    with open(report_file, 'w', newline='', encoding='utf-8') as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(['staff', 'time_entries'])
+        writer.writerows(unresolved)
+    print(f"{len(unresolved)} staff names not found in {USERS_FILE} (time entries left without a user_id):")
+    for name, count in unresolved:
+        print(f"  '{name}': {count}")
+    print(f"Unresolved staff saved to {report_file}")
+
+def main(rows=None, workers=1, incremental=False, fuzzy_min_score=None, geocode=False, geocode_url=None,
+         output_format='xlsx', out_of_core=False, profiler=NULL_PROFILER):
+    """Build jobs, time entries and customers from workbook rows
+
+    rows may be a pre-read row stream (see workbook_extraction) so several
+    scripts can share one parse of the workbook. workers > 1 parses changed
+    sheets across a process pool. incremental only extracts new or changed
+    sheets and writes a delta (see run_incremental). fuzzy_min_score enables
+    fuzzy resolution of unknown customer names (see load_reference_data).
+    geocode fills customer coordinates through the cached batch geocoder,
+    against geocode_url when given (see geocoding). output_format is xlsx,
+    csv, parquet or copy (see output_writer). out_of_core keeps memory
+    bounded by spilling each sheet to SQLite (see run_out_of_core).
+    profiler collects per-stage
+    timings, row and reject counters and memory peaks (see instrumentation).
+    Dropped and suspicious rows are written to the rejects file (see rejects).
+    """
+    with profiler.stage('reference'):
+        reference = load_reference_data(fuzzy_min_score)
+    geocoder = None
+    if geocode:
+        # requests and the API key from the .env file are only needed for geocoding
+        from dotenv import load_dotenv
+        from geocoding import Geocoder
+        load_dotenv(CONFIG['env_file'])
+        geocoder = Geocoder(url=geocode_url)
+    
+    # Dropped and suspicious rows go to a rejects file; the console only gets the totals
+    rejects = RejectSink('job_extractor', rejects_path('job_extractor'), profiler)
+    if incremental:
+        extracted = run_incremental(reference, workers, geocoder=geocoder, output_format=output_format,
+                                    profiler=profiler, rejects=rejects)
+        # An up-to-date run read no rows, so the last extraction's rejects still apply
+        rejects.close(keep_previous=not extracted)
+        return
+    
+    # Stream rows from the workbook (via the sidecar cache) unless they were supplied
+    if rows is None:
+        rows = iter_cached_workbook_rows(WORKBOOK_PATH, EXCLUDED_SHEETS, workers=workers)
+    
+    if out_of_core:
+        run_out_of_core(reference, rows, geocoder=geocoder, output_format=output_format, profiler=profiler, rejects=rejects)
+        rejects.close()
+        return
+    
+    # Parsing happens lazily as the rows are grouped, so it is timed per row
+    with profiler.stage('group'):
+        all_job_data, all_time_entries = extract_jobs(profiler.timed_iter('load', rows), reference, profiler, rejects)
+    report_fuzzy_matches(reference)
+    report_unresolved_staff(reference)
+    with profiler.stage('assign_ids'):
+        assign_ids(all_job_data, all_time_entries)
+    
+    with profiler.stage('customers'):
+        customer_names = collect_customer_names(all_job_data, reference['customer_combined_df'])
+        all_customers_data = build_customers(customer_names, all_job_data, reference)
+    profiler.count('customers', len(all_customers_data))
+    if geocoder is not None:
+        with profiler.stage('geocode'):
+            geocode_customers(all_customers_data, geocoder)
+    with profiler.stage('assign_ids'):
+        assign_customer_ids(all_customers_data, all_job_data)
+    
+    # Stream the output sheets straight from the records
+    output_file = OUTPUT_FILE
+    with profiler.stage('write'):
+        paths = write_output(output_file, all_job_data, all_time_entries, all_customers_data, output_format=output_format,
+                             rejects=rejects)
+    
+    print(f"Generated {len(all_job_data)} job entries in {paths['jobs']}")
+    print(f"Generated {len(all_time_entries)} time entries in {paths['time_entries']}")
+    print(f"Generated {len(all_customers_data)} customer entries in {paths['customers']}")
     print(f"Total entries processed: {len(all_job_data)}")
-    print(f"Excel file '{output_file}' created with 'jobs', 'time_entries', and 'customers' sheets")
-    print("You can now add more sheets to this Excel file as needed.")
+    if output_format == 'xlsx':
+        print(f"Excel file '{output_file}' created with 'jobs', 'time_entries', and 'customers' sheets")
+        print("You can now add more sheets to this Excel file as needed.")
+    else:
+        print(f"{output_format} files written: {', '.join(paths.values())}")
+    rejects.close()
+
+def cli(argv=None, prog=None):
+    """Parse the command line (argv, or sys.argv when None) and run the script"""
+    parser = argparse.ArgumentParser(prog=prog, description="Extract jobs, time entries and customers into MyHome_Data.xlsx")
+    parser.add_argument('--workers', type=int, default=1, help="Parse changed sheets across this many processes (default: 1)")
+    parser.add_argument('--incremental', action='store_true',
+                        help=f"Only extract new or changed sheets, keep IDs stable via {MANIFEST_PATH} and write {DELTA_OUTPUT_FILE}")
+    parser.add_argument('--fuzzy-customers', type=float, nargs='?', const=0.9, default=None, metavar='MIN_SCORE',
+                        help="Resolve unknown customer names to the closest reference name scoring at least MIN_SCORE (default: 0.9)")
+    parser.add_argument('--geocode', action='store_true',
+                        help=f"Fill customer latitude/longitude, caching results in {CONFIG['geocode_cache']}")
+    parser.add_argument('--geocode-url', default=None,
+                        help="Geocoding endpoint (default: $GEOCODE_URL or the Google Maps Geocoding API)")
+    parser.add_argument('--format', choices=OUTPUT_FORMATS, default='xlsx',
+                        help="Output format; csv, parquet and copy write one file per sheet, copy in database column order for bulk_load.py (default: xlsx)")
+    parser.add_argument('--out-of-core', action='store_true',
+                        help=f"Spill each sheet's jobs and time entries to {SPILL_FILE} and order them there, keeping memory bounded")
+    add_profile_arguments(parser, 'job_extractor')
+    add_verbose_argument(parser)
+    args = parser.parse_args(argv)
+    if args.incremental and args.out_of_core:
+        parser.error("--out-of-core is for full extracts and cannot be combined with --incremental")
+    if args.incremental and args.format == 'copy':
+        # bulk_load.py replaces whole tables, so a delta would wipe every older row
+        parser.error("--format copy is for full extracts loaded by bulk_load.py and cannot be combined with --incremental")
+    set_verbose(args.verbose)
+    profiler = profiler_from_args(args, 'job_extractor')
+    main(workers=args.workers, incremental=args.incremental, fuzzy_min_score=args.fuzzy_customers,
+         geocode=args.geocode or args.geocode_url is not None, geocode_url=args.geocode_url,
+         output_format=args.format, out_of_core=args.out_of_core, profiler=profiler)
+    profiler.finish()
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    cli()
@@ -0,0 +1,61 @@
+"""
+Compact record types for the jobs, time_entries and customers output sheets.
+
+Each record is a __slots__ class holding exactly the output columns plus the
+few working fields the extractor needs, so a record costs a fixed-size slot
+array instead of a per-record hash table of string keys. record_columns()
+reads a list of records into per-column lists for columnar stages, and
+record_rows() streams them as row tuples for the writer.
+"""
+
+from operator import attrgetter
+
+# Output columns, in the order they are written
+JOB_COLUMNS = ['id', 'customer_id', 'team_id', 'status', 'created_at', 'price', 'customer_name',
+               'team_members_at_creation', 'additional_staff']
+TIME_ENTRY_COLUMNS = ['id', 'user_id', 'staff', 'job_id', 'clock_in_time', 'clock_out_time',
+                      'lunch_break', 'geofence_override', 'auto_lunch_deducted']
+CUSTOMER_COLUMNS = ['id', 'name', 'address', 'latitude', 'longitude', 'phone', 'email', 'price',
+                    'clean_frequency', 'notes', 'target_time_minutes', 'average_wage_ratio',
+                    'is_friends_family', 'friends_family_minutes', 'active', 'created_at']
+
+class Record:
+    """Base for slotted records: keyword construction, unset slots default to None"""
+    __slots__ = ()
+
+    def __init__(self, **fields):
+        for name in self.__slots__:
+            setattr(self, name, fields.pop(name, None))
+        if fields:
+            raise TypeError(f"{type(self).__name__} has no field(s) {', '.join(sorted(fields))}")
+
+    def __repr__(self):
+        fields = ', '.join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+class JobRecord(Record):
+    """One row of the jobs sheet
+
+    sheet and job_key identify the job for incremental runs; date, start_time,
+    finish_time and lunch_break hold the raw workbook cells until the
+    timestamp stage has turned them into created_at and clock times.
+    """
+    __slots__ = tuple(JOB_COLUMNS) + ('sheet', 'job_key', 'date', 'start_time', 'finish_time', 'lunch_break')
+
+class TimeEntryRecord(Record):
+    """One row of the time_entries sheet"""
+    __slots__ = tuple(TIME_ENTRY_COLUMNS)
+
+class CustomerRecord(Record):
+    """One row of the customers sheet"""
+    __slots__ = tuple(CUSTOMER_COLUMNS)
+
+def record_columns(records, columns):
+    """Return {column: [value per record]} for the given columns, in record order"""
+    return {column: [getattr(record, column) for record in records] for column in columns}
+
+def record_rows(records, columns):
+    """Yield one tuple of column values per record, in record order"""
+    getter = attrgetter(*columns)
+    for record in records:
+        yield getter(record)
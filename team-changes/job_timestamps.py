@@ -0,0 +1,136 @@
+"""
+Columnar timestamp construction for jobs and time entries.
+
+Instead of combining, shifting and formatting datetimes one job at a time,
+the workbook's date, start, finish and lunch-break cells are gathered into
+numpy columns once. The start, finish and lunch-adjusted clock-out instants
+are then computed with vectorized datetime64 arithmetic and formatted to the
+'%Y-%m-%d %H:%M:%S+00' output strings in a single pass.
+
+Spreadsheet times are local wall-clock times in the business's timezone.
+They are converted to UTC with a table of that zone's DST transitions, built
+once for the years the data covers, and a binary search per column instead of
+a timezone lookup per row. Times in the summer DST window therefore come out
+an hour earlier than the old fixed +10:00 conversion, which is what
+fix-daylight-savings.cjs and fix-daylight-savings-timestamps.sql used to
+patch in the database afterwards.
+"""
+
+from datetime import datetime, time, timedelta, timezone
+from functools import lru_cache
+from zoneinfo import ZoneInfo
+
+import numpy as np
+
+# Timezone the wages spreadsheet is recorded in
+BUSINESS_TIMEZONE = 'Australia/Melbourne'
+
+# Deducted from the finish time when a lunch break was taken
+LUNCH_BREAK = np.timedelta64(30, 'm')
+
+def time_of_day_seconds(values):
+    """Return (seconds since midnight, is_time mask) for a column of cells"""
+    seconds = np.fromiter(
+        (value.hour * 3600 + value.minute * 60 + value.second if isinstance(value, time) else 0 for value in values),
+        dtype=np.int64, count=len(values),
+    )
+    is_time = np.fromiter((isinstance(value, time) for value in values), dtype=bool, count=len(values))
+    return seconds, is_time
+
+def lunch_break_codes(values):
+    """Return (took_lunch, no_lunch) masks for the Lunch Break column"""
+    labels = [str(value).strip().lower() if value is not None else '' for value in values]
+    took_lunch = np.fromiter((label == 'yes' for label in labels), dtype=bool, count=len(labels))
+    no_lunch = np.fromiter((label == 'no' for label in labels), dtype=bool, count=len(labels))
+    return took_lunch, no_lunch
+
+def utc_offset_seconds(zone, instant):
+    """Return the zone's UTC offset in seconds at a UTC datetime"""
+    return int(instant.astimezone(zone).utcoffset().total_seconds())
+
+@lru_cache(maxsize=None)
+def transition_table(timezone_name, first_year, last_year):
+    """Return (wall-clock switch times, offsets) for the zone's transitions in [first_year, last_year]
+
+    offsets[i] applies to wall-clock times before switches[i], and the last
+    offset to everything after. A switch sits at the later of the two wall
+    clock readings of its transition, so times skipped by a spring-forward
+    gap and the first pass through an autumn fall-back hour both keep the
+    earlier offset, the same choice zoneinfo makes for fold=0.
+    """
+    zone = ZoneInfo(timezone_name)
+    switches = []
+    offsets = []
+    day = datetime(first_year, 1, 1, tzinfo=timezone.utc)
+    end = datetime(last_year + 1, 1, 1, tzinfo=timezone.utc)
+    offset = utc_offset_seconds(zone, day)
+    while day < end:
+        next_day = day + timedelta(days=1)
+        next_offset = utc_offset_seconds(zone, next_day)
+        if next_offset != offset:
+            # Narrow the transition down to the hour it happens in
+            instant = day
+            while utc_offset_seconds(zone, instant + timedelta(hours=1)) == offset:
+                instant += timedelta(hours=1)
+            instant += timedelta(hours=1)
+            wall = instant.replace(tzinfo=None) + timedelta(seconds=max(offset, next_offset))
+            switches.append(np.datetime64(wall, 's'))
+            offsets.append(offset)
+            offset = next_offset
+        day = next_day
+    offsets.append(offset)
+    return np.array(switches, dtype='datetime64[s]'), np.array(offsets, dtype=np.int64).astype('timedelta64[s]')
+
+def local_to_utc(values, timezone_name=BUSINESS_TIMEZONE):
+    """Convert a column of naive local datetime64 values to naive UTC, keeping NaT"""
+    present = values[~np.isnat(values)]
+    if not len(present):
+        return values.copy()
+    first_year = int(str(present.min().astype('datetime64[Y]')))
+    last_year = int(str(present.max().astype('datetime64[Y]')))
+    switches, offsets = transition_table(timezone_name, first_year, last_year)
+    # NaT sorts last, so it picks up the final offset and stays NaT
+    return values - offsets[np.searchsorted(switches, values, side='right')]
+
+def utc_to_local(values, timezone_name=BUSINESS_TIMEZONE):
+    """Convert a column of naive UTC datetime64 values to naive local wall-clock times, keeping NaT"""
+    present = values[~np.isnat(values)]
+    if not len(present):
+        return values.copy()
+    first_year = int(str(present.min().astype('datetime64[Y]')))
+    last_year = int(str(present.max().astype('datetime64[Y]')))
+    switches, offsets = transition_table(timezone_name, first_year, last_year)
+    # Undo the wall-clock placement of each switch to get its UTC instant
+    utc_switches = switches - np.maximum(offsets[:-1], offsets[1:])
+    return values + offsets[np.searchsorted(utc_switches, values, side='right')]
+
+def format_utc(values):
+    """Format a datetime64 column as output strings, with None where the value is NaT"""
+    text = np.datetime_as_string(values, unit='s')
+    text = np.char.add(np.char.replace(text, 'T', ' '), '+00')
+    formatted = text.astype(object)
+    formatted[np.isnat(values)] = None
+    return formatted
+
+def build_job_timestamps(dates, start_times, finish_times, lunch_breaks):
+    """Return (created_at, clock_out) output strings for whole columns of job cells
+
+    created_at is the UTC start. clock_out is the UTC finish, less the lunch
+    break when one was taken, and None when the lunch break cell is neither
+    'Yes' nor 'No'. Start or finish cells that are not times fall back to the
+    job's date.
+    """
+    # Midnight of each job's date, and the date as recorded for non-time cells
+    parsed_dates = np.array(dates, dtype='datetime64[s]')
+    days = parsed_dates.astype('datetime64[D]').astype('datetime64[s]')
+
+    start_seconds, start_is_time = time_of_day_seconds(start_times)
+    finish_seconds, finish_is_time = time_of_day_seconds(finish_times)
+    local_start = np.where(start_is_time, days + start_seconds.astype('timedelta64[s]'), parsed_dates)
+    local_finish = np.where(finish_is_time, days + finish_seconds.astype('timedelta64[s]'), parsed_dates)
+
+    took_lunch, no_lunch = lunch_break_codes(lunch_breaks)
+    local_clock_out = np.where(took_lunch, local_finish - LUNCH_BREAK, local_finish)
+    local_clock_out[~(took_lunch | no_lunch)] = np.datetime64('NaT')
+
+    return format_utc(local_to_utc(local_start)), format_utc(local_to_utc(local_clock_out))
@@ -0,0 +1,167 @@
+"""
+Streaming output stage for the jobs, time_entries and customers sheets.
+
+Rows are pulled from the records one at a time and written straight out,
+so memory stays flat however many rows there are:
+
+- xlsx: an openpyxl write-only workbook, one sheet per table
+- csv: one <stem>_<sheet>.csv file per table
+- parquet: one <stem>_<sheet>.parquet file per table, written in row
+  batches (needs pyarrow)
+- copy: one <stem>_<sheet>.copy file per table in PostgreSQL's COPY text
+  format, no header (see db_export and bulk_load.py)
+
+Each sheet is given as (name, columns, rows), where rows is any iterable of
+row tuples in column order. Write throughput is printed when done.
+"""
+
+import csv
+import math
+import os
+import time
+from itertools import islice
+
+import numpy as np
+
+OUTPUT_FORMATS = ('xlsx', 'csv', 'parquet', 'copy')
+
+# Rows per Parquet row group
+PARQUET_BATCH_ROWS = 50000
+
+# Parquet column types; every other column is written as text
+PARQUET_INTEGER_COLUMNS = {'id', 'customer_id', 'job_id'}
+PARQUET_BOOLEAN_COLUMNS = {'is_friends_family', 'active'}
+
+# Backslash escapes of COPY's text format
+COPY_ESCAPES = str.maketrans({'\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r'})
+
+def cell_value(value):
+    """Plain Python value for a cell: numpy scalars unwrapped, NaN written as empty"""
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    return value
+
+def sheet_path(output_file, sheet_name, extension):
+    """Per-sheet file next to output_file, e.g. MyHome_Data_jobs.csv"""
+    stem = os.path.splitext(output_file)[0]
+    return f"{stem}_{sheet_name}.{extension}"
+
+def output_paths(output_file, sheet_names, output_format='xlsx'):
+    """{sheet name: file it is written to} for write_sheets in a format"""
+    if output_format == 'xlsx':
+        return {sheet_name: output_file for sheet_name in sheet_names}
+    return {sheet_name: sheet_path(output_file, sheet_name, output_format) for sheet_name in sheet_names}
+
+def header_cells(worksheet, columns):
+    """Header row styled like pandas' to_excel header"""
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Alignment, Border, Font, Side
+
+    thin_side = Side(style='thin')
+    cells = []
+    for column in columns:
+        cell = WriteOnlyCell(worksheet, value=column)
+        cell.font = Font(bold=True)
+        cell.border = Border(left=thin_side, right=thin_side, top=thin_side, bottom=thin_side)
+        cell.alignment = Alignment(horizontal='center', vertical='top')
+        cells.append(cell)
+    return cells
+
+def write_xlsx(output_file, sheets):
+    """Write every sheet into one workbook in write-only mode; return rows written"""
+    # openpyxl is only loaded for xlsx output, like pyarrow for parquet
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    row_count = 0
+    for sheet_name, columns, rows in sheets:
+        worksheet = workbook.create_sheet(sheet_name)
+        worksheet.append(header_cells(worksheet, columns))
+        for row in rows:
+            worksheet.append([cell_value(value) for value in row])
+            row_count += 1
+    workbook.save(output_file)
+    return row_count
+
+def write_csv(output_file, sheets):
+    """Write each sheet to its own CSV file; return rows written"""
+    row_count = 0
+    for sheet_name, columns, rows in sheets:
+        with open(sheet_path(output_file, sheet_name, 'csv'), 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(columns)
+            for row in rows:
+                writer.writerow([cell_value(value) for value in row])
+                row_count += 1
+    return row_count
+
+def copy_field(value):
+    """One field in COPY text format: \\N for NULL, t/f for booleans, escaped text otherwise"""
+    value = cell_value(value)
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    return str(value).translate(COPY_ESCAPES)
+
+def write_copy(output_file, sheets):
+    """Write each sheet to its own COPY text file, without a header; return rows written"""
+    row_count = 0
+    for sheet_name, columns, rows in sheets:
+        with open(sheet_path(output_file, sheet_name, 'copy'), 'w', newline='', encoding='utf-8') as f:
+            for row in rows:
+                f.write('\t'.join(copy_field(value) for value in row))
+                f.write('\n')
+                row_count += 1
+    return row_count
+
+def parquet_type(pa, column):
+    """Arrow type a column is written with"""
+    if column in PARQUET_INTEGER_COLUMNS:
+        return pa.int64()
+    if column in PARQUET_BOOLEAN_COLUMNS:
+        return pa.bool_()
+    return pa.string()
+
+def parquet_values(column, values):
+    """Values converted for their column's Arrow type, text columns stringified"""
+    values = [cell_value(value) for value in values]
+    if column in PARQUET_INTEGER_COLUMNS or column in PARQUET_BOOLEAN_COLUMNS:
+        return values
+    return [None if value is None else str(value) for value in values]
+
+def write_parquet(output_file, sheets):
+    """Write each sheet to its own Parquet file in row batches; return rows written"""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Parquet output needs pyarrow (pip install pyarrow)")
+
+    row_count = 0
+    for sheet_name, columns, rows in sheets:
+        schema = pa.schema([(column, parquet_type(pa, column)) for column in columns])
+        rows = iter(rows)
+        with pq.ParquetWriter(sheet_path(output_file, sheet_name, 'parquet'), schema) as writer:
+            while True:
+                batch = list(islice(rows, PARQUET_BATCH_ROWS))
+                if not batch:
+                    break
+                arrays = [pa.array(parquet_values(column, values), type=schema.field(column).type)
+                          for column, values in zip(columns, zip(*batch))]
+                writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+                row_count += len(batch)
+    return row_count
+
+WRITERS = {'xlsx': write_xlsx, 'csv': write_csv, 'parquet': write_parquet, 'copy': write_copy}
+
+def write_sheets(output_file, sheets, output_format='xlsx'):
+    """Stream the sheets out in the given format and print the write throughput"""
+    started = time.perf_counter()
+    row_count = WRITERS[output_format](output_file, sheets)
+    elapsed = time.perf_counter() - started
+    rate = row_count / elapsed if elapsed > 0 else float('inf')
+    print(f"Wrote {row_count} rows ({output_format}) in {elapsed:.2f}s, {rate:,.0f} rows/s")
+    return row_count
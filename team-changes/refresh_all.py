@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Full refresh of the team-changes outputs from a single parse of the workbook.
+
+Reads "MyHome Wages Macros app.xlsm" once and feeds the same row stream to
+the job extractor, the team-period tracker and the missing-customer report.
+"""
+
+import argparse
+
+import find_missing_customers
+import job_extractor
+import team_id_tracker_dynamic
+from workbook_extraction import WORKBOOK_PATH, EXCLUDED_SHEETS, add_verbose_argument, read_workbook_rows, set_verbose
+
+def main(workers=1):
+    """Parse the workbook once and run every consumer over the shared rows"""
+    rows = read_workbook_rows(WORKBOOK_PATH, EXCLUDED_SHEETS, workers=workers)
+    print(f"Read {len(rows)} rows from {WORKBOOK_PATH}")
+
+    print("\n=== Jobs, time entries and customers ===")
+    job_extractor.main(rows)
+
+    print("\n=== Team ID tracker ===")
+    team_id_tracker_dynamic.main(rows)
+
+    print("\n=== Missing customers ===")
+    find_missing_customers.main(rows)
+
+def cli(argv=None, prog=None):
+    """Parse the command line (argv, or sys.argv when None) and run the script"""
+    parser = argparse.ArgumentParser(prog=prog, description="Regenerate every team-changes output from one read of the workbook")
+    parser.add_argument('--workers', type=int, default=1, help="Parse changed sheets across this many processes (default: 1)")
+    add_verbose_argument(parser)
+    args = parser.parse_args(argv)
+    set_verbose(args.verbose)
+    main(workers=args.workers)
+
+if __name__ == "__main__":
+    cli()
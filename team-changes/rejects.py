@@ -0,0 +1,109 @@
+"""
+Structured sink for the workbook rows a script drops or flags.
+
+Instead of printing a line per problem row, the scripts hand each one to a
+RejectSink with its sheet, row number and a reason code:
+
+- reject(): the row was dropped (e.g. a job row without a start time)
+- flag(): the row was kept but looks wrong (e.g. an unknown customer)
+
+Every row is appended to <rejects_dir>/<script>_rejects.csv and counted per
+reason, and close() prints only the per-reason totals. Fully blank
+spreadsheet rows are counted as blank_row but not written. Rejects also feed
+the profiler's rejected-row counters and flags its row counters, so
+--profile reports them too.
+"""
+
+import csv
+import os
+from collections import Counter
+
+from config import CONFIG
+from instrumentation import NULL_PROFILER
+
+REJECT_FIELDS = ['severity', 'reason', 'sheet', 'row_number', 'detail']
+
+# Counted but not written: the empty rows below each sheet's data
+BLANK_ROW = 'blank_row'
+
+def rejects_path(script):
+    """Rejects file of a script (see the rejects_dir setting)"""
+    return os.path.join(CONFIG['rejects_dir'], f"{script}_rejects.csv")
+
+def is_blank_row(row):
+    """True when none of a workbook row's cells hold a value"""
+    return all(value is None or value == '' for value in row[2:])
+
+class RejectSink:
+    """Rejected and flagged rows of one script run, with per-reason counts
+
+    path=None disables the sink (NULL_REJECTS, the default everywhere).
+    The file is created on the first written row; a run without any
+    replaces an earlier run's file with nothing (unless closed with
+    keep_previous).
+    """
+
+    def __init__(self, script, path=None, profiler=NULL_PROFILER):
+        self.script = script
+        self.path = path
+        self.profiler = profiler
+        self.enabled = path is not None
+        # (severity, reason) -> rows
+        self.counts = Counter()
+        self.file = None
+        self.writer = None
+
+    def write(self, severity, reason, sheet, row_number, detail):
+        """Count a row and append it to the rejects file"""
+        self.counts[severity, reason] += 1
+        if reason == BLANK_ROW:
+            return
+        if self.writer is None:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            self.file = open(self.path, 'w', newline='', encoding='utf-8')
+            self.writer = csv.writer(self.file)
+            self.writer.writerow(REJECT_FIELDS)
+        self.writer.writerow([severity, reason, sheet, row_number, detail])
+
+    def reject(self, reason, sheet='', row_number='', detail=''):
+        """Record a row that was dropped"""
+        if self.enabled:
+            self.profiler.reject(reason)
+            self.write('reject', reason, sheet, row_number, detail)
+
+    def reject_row(self, reason, row, detail=''):
+        """Record a dropped workbook row, as blank_row when it has no values at all"""
+        if self.enabled:
+            self.reject(BLANK_ROW if is_blank_row(row) else reason, row.sheet, row.row_number, detail)
+
+    def flag(self, reason, sheet='', row_number='', detail=''):
+        """Record a row that was kept but looks wrong"""
+        if self.enabled:
+            self.profiler.count(reason)
+            self.write('flag', reason, sheet, row_number, detail)
+
+    def close(self, keep_previous=False):
+        """Close the rejects file and print the per-reason totals
+
+        keep_previous leaves an earlier run's file in place when this run
+        wrote no rows, for runs that did not read the workbook at all.
+        """
+        if not self.enabled:
+            return
+        if self.file is not None:
+            self.file.close()
+        elif os.path.exists(self.path) and not keep_previous:
+            # Nothing to report this run; drop the previous run's rows
+            os.remove(self.path)
+        if not self.counts:
+            return
+        rejected = sum(count for (severity, _), count in self.counts.items() if severity == 'reject')
+        flagged = sum(count for (severity, _), count in self.counts.items() if severity == 'flag')
+        print(f"{rejected} rows rejected, {flagged} flagged:")
+        for (severity, reason), count in sorted(self.counts.items()):
+            print(f"  {severity} {reason}: {count}")
+        if self.file is not None:
+            print(f"Rejected and flagged rows written to {self.path}")
+
+# Shared disabled sink, the default for every function that reports rows
+NULL_REJECTS = RejectSink(None)
@@ -0,0 +1,124 @@
+"""
+SQLite spill store for the job extractor's out-of-core mode (--out-of-core).
+
+Instead of holding every job and time entry until the end of the run, the
+extractor hands each sheet's records to the store as soon as the sheet is
+done and keeps nothing of it. The store then does the work that needed
+the whole history in memory:
+
+- jobs are numbered in (created_at, customer_id, team_id, extraction order)
+  order, the order assign_ids merges them into
+- time entries are read back in (clock_in_time, extraction order) order and
+  numbered as they stream out, pointing at their job's final ID
+- customer IDs are written back onto the jobs by customer name
+
+Ordering happens in SQLite indexes, which spill to disk, so the extractor's
+memory stays at one sheet plus the customers however many weekly sheets
+the workbook holds. Cell values keep their Python types (the columns have
+no declared affinity).
+"""
+
+import os
+import sqlite3
+
+from job_records import JobRecord, TimeEntryRecord
+
+# Job fields kept in the store, besides the IDs
+JOB_FIELDS = ['customer_id', 'team_id', 'status', 'created_at', 'price', 'customer_name',
+              'team_members_at_creation', 'additional_staff']
+TIME_ENTRY_FIELDS = ['user_id', 'staff', 'clock_in_time', 'clock_out_time',
+                     'lunch_break', 'geofence_override', 'auto_lunch_deducted']
+
+SCHEMA = f"""
+CREATE TABLE jobs (
+    extraction_id INTEGER PRIMARY KEY,
+    id INTEGER,
+    team_number INTEGER,
+    {', '.join(JOB_FIELDS)}
+);
+CREATE TABLE time_entries (
+    extraction_id INTEGER PRIMARY KEY,
+    job_extraction_id INTEGER,
+    {', '.join(TIME_ENTRY_FIELDS)}
+);
+-- Final job IDs: rows are inserted in output order, so the rowid is the ID
+CREATE TABLE job_ids (
+    id INTEGER PRIMARY KEY,
+    extraction_id INTEGER UNIQUE
+);
+CREATE TABLE customer_ids (
+    name TEXT PRIMARY KEY,
+    id INTEGER
+);
+"""
+
+class SpillStore:
+    """Jobs and time entries spilled to a SQLite file, numbered and ordered there"""
+
+    def __init__(self, path):
+        self.path = path
+        # A spill file is only ever read by the run that wrote it
+        if os.path.exists(path):
+            os.remove(path)
+        self.connection = sqlite3.connect(path)
+        # Scratch data: no journal or fsync, and sorts spill to temporary files
+        self.connection.executescript("PRAGMA journal_mode = OFF; PRAGMA synchronous = OFF; PRAGMA temp_store = FILE;")
+        self.connection.executescript(SCHEMA)
+        self.job_count = 0
+        self.time_entry_count = 0
+
+    def add_sheet(self, jobs, time_entries):
+        """Spill one sheet's records; job.id and time_entry.job_id are still extraction-order IDs"""
+        with self.connection:
+            self.connection.executemany(
+                f"INSERT INTO jobs (extraction_id, team_number, {', '.join(JOB_FIELDS)}) "
+                f"VALUES ({', '.join('?' * (len(JOB_FIELDS) + 2))})",
+                ((job.id, int(job.team_id), *(getattr(job, field) for field in JOB_FIELDS)) for job in jobs))
+            self.connection.executemany(
+                f"INSERT INTO time_entries (extraction_id, job_extraction_id, {', '.join(TIME_ENTRY_FIELDS)}) "
+                f"VALUES ({', '.join('?' * (len(TIME_ENTRY_FIELDS) + 2))})",
+                ((time_entry.id, time_entry.job_id, *(getattr(time_entry, field) for field in TIME_ENTRY_FIELDS))
+                 for time_entry in time_entries))
+        self.job_count += len(jobs)
+        self.time_entry_count += len(time_entries)
+
+    def assign_job_ids(self):
+        """Number jobs from 1 by created_at, then customer_id, then team_id, ties in extraction order"""
+        with self.connection:
+            self.connection.execute("CREATE INDEX jobs_order ON jobs (created_at, customer_id, team_number, extraction_id)")
+            self.connection.execute(
+                "INSERT INTO job_ids (extraction_id) SELECT extraction_id FROM jobs "
+                "ORDER BY created_at, customer_id, team_number, extraction_id")
+            self.connection.execute(
+                "UPDATE jobs SET id = (SELECT id FROM job_ids WHERE job_ids.extraction_id = jobs.extraction_id)")
+            self.connection.execute("CREATE INDEX jobs_id ON jobs (id)")
+            self.connection.execute("CREATE INDEX time_entries_order ON time_entries (clock_in_time, extraction_id)")
+
+    def set_customer_ids(self, customer_ids):
+        """Point every job at its customer's ID from (name, ID) pairs (0 when the name has no customer)"""
+        with self.connection:
+            self.connection.executemany("INSERT OR REPLACE INTO customer_ids (name, id) VALUES (?, ?)", customer_ids)
+            self.connection.execute(
+                "UPDATE jobs SET customer_id = COALESCE((SELECT id FROM customer_ids WHERE customer_ids.name = jobs.customer_name), 0)")
+
+    def iter_jobs(self):
+        """Yield a JobRecord per job in final ID order"""
+        cursor = self.connection.execute(f"SELECT id, {', '.join(JOB_FIELDS)} FROM jobs ORDER BY id")
+        fields = ['id'] + JOB_FIELDS
+        for values in cursor:
+            yield JobRecord(**dict(zip(fields, values)))
+
+    def iter_time_entries(self):
+        """Yield a TimeEntryRecord per time entry in clock-in order, numbered from 1"""
+        cursor = self.connection.execute(
+            f"SELECT job_ids.id, {', '.join('time_entries.' + field for field in TIME_ENTRY_FIELDS)} "
+            "FROM time_entries JOIN job_ids ON job_ids.extraction_id = time_entries.job_extraction_id "
+            "ORDER BY time_entries.clock_in_time, time_entries.extraction_id")
+        fields = ['job_id'] + TIME_ENTRY_FIELDS
+        for time_entry_id, values in enumerate(cursor, start=1):
+            yield TimeEntryRecord(id=time_entry_id, **dict(zip(fields, values)))
+
+    def close(self):
+        """Close and delete the spill file"""
+        self.connection.close()
+        os.remove(self.path)
@@ -0,0 +1,76 @@
+"""
+Staff name resolution for the workbook's team and additional-staff cells.
+
+Built once from source_users.csv, the index maps normalized aliases
+(lowercase, whitespace collapsed) to user IDs:
+
+- every user's full name
+- a first name on its own, when no other user shares it ("Tia" but not
+  "Aoife") and it is not also someone's full name
+- the nicknames configured in the staff_nicknames setting, which map an
+  alias to a full name
+
+Team cells repeat the same few strings thousands of times, so each distinct
+cell is split on '&' and resolved once and the result memoized. Names that
+resolve to no user are counted for unresolved_report().
+"""
+
+import csv
+from collections import Counter
+
+def staff_key(name):
+    """Comparison key for a staff name: lowercase with whitespace collapsed"""
+    return ' '.join(str(name).split()).lower()
+
+def split_staff_group(staff_group):
+    """'Orla Shelly & Julie Roccati' -> ['Orla Shelly', 'Julie Roccati']"""
+    return [member.strip() for member in staff_group.split('&') if member.strip()]
+
+class StaffIndex:
+    """Alias table from staff names to user IDs, with memoized team-cell resolution"""
+
+    def __init__(self, users, nicknames=None):
+        # users is an iterable of (user_id, first_name, last_name)
+        self.aliases = {}
+        first_name_ids = {}
+        for user_id, first_name, last_name in users:
+            full_key = staff_key(f"{first_name} {last_name}")
+            self.aliases[full_key] = user_id
+            first_name_ids.setdefault(staff_key(first_name), set()).add(user_id)
+        for first_key, user_ids in first_name_ids.items():
+            if first_key and len(user_ids) == 1 and first_key not in self.aliases:
+                self.aliases[first_key] = next(iter(user_ids))
+        for nickname, full_name in (nicknames or {}).items():
+            user_id = self.aliases.get(staff_key(full_name))
+            if user_id is None:
+                raise ValueError(f"Staff nickname '{nickname}' refers to unknown user '{full_name}'")
+            self.aliases[staff_key(nickname)] = user_id
+
+        # Team cell -> ((staff name, user ID or ''), ...)
+        self.groups = {}
+        self.unresolved = Counter()
+
+    @classmethod
+    def from_csv(cls, filename, nicknames=None):
+        """Index the users in a source_users.csv export"""
+        with open(filename, newline='', encoding='utf-8-sig') as csvfile:
+            users = [(row['id'].strip(), row['first_name'] or '', row['last_name'] or '') for row in csv.DictReader(csvfile)]
+        return cls(users, nicknames)
+
+    def resolve(self, name):
+        """User ID for one staff name, or '' when no alias matches"""
+        return self.aliases.get(staff_key(name), '')
+
+    def resolve_group(self, staff_group):
+        """(staff name, user ID) for every member of a team cell, '' for unresolved IDs"""
+        members = self.groups.get(staff_group)
+        if members is None:
+            members = self.groups[staff_group] = tuple((name, self.resolve(name)) for name in split_staff_group(staff_group))
+        for name, user_id in members:
+            if not user_id:
+                self.unresolved[name] += 1
+        return members
+
+    def unresolved_report(self):
+        """[(staff name, occurrences)] for names without a user, most frequent first"""
+        return sorted(self.unresolved.items(), key=lambda item: (-item[1], item[0]))
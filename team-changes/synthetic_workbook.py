@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+Synthetic copies of the team-changes inputs, at any size, for benchmarking.
+
+Writes a workbook in the layout of "MyHome Wages Macros app.xlsm" - weekly
+sheets named like '06 Dec 24' (newest first, between 'Totals' and the
+'Parameters' / 'Active Jobs' sheets), the same header row, staff groups
+joined by '&' with the team ID in column M, additional staff on their own
+row without a team ID, lunch Yes/No and the quoted price in column H -
+plus a matching source_customer_details.xlsx and source_users.csv so the
+extractor can resolve every customer and staff member.
+
+Team rosters drift from week to week (members swap in and out) so the
+team tracker has real periods to build. The same seed always produces the
+same files.
+"""
+
+import argparse
+import csv
+import json
+import os
+import random
+import time
+from datetime import datetime, timedelta
+
+import pandas as pd
+from openpyxl import Workbook
+
+# Size presets: sheets x rows per sheet
+PRESETS = {
+    'tiny': {'sheets': 2, 'rows_per_sheet': 100},
+    'small': {'sheets': 10, 'rows_per_sheet': 500},
+    'medium': {'sheets': 50, 'rows_per_sheet': 2000},
+    'large': {'sheets': 200, 'rows_per_sheet': 5000},
+}
+
+WORKBOOK_FILE = 'synthetic_workbook.xlsx'
+CUSTOMER_DETAILS_FILE = 'source_customer_details.xlsx'
+USERS_FILE = 'source_users.csv'
+# Written next to the files so a later run can tell whether they can be reused
+PARAMS_FILE = 'synthetic_params.json'
+
+# Friday of the newest weekly sheet
+LAST_WEEK = datetime(2025, 7, 11)
+
+WORKBOOK_HEADER = ['Date', 'Team', 'Client', 'Start', 'Finish', 'Lunch Break', 'Duration (h:mm)', 'Quoted',
+                   'Hours Payable', 'Wages (Incl. Super)', 'Profit', 'Quote/Wages', 'Team ID']
+
+FIRST_NAMES = [
+    'Alice', 'Amelia', 'Aoife', 'Bronwyn', 'Charlotte', 'Chloe', 'Claire', 'Daniel', 'Ella', 'Emily',
+    'Emma', 'Georgia', 'Grace', 'Hannah', 'Harper', 'Isla', 'Jack', 'James', 'Jessica', 'Julie',
+    'Katie', 'Laura', 'Leah', 'Lisa', 'Lucy', 'Maria', 'Michelle', 'Mia', 'Nancy', 'Nicole',
+    'Olivia', 'Orla', 'Rachel', 'Rosemary', 'Ruby', 'Sally Ann', 'Sarah', 'Sophie', 'Thomas', 'Zoe',
+]
+LAST_NAMES = [
+    'Anderson', 'Black', 'Bourne', 'Brown', 'Burchill', 'Campbell', 'Clarke', 'Davies', 'Evans', 'Fraser',
+    'Grimm', 'Harris', 'Howell', 'Hughes', 'Kane', 'Kelly', 'Kennedy', 'Lee', 'Maher', 'Martin',
+    'McLaren', 'Mitchell', 'Murphy', "O'Gorman", 'Roccati', 'Rooney', 'Ryan', 'Scott', 'Shelly', 'Smith',
+    'Stratton', 'Taylor', 'Thompson', 'Walker', 'White', 'Williams', 'Wilson', 'Wood', 'Wright', 'Young',
+]
+STREETS = ['Crisp Street', 'Southey Street', 'Hampton Street', 'Commercial Road', 'New Street',
+           'Letchworth Avenue', 'Plunket Street', 'Yarra Street', 'Bay Road', 'Church Street']
+SUBURBS = ['Brighton', 'Brighton East', 'Hampton', 'Prahran', 'South Yarra', 'Toorak', 'Elsternwick', 'Sandringham']
+FREQUENCIES = ['Weekly', 'Fortnightly', '3weekly', 'Monthly', 'One off']
+
+def unique_names(count, rng):
+    """count distinct 'First Last' names, numbered once the combinations run out"""
+    combinations = [f"{first} {last}" for first in FIRST_NAMES for last in LAST_NAMES]
+    rng.shuffle(combinations)
+    names = combinations[:count]
+    round_number = 2
+    while len(names) < count:
+        names.extend(f"{name} {round_number}" for name in combinations[:count - len(names)])
+        round_number += 1
+    return names
+
+def ordinal_day(day):
+    """'6th', '21st' etc. for the reference sheets' date strings"""
+    suffix = 'th' if 11 <= day % 100 <= 13 else {1: 'st', 2: 'nd', 3: 'rd'}.get(day % 10, 'th')
+    return f"{day}{suffix}"
+
+def sheet_name(friday):
+    """Weekly sheet name like '06 Dec 24'"""
+    return f"{friday.day:02d} {friday:%b} {friday:%y}"
+
+def default_teams(rows_per_sheet):
+    """Team count giving each team about four jobs a day"""
+    return max(3, rows_per_sheet // 20)
+
+def default_customers(rows_per_sheet):
+    """Customer count giving each customer about one job a week"""
+    return max(20, rows_per_sheet)
+
+class Roster:
+    """Team memberships that drift from week to week"""
+
+    def __init__(self, teams, staff, rng):
+        self.rng = rng
+        self.teams = {}
+        self.spare = list(staff)
+        rng.shuffle(self.spare)
+        for team_id in range(1, teams + 1):
+            size = 3 if rng.random() < 0.15 else 2
+            self.teams[team_id] = [self.spare.pop() for _ in range(min(size, len(self.spare)))]
+
+    def next_week(self, churn):
+        """Swap a member in or out of about `churn` of the teams"""
+        for members in self.teams.values():
+            if self.rng.random() >= churn or not self.spare:
+                continue
+            position = self.rng.randrange(len(members))
+            incoming = self.spare.pop(self.rng.randrange(len(self.spare)))
+            self.spare.append(members[position])
+            members[position] = incoming
+
+    def team_name(self, team_id):
+        """Staff group as written in column B"""
+        return ' & '.join(self.teams[team_id])
+
+def minutes_to_time(minutes):
+    """time of day for minutes after midnight, capped just before midnight"""
+    minutes = min(minutes, 23 * 60 + 45)
+    return datetime(2000, 1, 1, minutes // 60, minutes % 60).time()
+
+def sheet_rows(friday, roster, customers, rows_per_sheet, rng):
+    """Rows of one weekly sheet: each team's jobs day by day, Monday to Friday"""
+    days = [friday - timedelta(days=offset) for offset in range(4, -1, -1)]
+    jobs_per_day = max(1, -(-rows_per_sheet // (len(roster.teams) * len(days))))
+    rows = []
+    for team_id in roster.teams:
+        team = roster.team_name(team_id)
+        for day in days:
+            start = 8 * 60 + 30
+            for _ in range(jobs_per_day):
+                if len(rows) >= rows_per_sheet:
+                    return rows
+                duration = rng.choice(range(60, 301, 15))
+                finish = start + duration
+                lunch = 'Yes' if duration >= 240 else 'No'
+                if rng.random() < 0.01:
+                    lunch = lunch.lower()
+                price = None if rng.random() < 0.03 else rng.choice(range(195, 500, 5))
+                hours = duration / 60
+                wages = round(hours * len(roster.teams[team_id]) * 67.1, 2)
+                customer = rng.choice(customers)
+                row = [day, team, customer, minutes_to_time(start), minutes_to_time(finish), lunch,
+                       minutes_to_time(duration), price, hours, wages,
+                       None if price is None else round(price - wages, 2),
+                       None if price is None or not wages else round(price / wages, 2), team_id]
+                rows.append(row)
+                # Additional staff work the job on their own row, without a team ID
+                # (no Column M cell at all, like the real workbook)
+                if roster.spare and rng.random() < 0.03 and len(rows) < rows_per_sheet:
+                    extra = rng.choice(roster.spare)
+                    rows.append([day, extra] + row[2:12])
+                start = finish + rng.choice(range(0, 25, 5))
+    return rows
+
+def write_workbook(path, sheets, rows_per_sheet, teams, customers, staff, churn, rng):
+    """Write the weekly sheets in write-only mode; return data rows written"""
+    workbook = Workbook(write_only=True)
+    totals = workbook.create_sheet('Totals')
+    totals.append(['Week', 'Quoted', 'Wages (Incl. Super)', 'Profit'])
+
+    roster = Roster(teams, staff, rng)
+    row_count = 0
+    fridays = [LAST_WEEK - timedelta(weeks=week) for week in range(sheets)]
+    # Rosters drift forwards in time, but sheets are stored newest first
+    weeks = []
+    for friday in reversed(fridays):
+        weeks.append((friday, sheet_rows(friday, roster, customers, rows_per_sheet, rng)))
+        roster.next_week(churn)
+    for friday, rows in reversed(weeks):
+        worksheet = workbook.create_sheet(sheet_name(friday))
+        worksheet.append(WORKBOOK_HEADER)
+        for row in rows:
+            worksheet.append(row)
+        row_count += len(rows)
+        totals.append([sheet_name(friday), None, None, None])
+
+    workbook.create_sheet('Parameters').append(['Parameter', 'Value'])
+    workbook.create_sheet('Active Jobs').append(['Client', 'Team'])
+    workbook.save(path)
+    return row_count
+
+def write_customer_details(path, customers, rng):
+    """source_customer_details.xlsx with the combined, all and regular-customers-wins sheets"""
+    combined = []
+    all_rows = []
+    regular = []
+    for customer_id, name in enumerate(customers, start=1):
+        address = f"{rng.randint(1, 400)} {rng.choice(STREETS)}, {rng.choice(SUBURBS)} VIC, Australia"
+        phone = rng.randint(400000000, 499999999)
+        price = rng.choice(range(195, 500, 5))
+        created = datetime(2024, 9, 1) + timedelta(days=rng.randrange(330))
+        active = rng.random() < 0.8
+        frequency = rng.choice(FREQUENCIES)
+        combined.append({
+            'id': customer_id, 'name': name, 'address': address, 'latitude': None, 'longitude': None,
+            'phone': phone, 'email': None, 'price': float(price), 'clean_frequency': frequency.capitalize(),
+            'notes': name, 'target_time_minutes': None, 'average_wage_ratio': None, 'active': active,
+            'created_at': f"{created:%y-%m-%d} 04:00:00+00", 'is_friends_family': False,
+            'friends_family_minutes': None,
+        })
+        all_rows.append({
+            'Customer': name, 'Branch': 'Brighton - Toorak', 'Primary Address': address,
+            'Suburb': address.split(', ')[1].replace(' VIC', ''), 'Phone No.': float(phone),
+            'Created Date': f"{ordinal_day(created.day)} {created:%b %y}", 'Price': price,
+        })
+        if frequency != 'One off':
+            regular.append({
+                'Schedule Created': f"{created:%a} {ordinal_day(created.day)} {created:%b}",
+                'Customer Created': f"{created:%a} {ordinal_day(created.day)} {created:%b %y}",
+                'Customer Name': name, 'Branch': 'Brighton Toorak', 'Team Allocated': None,
+                'First Job Date': None, 'Frequency': frequency, 'Amount': price, 'Phone': phone,
+                'Address': address, 'active': active,
+            })
+
+    with pd.ExcelWriter(path) as writer:
+        # combined is the first sheet, which pd.read_excel reads by default
+        pd.DataFrame(combined).to_excel(writer, sheet_name='combined', index=False)
+        pd.DataFrame(all_rows).to_excel(writer, sheet_name='all', index=False)
+        pd.DataFrame(regular).to_excel(writer, sheet_name='regular-customers-wins', index=False)
+
+def write_users(path, staff):
+    """source_users.csv with one staff user per name after the admin"""
+    with open(path, 'w', newline='', encoding='utf-8') as csvfile:
+        writer = csv.writer(csvfile, quoting=csv.QUOTE_ALL)
+        writer.writerow(['id', 'email', 'password_hash', 'first_name', 'last_name', 'phone', 'role', 'active', 'created_at'])
+        writer.writerow([1, 'admin@example.com', '', 'Admin', 'User', '', 'admin', 'true', '2025-07-14 10:59:44.545+00'])
+        for user_id, name in enumerate(staff, start=2):
+            first, last = name.rsplit(' ', 1)
+            email = f"{name.lower().replace(' ', '.').replace(chr(39), '')}@example.com"
+            writer.writerow([user_id, email, '', first, last, '', 'staff', 'true', '2025-07-14 10:59:44.545+00'])
+
+def generation_params(sheets, rows_per_sheet, teams=None, customers=None, staff=None, churn=0.1, seed=0):
+    """Complete generator parameters, with the size-dependent defaults filled in"""
+    teams = teams or default_teams(rows_per_sheet)
+    return {
+        'sheets': sheets,
+        'rows_per_sheet': rows_per_sheet,
+        'teams': teams,
+        'customers': customers or default_customers(rows_per_sheet),
+        'staff': staff or teams * 2 + max(2, teams // 2),
+        'churn': churn,
+        'seed': seed,
+    }
+
+def generate(directory, params):
+    """Write the workbook, customer details and users files into directory; return the workbook path
+
+    Files already generated there with the same params are reused.
+    """
+    os.makedirs(directory, exist_ok=True)
+    workbook_path = os.path.join(directory, WORKBOOK_FILE)
+    params_path = os.path.join(directory, PARAMS_FILE)
+    if os.path.exists(params_path) and os.path.exists(workbook_path):
+        with open(params_path, encoding='utf-8') as f:
+            if json.load(f) == params:
+                print(f"Reusing synthetic files in {directory}")
+                return workbook_path
+
+    started = time.perf_counter()
+    rng = random.Random(params['seed'])
+    staff = unique_names(params['staff'], rng)
+    customers = unique_names(params['customers'], rng)
+    row_count = write_workbook(workbook_path, params['sheets'], params['rows_per_sheet'], params['teams'],
+                               customers, staff, params['churn'], rng)
+    write_customer_details(os.path.join(directory, CUSTOMER_DETAILS_FILE), customers, rng)
+    write_users(os.path.join(directory, USERS_FILE), staff)
+    with open(params_path, 'w', encoding='utf-8') as f:
+        json.dump(params, f, indent=2)
+
+    print(f"Generated {params['sheets']} sheets, {row_count} rows, {params['teams']} teams, "
+          f"{len(customers)} customers in {directory} ({time.perf_counter() - started:.1f}s)")
+    return workbook_path
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic workbook and reference files in the macro workbook's layout")
+    parser.add_argument('directory', help="Directory to write the files into")
+    parser.add_argument('--preset', choices=PRESETS, default='small', help="Size preset (default: small)")
+    parser.add_argument('--sheets', type=int, default=None, help="Weekly sheets (overrides the preset)")
+    parser.add_argument('--rows-per-sheet', type=int, default=None, help="Rows per weekly sheet (overrides the preset)")
+    parser.add_argument('--teams', type=int, default=None, help="Teams (default: about four jobs per team per day)")
+    parser.add_argument('--customers', type=int, default=None, help="Customers (default: one per row of a sheet)")
+    parser.add_argument('--churn', type=float, default=0.1, help="Share of teams changing a member each week (default: 0.1)")
+    parser.add_argument('--seed', type=int, default=0, help="Random seed (default: 0)")
+    args = parser.parse_args()
+    preset = PRESETS[args.preset]
+    generate(args.directory, generation_params(args.sheets or preset['sheets'], args.rows_per_sheet or preset['rows_per_sheet'],
+                                               args.teams, args.customers, churn=args.churn, seed=args.seed))
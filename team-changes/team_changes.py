@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Single entry point for the team-changes scripts.
+
+    python3 team_changes.py extract [--workers N] [--incremental] [--format csv] ...
+    python3 team_changes.py track-teams [--workers N]
+    python3 team_changes.py find-missing [--suggestions N]
+    python3 team_changes.py fix-periods [--overlap-rule keep-earlier] ...
+
+A subcommand imports its script only when it runs and hands it the rest of
+the command line, so each keeps its own options (`team_changes.py extract
+--help`) and quick commands such as fix-periods never load pandas or
+openpyxl. Paths and sheet exclusions come from one config file (see
+config.py); --config picks a file other than ./team_changes.json.
+"""
+
+import argparse
+import importlib
+import json
+import os
+import sys
+
+import config
+from config import CONFIG_ENV, CONFIG_FILE
+
+# Subcommand -> (script module, summary)
+COMMANDS = {
+    'extract': ('job_extractor', "Extract jobs, time entries and customers from the workbook"),
+    'track-teams': ('team_id_tracker_dynamic', "Build the team period tracker CSV"),
+    'find-missing': ('find_missing_customers', "Report workbook customers missing from the customer details"),
+    'fix-periods': ('fix_overlaps_and_gaps', "Fix overlapping, inverted and gapped team periods"),
+    'refresh': ('refresh_all', "Run extract, track-teams and find-missing over one read of the workbook"),
+    'validate-teams': ('team_membership', "Check jobs' team members against the tracker"),
+    'bulk-load': ('bulk_load', "Bulk-load the COPY files from extract --format copy"),
+}
+
+def main(argv=None):
+    """Dispatch to a subcommand's script with the remaining arguments"""
+    parser = argparse.ArgumentParser(
+        prog='team_changes.py',
+        description="Team-changes data tools. Run '<command> --help' for a command's own options.",
+    )
+    parser.add_argument('--config', default=None, metavar='PATH',
+                        help=f"Settings file with paths and sheet exclusions (default: ${CONFIG_ENV} or ./{CONFIG_FILE} when present)")
+    subparsers = parser.add_subparsers(dest='command', required=True, metavar='command')
+    for name, (_, summary) in COMMANDS.items():
+        # The script parses its own options, including --help
+        subparsers.add_parser(name, help=summary, add_help=False)
+    subparsers.add_parser('config', help="Print the settings in effect")
+    args, script_args = parser.parse_known_args(argv)
+
+    if args.config:
+        # config was loaded from the default file on import; re-read it from the
+        # chosen one before any script module copies its settings
+        os.environ[CONFIG_ENV] = args.config
+        try:
+            importlib.reload(config)
+        except (OSError, ValueError) as e:
+            parser.error(str(e))
+
+    if args.command == 'config':
+        if script_args:
+            parser.error(f"unrecognized arguments: {' '.join(script_args)}")
+        print(json.dumps(config.CONFIG, indent=2))
+        return
+    module = importlib.import_module(COMMANDS[args.command][0])
+    module.cli(script_args, prog=f"{parser.prog} {args.command}")
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Point-in-time team membership from the periods in team_id_tracker.csv.
+
+The periods are swept once per team_id (and once per staff member) into
+sorted boundary days with the member set in force between consecutive
+boundaries, so "who was on team X on day D" is a binary search, and a whole
+column of (team_id, day) queries is one numpy searchsorted per team.
+
+Run as a script it validates every job's team_members_at_creation in
+"jobs - team_at_creation.csv" against the tracker and writes the mismatches
+to team_at_creation_validation.csv.
+"""
+
+import argparse
+import csv
+import json
+import time
+from bisect import bisect_right
+from datetime import timedelta
+
+import numpy as np
+
+from config import CONFIG
+from fix_overlaps_and_gaps import parse_date
+from job_timestamps import utc_to_local
+
+TRACKER_FILE = CONFIG['tracker_file']
+JOBS_FILE = CONFIG['team_jobs_file']
+VALIDATION_FILE = CONFIG['team_validation_file']
+
+EMPTY = frozenset()
+
+def normalize_member(name):
+    """Comparison key for a staff name: lowercase with whitespace collapsed"""
+    return ' '.join(str(name).split()).lower()
+
+def load_tracker_periods(filename=TRACKER_FILE):
+    """Read (team_id, member name, start date, end date) periods from a tracker CSV"""
+    periods = []
+    with open(filename, newline='', encoding='utf-8-sig') as csvfile:
+        for row in csv.DictReader(csvfile):
+            if not row.get('team_id') or not row.get('name') or not row.get('start_date') or not row.get('end_date'):
+                continue
+            periods.append((row['team_id'].strip(), row['name'].strip(), parse_date(row['start_date']), parse_date(row['end_date'])))
+    return periods
+
+def build_segments(intervals):
+    """Sweep (value, start, end) intervals into (boundary ordinals, value set per segment)
+
+    Segment i covers the days from boundaries[i] up to the day before
+    boundaries[i + 1]; the last segment is always empty.
+    """
+    events = {}
+    for value, start, end in intervals:
+        if end < start:
+            continue
+        events.setdefault(start.toordinal(), []).append((value, 1))
+        events.setdefault((end + timedelta(days=1)).toordinal(), []).append((value, -1))
+
+    boundaries = []
+    segments = []
+    counts = {}
+    for day in sorted(events):
+        for value, delta in events[day]:
+            counts[value] = counts.get(value, 0) + delta
+            if not counts[value]:
+                del counts[value]
+        boundaries.append(day)
+        segments.append(frozenset(counts))
+    return np.array(boundaries, dtype=np.int64), segments
+
+class TeamMembershipIndex:
+    """Who was on which team on which day, from (team_id, name, start, end) periods"""
+
+    def __init__(self, periods):
+        by_team = {}
+        by_member = {}
+        self.names = {}
+        for team_id, name, start, end in periods:
+            key = normalize_member(name)
+            self.names.setdefault(key, name)
+            by_team.setdefault(str(team_id), []).append((key, start, end))
+            by_member.setdefault(key, []).append((str(team_id), start, end))
+        self.teams = {team_id: build_segments(intervals) for team_id, intervals in by_team.items()}
+        self.members = {key: build_segments(intervals) for key, intervals in by_member.items()}
+
+    @staticmethod
+    def lookup(segments, day):
+        """Value set of the segment containing day"""
+        boundaries, values = segments
+        position = bisect_right(boundaries, day.toordinal()) - 1
+        return values[position] if position >= 0 else EMPTY
+
+    def members_on(self, team_id, day):
+        """Normalized names of the members of team_id on day"""
+        segments = self.teams.get(str(team_id))
+        return self.lookup(segments, day) if segments else EMPTY
+
+    def teams_of(self, name, day):
+        """Team IDs the staff member was on on day"""
+        segments = self.members.get(normalize_member(name))
+        return self.lookup(segments, day) if segments else EMPTY
+
+    def teams_during(self, name, start, end):
+        """Team IDs the staff member was on at any time from start to end inclusive"""
+        segments = self.members.get(normalize_member(name))
+        if not segments:
+            return EMPTY
+        boundaries, values = segments
+        first = max(bisect_right(boundaries, start.toordinal()) - 1, 0)
+        last = bisect_right(boundaries, end.toordinal())
+        return frozenset().union(*values[first:last])
+
+    def members_on_many(self, team_ids, days):
+        """Batch members_on: one member set per (team_id, day) pair
+
+        days is a sequence of dates or a datetime64[D] array. Queries are
+        grouped by team and answered with one searchsorted per team.
+        """
+        team_ids = np.asarray([str(team_id) for team_id in team_ids], dtype=object)
+        ordinals = day_ordinals(days)
+        results = [EMPTY] * len(team_ids)
+        for team_id in set(team_ids):
+            segments = self.teams.get(team_id)
+            if not segments:
+                continue
+            boundaries, values = segments
+            positions = np.flatnonzero(team_ids == team_id)
+            found = np.searchsorted(boundaries, ordinals[positions], side='right') - 1
+            for position, segment in zip(positions, found):
+                if segment >= 0:
+                    results[position] = values[segment]
+        return results
+
+# date.toordinal() of 1970-01-01, to convert datetime64[D] day numbers
+EPOCH_ORDINAL = 719163
+
+def day_ordinals(days):
+    """Proleptic Gregorian ordinals for a sequence of dates or a datetime64 array"""
+    if isinstance(days, np.ndarray) and np.issubdtype(days.dtype, np.datetime64):
+        return days.astype('datetime64[D]').astype(np.int64) + EPOCH_ORDINAL
+    return np.fromiter((day.toordinal() for day in days), dtype=np.int64, count=len(days))
+
+def job_members(value):
+    """Member names listed in a team_members_at_creation cell"""
+    if not value or not value.strip():
+        return []
+    try:
+        groups = json.loads(value)
+    except ValueError:
+        groups = [value]
+    # Entries may still hold whole teams like 'Orla Shelly & Julie Roccati'
+    return [member.strip() for group in groups for member in str(group).split('&') if member.strip()]
+
+def load_jobs(filename=JOBS_FILE):
+    """Read (job id, team_id, created_at UTC, member names) from the jobs export"""
+    jobs = []
+    with open(filename, newline='', encoding='utf-8-sig') as csvfile:
+        for row in csv.DictReader(csvfile):
+            jobs.append((row['id'], row['team_id'].strip(), row['created_at'].strip(), job_members(row['team_members_at_creation'])))
+    return jobs
+
+def job_local_days(created_at):
+    """Local business days of a column of '%Y-%m-%d %H:%M:%S+00' UTC strings"""
+    utc = np.array([value.replace('+00', '').replace(' ', 'T') for value in created_at], dtype='datetime64[s]')
+    return utc_to_local(utc).astype('datetime64[D]')
+
+def validate_jobs(index, jobs):
+    """Compare each job's members against the tracker on the job's local day; return problem rows"""
+    days = job_local_days([created_at for _, _, created_at, _ in jobs])
+    expected = index.members_on_many([team_id for _, team_id, _, _ in jobs], days)
+    problems = []
+    for (job_id, team_id, created_at, members), day, tracker_members in zip(jobs, days, expected):
+        job_keys = {normalize_member(member) for member in members}
+        if not tracker_members:
+            status = 'no-period'
+        elif job_keys == tracker_members:
+            continue
+        else:
+            status = 'mismatch'
+        problems.append({
+            'job_id': job_id,
+            'team_id': team_id,
+            'date': str(day),
+            'status': status,
+            'job_members': ' & '.join(members),
+            'tracker_members': ' & '.join(sorted(index.names[key] for key in tracker_members)),
+            'missing_from_job': ' & '.join(sorted(index.names[key] for key in tracker_members - job_keys)),
+            'not_in_tracker': ' & '.join(member for member in members if normalize_member(member) not in tracker_members),
+        })
+    return problems
+
+def main(tracker_file=TRACKER_FILE, jobs_file=JOBS_FILE, output_file=VALIDATION_FILE):
+    """Validate every job's team_members_at_creation against the tracker"""
+    index = TeamMembershipIndex(load_tracker_periods(tracker_file))
+    jobs = load_jobs(jobs_file)
+
+    started = time.perf_counter()
+    problems = validate_jobs(index, jobs)
+    elapsed = time.perf_counter() - started
+
+    with open(output_file, 'w', newline='', encoding='utf-8') as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=['job_id', 'team_id', 'date', 'status', 'job_members',
+                                                     'tracker_members', 'missing_from_job', 'not_in_tracker'])
+        writer.writeheader()
+        writer.writerows(problems)
+
+    mismatches = sum(1 for problem in problems if problem['status'] == 'mismatch')
+    print(f"Checked {len(jobs)} jobs against {tracker_file} in {elapsed * 1000:.1f} ms")
+    print(f"  {len(jobs) - len(problems)} match, {mismatches} mismatch, {len(problems) - mismatches} have no tracker period")
+    print(f"Details written to {output_file}")
+
+def cli(argv=None, prog=None):
+    """Parse the command line (argv, or sys.argv when None) and run the script"""
+    parser = argparse.ArgumentParser(prog=prog, description="Validate jobs' team_members_at_creation against the team tracker")
+    parser.add_argument('--tracker', default=TRACKER_FILE, help=f"Team periods, one member per row (default: {TRACKER_FILE})")
+    parser.add_argument('--jobs', default=JOBS_FILE, help=f"Jobs export with team_members_at_creation (default: {JOBS_FILE})")
+    parser.add_argument('--output', default=VALIDATION_FILE, help=f"Where to write the problem jobs (default: {VALIDATION_FILE})")
+    args = parser.parse_args(argv)
+    main(args.tracker, args.jobs, args.output)
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,29 @@
+"""Tests for fix_overlaps_and_gaps"""
+
+import csv
+
+from fix_overlaps_and_gaps import fix_overlaps_and_gaps, load_periods
+
+def write_table(path, rows):
+    """Write a member-per-row team table with an original_team label column"""
+    with open(path, 'w', newline='', encoding='utf-8') as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(['team_id', 'name', 'original_team', 'start_date', 'end_date'])
+        writer.writerows(rows)
+
+def test_same_dates_different_labels_are_separate_periods(tmp_path):
+    path = tmp_path / 'periods.csv'
+    write_table(path, [
+        ['1', 'A', 'A & B', '01/12/2024', '05/12/2024'],
+        ['1', 'B', 'A & B', '01/12/2024', '05/12/2024'],
+        ['1', 'A', 'A & C', '01/12/2024', '05/12/2024'],
+        ['1', 'C', 'A & C', '01/12/2024', '05/12/2024'],
+    ])
+
+    _, periods = load_periods(path)
+    assert sorted(period['team'] for period in periods) == ['A & B', 'A & C']
+    assert all(len(period['rows']) == 2 for period in periods)
+
+    fixed, changes = fix_overlaps_and_gaps(periods)
+    assert [period['team'] for period in fixed] == ['A & B']
+    assert [(change['team'], change['action']) for change in changes] == [('A & C', 'overlap-dropped')]
@@ -0,0 +1,96 @@
+"""Tests for job_extractor, on small synthetic workbooks"""
+
+import csv
+import json
+from types import SimpleNamespace
+
+import pytest
+from openpyxl import load_workbook
+
+import job_extractor
+from synthetic_workbook import WORKBOOK_FILE, generate, generation_params
+from workbook_extraction import EXCLUDED_SHEETS, iter_workbook_rows
+
+@pytest.fixture
+def workbook_dir(tmp_path, monkeypatch):
+    """Three weekly sheets of synthetic data, with the scripts running in their directory"""
+    generate(tmp_path, generation_params(3, 40))
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(job_extractor, 'WORKBOOK_PATH', WORKBOOK_FILE)
+    return tmp_path
+
+def read_manifest(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+def read_sheet(path):
+    with open(path, newline='', encoding='utf-8') as f:
+        return list(csv.DictReader(f))
+
+def run_incremental(reference):
+    return job_extractor.run_incremental(reference, manifest_path='manifest.json', output_file='delta.xlsx',
+                                         output_format='csv')
+
+def test_incremental_keeps_ids_and_lists_removed_sheet(workbook_dir):
+    reference = job_extractor.load_reference_data()
+    assert run_incremental(reference)
+    first = read_manifest('manifest.json')
+    assert sorted(first['sheets']) == ['04 Jul 25', '11 Jul 25', '27 Jun 25']
+    assert not run_incremental(reference)
+
+    # Drop the newest sheet and change one price on another
+    dropped, edited = '11 Jul 25', '04 Jul 25'
+    workbook = load_workbook(WORKBOOK_FILE)
+    del workbook[dropped]
+    workbook[edited]['H2'] = (workbook[edited]['H2'].value or 0) + 5
+    workbook.save(WORKBOOK_FILE)
+
+    assert run_incremental(reference)
+    second = read_manifest('manifest.json')
+    assert dropped not in second['sheets']
+    assert second['sheets'][edited]['jobs'] == first['sheets'][edited]['jobs']
+    assert second['sheets'][edited]['time_entries'] == first['sheets'][edited]['time_entries']
+    assert second['max_job_id'] == first['max_job_id']
+
+    delta_jobs = read_sheet('delta_jobs.csv')
+    assert sorted(int(job['id']) for job in delta_jobs) == sorted(first['sheets'][edited]['jobs'].values())
+    removed = read_sheet('delta_removed.csv')
+    assert sorted(int(row['id']) for row in removed if row['table'] == 'jobs') == \
+        sorted(first['sheets'][dropped]['jobs'].values())
+    assert sorted(int(row['id']) for row in removed if row['table'] == 'time_entries') == \
+        sorted(first['sheets'][dropped]['time_entries'].values())
+
+def job(job_id, created_at, customer_id=1, team_id='1'):
+    return SimpleNamespace(id=job_id, created_at=created_at, customer_id=customer_id, team_id=team_id)
+
+def time_entry(job_id, clock_in_time):
+    return SimpleNamespace(id=None, job_id=job_id, clock_in_time=clock_in_time)
+
+def test_assign_ids_orders_and_renumbers():
+    # Two sheets' runs in extraction order, the newer sheet first; jobs 2 and 4 tie
+    jobs = [job(1, '2025-07-07 22:00:00+00'), job(2, '2025-07-08 22:00:00+00', 2),
+            job(3, '2025-06-30 22:00:00+00', team_id='10'), job(4, '2025-07-08 22:00:00+00', 2), job(5, '2025-06-30 22:00:00+00')]
+    time_entries = [time_entry(1, jobs[0].created_at), time_entry(2, jobs[1].created_at), time_entry(4, jobs[3].created_at),
+                    time_entry(3, jobs[2].created_at), time_entry(5, jobs[4].created_at), time_entry(5, jobs[4].created_at)]
+    job_of = {id(entry): jobs[entry.job_id - 1] for entry in time_entries}
+    originals = list(jobs)
+
+    job_extractor.assign_ids(jobs, time_entries)
+    assert jobs == [originals[4], originals[2], originals[0], originals[1], originals[3]]
+    assert [job.id for job in jobs] == [1, 2, 3, 4, 5]
+    assert [entry.id for entry in time_entries] == [1, 2, 3, 4, 5, 6]
+    assert all(entry.job_id == job_of[id(entry)].id for entry in time_entries)
+    assert [entry.clock_in_time for entry in time_entries] == sorted(entry.clock_in_time for entry in time_entries)
+
+def test_assign_ids_on_a_synthetic_workbook(workbook_dir):
+    all_job_data, all_time_entries = job_extractor.extract_jobs(iter_workbook_rows(WORKBOOK_FILE, EXCLUDED_SHEETS),
+                                                                job_extractor.load_reference_data())
+    jobs_by_id = {job.id: job for job in all_job_data}
+    job_of = {id(entry): jobs_by_id[entry.job_id] for entry in all_time_entries}
+    expected_jobs = sorted(all_job_data, key=job_extractor.job_sort_key)
+
+    job_extractor.assign_ids(all_job_data, all_time_entries)
+    assert all_job_data == expected_jobs
+    assert [job.id for job in all_job_data] == list(range(1, len(all_job_data) + 1))
+    assert [entry.id for entry in all_time_entries] == list(range(1, len(all_time_entries) + 1))
+    assert all(entry.job_id == job_of[id(entry)].id for entry in all_time_entries)
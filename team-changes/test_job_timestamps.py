@@ -0,0 +1,44 @@
+"""Tests for job_timestamps around the Melbourne DST transitions"""
+
+from datetime import datetime, time, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+import numpy as np
+
+from job_timestamps import BUSINESS_TIMEZONE, build_job_timestamps, local_to_utc, utc_to_local
+
+ZONE = ZoneInfo(BUSINESS_TIMEZONE)
+
+# 2025: DST ends at 3am on 6 April and starts at 2am on 5 October
+TRANSITION_DAYS = [datetime(2025, 4, 5), datetime(2025, 10, 4)]
+
+def quarter_hours(first_day):
+    """Naive times every 15 minutes over the three days from first_day"""
+    return [first_day + timedelta(minutes=15 * step) for step in range(3 * 24 * 4)]
+
+def test_local_to_utc_matches_zoneinfo_across_transitions():
+    for first_day in TRANSITION_DAYS:
+        local = quarter_hours(first_day)
+        expected = [wall.replace(tzinfo=ZONE).astimezone(timezone.utc).replace(tzinfo=None) for wall in local]
+        converted = local_to_utc(np.array(local, dtype='datetime64[s]'))
+        assert converted.tolist() == expected
+
+def test_utc_to_local_matches_zoneinfo_across_transitions():
+    for first_day in TRANSITION_DAYS:
+        utc = quarter_hours(first_day)
+        expected = [instant.replace(tzinfo=timezone.utc).astimezone(ZONE).replace(tzinfo=None) for instant in utc]
+        converted = utc_to_local(np.array(utc, dtype='datetime64[s]'))
+        assert converted.tolist() == expected
+
+def test_job_timestamps_either_side_of_transitions():
+    dates = [datetime(2025, 4, 5), datetime(2025, 4, 7), datetime(2025, 10, 4), datetime(2025, 10, 6)]
+    created_at, clock_out = build_job_timestamps(dates, [time(9)] * 4, [time(13)] * 4, ['Yes', 'No', 'yes', 'maybe'])
+    assert created_at.tolist() == ['2025-04-04 22:00:00+00', '2025-04-06 23:00:00+00',
+                                   '2025-10-03 23:00:00+00', '2025-10-05 22:00:00+00']
+    assert clock_out.tolist() == ['2025-04-05 01:30:00+00', '2025-04-07 03:00:00+00', '2025-10-04 02:30:00+00', None]
+
+def test_empty_and_missing_values_stay_nat():
+    values = np.array(['NaT', '2025-04-06T02:30:00'], dtype='datetime64[s]')
+    assert np.isnat(local_to_utc(values)[0])
+    assert np.isnat(utc_to_local(values)[0])
+    assert len(local_to_utc(np.array([], dtype='datetime64[s]'))) == 0
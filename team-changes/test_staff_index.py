@@ -0,0 +1,50 @@
+"""Tests for staff_index"""
+
+import pytest
+
+from staff_index import StaffIndex
+
+USERS = [
+    ('1', 'Tia', 'Nguyen'),
+    ('2', 'Aoife', 'Byrne'),
+    ('3', 'Aoife', 'Walsh'),
+    ('4', 'Orla', 'Shelly'),
+    ('5', 'Julie', 'Roccati'),
+]
+
+def test_full_and_unique_first_names():
+    index = StaffIndex(USERS)
+    assert index.resolve('Tia Nguyen') == '1'
+    assert index.resolve('  aoife   WALSH ') == '3'
+    assert index.resolve('tia') == '1'
+    # Shared first names stay ambiguous
+    assert index.resolve('Aoife') == ''
+    assert index.resolve('Someone Else') == ''
+
+def test_first_name_never_shadows_a_full_name():
+    index = StaffIndex(USERS + [('6', 'Orla', ''), ('7', 'Julie', 'Roccati')])
+    # 'orla' is user 6's full name, and a repeated full name resolves to the last user
+    assert index.resolve('Orla') == '6'
+    assert index.resolve('Julie Roccati') == '7'
+
+def test_nicknames():
+    index = StaffIndex(USERS, {'Jules': 'julie roccati', 'AB': 'Aoife Byrne'})
+    assert index.resolve('jules') == '5'
+    assert index.resolve('AB') == '2'
+    with pytest.raises(ValueError, match='Nobody Here'):
+        StaffIndex(USERS, {'Nobody': 'Nobody Here'})
+
+def test_resolve_group_counts_unresolved_names():
+    index = StaffIndex(USERS)
+    assert index.resolve_group('Orla Shelly & Julie Roccati') == (('Orla Shelly', '4'), ('Julie Roccati', '5'))
+    for _ in range(2):
+        assert index.resolve_group('Tia & Aoife & Sam') == (('Tia', '1'), ('Aoife', ''), ('Sam', ''))
+    index.resolve_group('Sam')
+    assert index.unresolved_report() == [('Sam', 3), ('Aoife', 2)]
+
+def test_from_csv(tmp_path):
+    path = tmp_path / 'users.csv'
+    path.write_text('id,first_name,last_name\n 8 ,Ana,Lima\n9,Ben,\n', encoding='utf-8-sig')
+    index = StaffIndex.from_csv(path)
+    assert index.resolve('Ana Lima') == '8'
+    assert index.resolve('Ben') == '9'
@@ -0,0 +1,53 @@
+"""Tests for team_membership"""
+
+from datetime import date, timedelta
+
+import numpy as np
+
+from team_membership import TeamMembershipIndex, validate_jobs
+
+PERIODS = [
+    ('1', 'Alice Smith', date(2025, 3, 3), date(2025, 3, 9)),
+    ('1', 'Bob  Jones', date(2025, 3, 3), date(2025, 3, 16)),
+    ('1', 'Carla Ruiz', date(2025, 3, 10), date(2025, 3, 16)),
+    ('2', 'alice smith', date(2025, 3, 8), date(2025, 3, 20)),
+]
+
+def test_members_on_period_boundaries():
+    index = TeamMembershipIndex(PERIODS)
+    assert index.members_on(1, date(2025, 3, 2)) == set()
+    assert index.members_on('1', date(2025, 3, 3)) == {'alice smith', 'bob jones'}
+    assert index.members_on('1', date(2025, 3, 9)) == {'alice smith', 'bob jones'}
+    assert index.members_on('1', date(2025, 3, 10)) == {'bob jones', 'carla ruiz'}
+    assert index.members_on('1', date(2025, 3, 17)) == set()
+    assert index.members_on('3', date(2025, 3, 10)) == set()
+
+def test_teams_of_a_member():
+    index = TeamMembershipIndex(PERIODS)
+    assert index.teams_of('Alice  SMITH', date(2025, 3, 8)) == {'1', '2'}
+    assert index.teams_of('Alice Smith', date(2025, 3, 12)) == {'2'}
+    assert index.teams_during('Alice Smith', date(2025, 3, 1), date(2025, 3, 4)) == {'1'}
+    assert index.teams_during('Alice Smith', date(2025, 3, 21), date(2025, 3, 30)) == set()
+    assert index.teams_of('Nobody', date(2025, 3, 8)) == set()
+
+def test_members_on_many_matches_members_on():
+    index = TeamMembershipIndex(PERIODS)
+    days = [date(2025, 3, 1) + timedelta(days=offset) for offset in range(25)]
+    queries = [(team_id, day) for day in days for team_id in ['1', 2, '3']]
+    expected = [index.members_on(team_id, day) for team_id, day in queries]
+    assert index.members_on_many([team_id for team_id, _ in queries], [day for _, day in queries]) == expected
+    day_array = np.array([day for _, day in queries], dtype='datetime64[D]')
+    assert index.members_on_many([team_id for team_id, _ in queries], day_array) == expected
+
+def test_validate_jobs_uses_the_local_day():
+    index = TeamMembershipIndex(PERIODS)
+    jobs = [
+        # 9 March 2025 23:30 UTC is 10:30 on the 10th in Melbourne, when Carla had replaced Alice
+        ('10', '1', '2025-03-09 23:30:00+00', ['Bob Jones', 'Carla Ruiz']),
+        ('11', '1', '2025-03-09 23:30:00+00', ['Alice Smith', 'Bob Jones']),
+        ('12', '2', '2025-03-30 00:00:00+00', ['Alice Smith']),
+    ]
+    problems = validate_jobs(index, jobs)
+    assert [(problem['job_id'], problem['status']) for problem in problems] == [('11', 'mismatch'), ('12', 'no-period')]
+    assert problems[0]['missing_from_job'] == 'Carla Ruiz'
+    assert problems[0]['not_in_tracker'] == 'Alice Smith'
@@ -0,0 +1,48 @@
+"""Tests for the Arrow row cache in workbook_cache"""
+
+from collections import namedtuple
+from datetime import date, datetime, time, timedelta
+
+import pytest
+
+pytest.importorskip('pyarrow')
+
+from synthetic_workbook import generate, generation_params
+from workbook_cache import CacheError, load_sheet_rows, save_sheet_rows
+from workbook_extraction import iter_cached_workbook_rows, iter_workbook_rows
+
+Row = namedtuple('Row', ['text', 'mixed', 'blank', 'when', 'flag'])
+
+ROWS = [
+    Row('Smith', time(8, 30), None, datetime(2025, 4, 6, 2, 30), True),
+    Row('', 'n/a', None, date(2025, 10, 5), 1),
+    Row(None, 4.5, None, timedelta(hours=3, minutes=15), None),
+    Row('Jones & Co', None, None, None, 0.0),
+    Row('Ngô', 12, None, time(17, 5, 59, 123456), False),
+]
+
+def typed(rows):
+    """Rows with each value paired with its type, so True and 1 compare unequal"""
+    return [[(type(value), value) for value in row] for row in rows]
+
+def test_round_trip_keeps_values_and_types(tmp_path):
+    checksum = save_sheet_rows(tmp_path, 'key', Row._fields, ROWS)
+    loaded = load_sheet_rows(tmp_path, 'key', Row._fields, checksum, Row)
+    assert all(isinstance(row, Row) for row in loaded)
+    assert typed(loaded) == typed(ROWS)
+
+def test_corrupt_entry_raises_cache_error(tmp_path):
+    checksum = save_sheet_rows(tmp_path, 'key', Row._fields, ROWS)
+    with pytest.raises(CacheError):
+        load_sheet_rows(tmp_path, 'key', Row._fields, checksum[::-1], Row)
+    with pytest.raises(CacheError):
+        load_sheet_rows(tmp_path, 'missing', Row._fields, checksum, Row)
+
+def test_cached_workbook_rows_match_a_fresh_parse(tmp_path):
+    workbook_path = generate(tmp_path / 'inputs', generation_params(2, 60))
+    cache_dir = tmp_path / 'cache'
+    parsed = list(iter_workbook_rows(workbook_path, []))
+    assert typed(iter_cached_workbook_rows(workbook_path, [], cache_dir)) == typed(parsed)
+    # Second read comes from the cache entries
+    assert (cache_dir / 'manifest.json').exists()
+    assert typed(iter_cached_workbook_rows(workbook_path, [], cache_dir)) == typed(parsed)
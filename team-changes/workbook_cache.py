@@ -0,0 +1,272 @@
+"""
+Content-addressed sidecar cache of rows extracted from the macro workbook.
+
+The cache lives in a directory next to the workbook:
+
+    .workbook_cache/
+        manifest.json          file hash, sheet order and per-sheet keys
+        sheets/<key>.arrow     one sheet's rows as an Arrow IPC file
+
+Each sheet is keyed by a hash of its name and XML with shared strings
+resolved, plus the workbook-wide parts that change how cells are read
+(styles and the 1904 date flag). Adding a new weekly sheet therefore only re-parses that
+sheet, and an unchanged workbook is answered from the manifest alone.
+
+Entries are plain Arrow columns, so loading one never executes anything
+stored in the cache. A column whose cells mix Python types (a time cell
+next to a text one) is stored as a dense union with one child per type,
+so every value comes back with the type openpyxl gave it. The cache needs
+pyarrow; without it the workbook is simply parsed on every run.
+"""
+
+import hashlib
+import json
+import os
+import posixpath
+import re
+import zipfile
+import xml.etree.ElementTree as ET
+from datetime import date, datetime, time, timedelta
+
+from config import CONFIG
+
+# Bump when the cached row layout or row parsing changes so old entries are rebuilt
+CACHE_VERSION = 3
+
+# Sidecar cache directory (see config)
+CACHE_DIR = CONFIG['cache_dir']
+
+MAIN_NS = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+REL_NS = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+PACKAGE_REL_NS = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+
+# Shared-string cells: <c r="C2" t="s"><v>12</v></c>
+SHARED_STRING_CELL = re.compile(rb'(<(?:\w+:)?c\b[^>]*\bt="s"[^>]*>\s*<(?:\w+:)?v>)(\d+)(</(?:\w+:)?v>)')
+
+# Arrow type name for each Python type a cell value can have
+CELL_TYPES = {
+    bool: 'bool_',
+    int: 'int64',
+    float: 'float64',
+    str: 'string',
+    datetime: 'timestamp',
+    date: 'date32',
+    time: 'time64',
+    timedelta: 'duration',
+}
+
+class CacheError(Exception):
+    """Raised when a cache entry is missing, stale or corrupt"""
+
+def arrow_available():
+    """True when pyarrow, which the sheet entries are stored with, can be imported"""
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+def arrow_type(cell_type):
+    """Arrow type storing values of a Python cell type"""
+    import pyarrow as pa
+    name = CELL_TYPES.get(cell_type)
+    if name is None:
+        raise CacheError(f"cannot cache cell values of type {cell_type.__name__}")
+    if name in ('timestamp', 'time64', 'duration'):
+        return getattr(pa, name)('us')
+    return getattr(pa, name)()
+
+def encode_column(values):
+    """Arrow array for one column's values, a dense union when they mix types"""
+    import pyarrow as pa
+    cell_types = sorted({type(value) for value in values if value is not None}, key=lambda cell_type: cell_type.__name__)
+    if len(cell_types) <= 1:
+        return pa.array(values, type=arrow_type(cell_types[0]) if cell_types else pa.null())
+
+    codes = {cell_type: code for code, cell_type in enumerate(cell_types)}
+    children = [[] for _ in cell_types]
+    type_ids = []
+    offsets = []
+    for value in values:
+        # Blank cells go in the first child as nulls
+        code = 0 if value is None else codes[type(value)]
+        type_ids.append(code)
+        offsets.append(len(children[code]))
+        children[code].append(value)
+    return pa.UnionArray.from_dense(
+        pa.array(type_ids, type=pa.int8()),
+        pa.array(offsets, type=pa.int32()),
+        [pa.array(child, type=arrow_type(cell_type)) for child, cell_type in zip(children, cell_types)],
+        [cell_type.__name__ for cell_type in cell_types],
+    )
+
+def hash_file(file_path, chunk_size=1 << 20):
+    """Return the sha256 hex digest of a file's contents"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def read_shared_strings(archive):
+    """Return the workbook's shared string table as a list of str"""
+    try:
+        data = archive.read('xl/sharedStrings.xml')
+    except KeyError:
+        return []
+    strings = []
+    for si in ET.fromstring(data).iter(f'{MAIN_NS}si'):
+        strings.append(''.join(t.text or '' for t in si.iter(f'{MAIN_NS}t')))
+    return strings
+
+def sheet_paths(archive):
+    """Map each sheet name to its worksheet XML path inside the archive"""
+    workbook_xml = ET.fromstring(archive.read('xl/workbook.xml'))
+    rels_xml = ET.fromstring(archive.read('xl/_rels/workbook.xml.rels'))
+    targets = {}
+    for rel in rels_xml.iter(f'{PACKAGE_REL_NS}Relationship'):
+        target = rel.get('Target')
+        if target.startswith('/'):
+            target = target.lstrip('/')
+        else:
+            target = posixpath.normpath(posixpath.join('xl', target))
+        targets[rel.get('Id')] = target
+    paths = {}
+    for sheet in workbook_xml.iter(f'{MAIN_NS}sheet'):
+        paths[sheet.get('name')] = targets[sheet.get(f'{REL_NS}id')]
+    return paths
+
+def read_sheet_names(file_path):
+    """Return the workbook's sheet names in tab order without loading any cells"""
+    with zipfile.ZipFile(file_path) as archive:
+        return list(sheet_paths(archive))
+
+def sheet_content_hashes(file_path):
+    """Return {sheet_name: key} hashing each sheet's cells and the parts that affect them"""
+    with zipfile.ZipFile(file_path) as archive:
+        shared_strings = read_shared_strings(archive)
+        workbook_xml = archive.read('xl/workbook.xml')
+        date1904 = b'date1904="1"' in workbook_xml or b'date1904="true"' in workbook_xml
+        try:
+            styles = archive.read('xl/styles.xml')
+        except KeyError:
+            styles = b''
+        common = hashlib.sha256()
+        common.update(f'v{CACHE_VERSION}:{date1904}:'.encode())
+        common.update(hashlib.sha256(styles).digest())
+        common = common.digest()
+
+        def resolve(match):
+            index = int(match.group(2))
+            value = shared_strings[index] if index < len(shared_strings) else ''
+            return match.group(1) + value.encode('utf-8') + match.group(3)
+
+        hashes = {}
+        for sheet_name, path in sheet_paths(archive).items():
+            # Resolve shared-string indices so renumbering the string table
+            # does not invalidate sheets whose text did not change
+            sheet_xml = SHARED_STRING_CELL.sub(resolve, archive.read(path))
+            digest = hashlib.sha256(common)
+            digest.update(sheet_name.encode('utf-8') + b'\0')
+            digest.update(sheet_xml)
+            hashes[sheet_name] = digest.hexdigest()
+        return hashes
+
+def read_manifest(cache_dir):
+    """Return the cache manifest, or None if it is missing or unreadable"""
+    try:
+        with open(os.path.join(cache_dir, 'manifest.json'), encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(manifest, dict) or manifest.get('version') != CACHE_VERSION:
+        return None
+    if not all(isinstance(manifest.get(field), expected) for field, expected in (('file_hash', str), ('sheet_keys', dict), ('entries', dict))):
+        return None
+    return manifest
+
+def write_manifest(cache_dir, manifest):
+    """Atomically replace the cache manifest"""
+    os.makedirs(cache_dir, exist_ok=True)
+    path = os.path.join(cache_dir, 'manifest.json')
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, path)
+
+def decode_column(column):
+    """Python values of an Arrow array written by encode_column"""
+    import pyarrow as pa
+    if pa.types.is_union(column.type):
+        children = [decode_column(column.field(code)) for code in range(column.type.num_fields)]
+        return [children[code][offset] for code, offset in zip(column.type_codes.to_pylist(), column.offsets.to_pylist())]
+    if pa.types.is_temporal(column.type):
+        # A sheet repeats a few dates and times; convert each distinct one once
+        encoded = column.dictionary_encode()
+        distinct = encoded.dictionary.to_pylist()
+        return [None if index is None else distinct[index] for index in encoded.indices.to_pylist()]
+    return column.to_pylist()
+
+def sheet_entry_path(cache_dir, key):
+    """Return the path of a sheet's cache entry"""
+    return os.path.join(cache_dir, 'sheets', f'{key}.arrow')
+
+def write_arrow_file(path, table):
+    """Atomically write a pyarrow Table as an Arrow IPC file and return its checksum"""
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+    sink = pa.BufferOutputStream()
+    with ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    payload = sink.getvalue().to_pybytes()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(payload)
+    os.replace(tmp_path, path)
+    return hashlib.sha256(payload).hexdigest()
+
+def read_arrow_file(path, checksum):
+    """Read an Arrow IPC file written by write_arrow_file, raising CacheError if it is unusable"""
+    try:
+        with open(path, 'rb') as f:
+            payload = f.read()
+    except OSError as e:
+        raise CacheError(f"missing entry {os.path.basename(path)}: {e}")
+    if hashlib.sha256(payload).hexdigest() != checksum:
+        raise CacheError(f"checksum mismatch for entry {os.path.basename(path)}")
+    try:
+        import pyarrow as pa
+        import pyarrow.ipc as ipc
+        return ipc.open_file(pa.BufferReader(payload)).read_all()
+    except Exception as e:
+        raise CacheError(f"unreadable entry {os.path.basename(path)}: {e}")
+
+def save_sheet_rows(cache_dir, key, fields, rows):
+    """Store a sheet's rows as an Arrow IPC file and return the entry's checksum"""
+    import pyarrow as pa
+    try:
+        table = pa.table({field: encode_column([row[i] for row in rows]) for i, field in enumerate(fields)})
+    except (pa.ArrowException, OverflowError) as e:
+        raise CacheError(f"cannot store entry {key}: {e}")
+    return write_arrow_file(sheet_entry_path(cache_dir, key), table)
+
+def load_sheet_rows(cache_dir, key, fields, checksum, row_type):
+    """Load a cached sheet as a list of row_type, raising CacheError if it is unusable"""
+    table = read_arrow_file(sheet_entry_path(cache_dir, key), checksum)
+    try:
+        columns = [decode_column(table.column(field).combine_chunks()) for field in fields]
+    except Exception as e:
+        raise CacheError(f"unreadable entry {key}: {e}")
+    return [row_type(*values) for values in zip(*columns)]
+
+def prune_entries(cache_dir, live_keys):
+    """Delete sheet entries that are no longer referenced by the manifest"""
+    sheets_dir = os.path.join(cache_dir, 'sheets')
+    if not os.path.isdir(sheets_dir):
+        return
+    for file_name in os.listdir(sheets_dir):
+        key, ext = os.path.splitext(file_name)
+        # .pkl entries are left over from the pickle-based cache format
+        if ext == '.pkl' or (ext == '.arrow' and key not in live_keys):
+            os.remove(os.path.join(sheets_dir, file_name))
@@ -0,0 +1,284 @@
+"""
+Shared extraction layer for the MyHome Wages macro workbook.
+
+Reads each weekly sheet once and yields normalized rows that the job
+extractor, the team-period tracker and the missing-customer report all
+consume, so a full refresh parses the workbook a single time.
+
+A read prints one summary line; the sheet names and a line per sheet are
+debug messages, shown on the console with --verbose.
+"""
+
+import argparse
+import hashlib
+import logging
+import os
+import sys
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from itertools import groupby
+from operator import attrgetter
+
+from config import CONFIG
+from date_parsing import WORKBOOK_DATE_FORMATS, DateParser
+from workbook_cache import (
+    CACHE_DIR, CACHE_VERSION, CacheError, arrow_available, hash_file, load_sheet_rows, prune_entries,
+    read_manifest, read_sheet_names, save_sheet_rows, sheet_content_hashes, write_manifest,
+)
+
+# Per-sheet progress; see set_verbose
+log = logging.getLogger(__name__)
+
+# Master workbook shared by all the team-changes scripts (see config)
+WORKBOOK_PATH = CONFIG['workbook']
+
+# Sheets to exclude
+EXCLUDED_SHEETS = CONFIG['excluded_sheets']
+
+# One usable spreadsheet row. Text fields are stripped strings ('' when
+# blank), date is the parsed date (None when unparsable) and the time,
+# lunch and price cells are passed through as read from the sheet.
+WorkbookRow = namedtuple('WorkbookRow', [
+    'sheet',        # Sheet name
+    'row_number',   # 1-based spreadsheet row number
+    'date',         # Column A - Date
+    'team',         # Column B - Team members
+    'customer',     # Column C - Client/Customer name
+    'start_time',   # Column D - Start time
+    'finish_time',  # Column E - Finish time
+    'lunch_break',  # Column F - Lunch Break
+    'price',        # Column H - Quoted
+    'team_id',      # Column M - Team ID
+])
+
+def clean_text(value):
+    """Return a cell value as a stripped string, or '' when the cell is blank"""
+    if not value:
+        return ''
+    return str(value).strip()
+
+def open_workbook(file_path):
+    """Open the workbook read-only with cached formula values
+
+    openpyxl is imported here rather than at module level, so runs served
+    entirely from the row cache never load it.
+    """
+    import openpyxl
+    return openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+
+def iter_sheet_rows(sheet, sheet_name):
+    """Yield a WorkbookRow for every row of a sheet with the full set of columns"""
+    # Dates are datetime cells or text in one format per sheet; parse each distinct text once
+    parse_date = DateParser(WORKBOOK_DATE_FORMATS)
+    for row_number, row in enumerate(sheet.iter_rows(min_row=2, values_only=True), start=2):
+        # Read-only sheets can end a row at its last non-empty cell; pad it out to Column M
+        if len(row) < 13:
+            row = tuple(row) + (None,) * (13 - len(row))
+
+        yield WorkbookRow(
+            sheet=sheet_name,
+            row_number=row_number,
+            date=parse_date(row[0]),
+            team=clean_text(row[1]),
+            customer=clean_text(row[2]),
+            start_time=row[3],
+            finish_time=row[4],
+            lunch_break=row[5],
+            price=row[7],
+            team_id=clean_text(row[12]),
+        )
+
+# Workbook opened once per pool worker by open_worker_workbook
+_worker_workbook = None
+
+def open_worker_workbook(file_path):
+    """Process-pool initializer: open the workbook read-only for this worker"""
+    global _worker_workbook
+    _worker_workbook = open_workbook(file_path)
+
+def parse_sheet_in_worker(sheet_name):
+    """Parse one sheet in a pool worker, returning plain tuples for cheap pickling"""
+    return [tuple(row) for row in iter_sheet_rows(_worker_workbook[sheet_name], sheet_name)]
+
+def parse_sheets(file_path, sheet_names, workers=1):
+    """Yield (sheet_name, rows) for each sheet in order, using a process pool when workers > 1
+
+    Results always come back in the order of sheet_names, so the merged row
+    stream is identical whatever the worker count.
+    """
+    sheet_names = list(sheet_names)
+    if workers > 1 and len(sheet_names) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(sheet_names)),
+                                 initializer=open_worker_workbook, initargs=(file_path,)) as pool:
+            for sheet_name, rows in zip(sheet_names, pool.map(parse_sheet_in_worker, sheet_names)):
+                yield sheet_name, [WorkbookRow._make(row) for row in rows]
+        return
+
+    # Read-only mode parses each sheet lazily as it is iterated
+    workbook = open_workbook(file_path)
+    try:
+        for sheet_name in sheet_names:
+            yield sheet_name, list(iter_sheet_rows(workbook[sheet_name], sheet_name))
+    finally:
+        workbook.close()
+
+def add_verbose_argument(parser):
+    """Add the --verbose option to a script's argument parser"""
+    parser.add_argument('--verbose', action='store_true', help="List every workbook sheet as it is parsed or loaded from the cache")
+
+def set_verbose(verbose):
+    """Show the per-sheet lines on the console (or hide them again)"""
+    if verbose and not log.handlers:
+        handler = logging.StreamHandler(sys.stdout)
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        log.addHandler(handler)
+    log.setLevel(logging.DEBUG if verbose else logging.NOTSET)
+
+def log_sheet_names(sheet_names):
+    """Log the workbook's sheet names before processing starts"""
+    log.debug("All sheet names:")
+    for sheet_name in sheet_names:
+        log.debug(f"  '{sheet_name}'")
+
+def iter_workbook_rows(file_path=WORKBOOK_PATH, excluded_sheets=EXCLUDED_SHEETS, workers=1):
+    """Stream normalized rows from every non-excluded sheet, one sheet at a time"""
+    sheet_names = read_sheet_names(file_path)
+    log_sheet_names(sheet_names)
+
+    included = [sheet_name for sheet_name in sheet_names if sheet_name not in excluded_sheets]
+    if workers > 1:
+        for sheet_name, rows in parse_sheets(file_path, included, workers):
+            log.debug(f"Processing sheet: {sheet_name}")
+            yield from rows
+    else:
+        # Serial path streams straight from openpyxl and never holds more than
+        # the current row
+        workbook = open_workbook(file_path)
+        try:
+            for sheet_name in included:
+                log.debug(f"Processing sheet: {sheet_name}")
+                yield from iter_sheet_rows(workbook[sheet_name], sheet_name)
+        finally:
+            workbook.close()
+    print(f"Workbook: {len(included)} sheets parsed")
+
+def iter_cached_workbook_rows(file_path=WORKBOOK_PATH, excluded_sheets=EXCLUDED_SHEETS, cache_dir=CACHE_DIR, workers=1):
+    """Stream normalized rows, re-parsing only sheets whose content changed since the last run"""
+    if cache_dir is None or not arrow_available():
+        yield from iter_workbook_rows(file_path, excluded_sheets, workers)
+        return
+
+    file_hash = hash_file(file_path)
+    manifest = read_manifest(cache_dir)
+    if manifest and manifest['file_hash'] == file_hash:
+        # Unchanged workbook: the manifest already knows every sheet's key
+        sheet_keys = manifest['sheet_keys']
+    else:
+        sheet_keys = sheet_content_hashes(file_path)
+    cached_entries = manifest['entries'] if manifest else {}
+
+    log_sheet_names(sheet_keys)
+
+    included = [sheet_name for sheet_name in sheet_keys if sheet_name not in excluded_sheets]
+    # Sheets without a cache entry are parsed as one batch (across a process
+    # pool when workers > 1); entries found corrupt on load are re-parsed inline
+    stale = [sheet_name for sheet_name in included if sheet_keys[sheet_name] not in cached_entries]
+    parsed = parse_sheets(file_path, stale, workers)
+
+    entries = {}
+    loaded_sheets = 0
+    parsed_sheets = 0
+    for sheet_name in included:
+        key = sheet_keys[sheet_name]
+        entry = cached_entries.get(key)
+        if entry is None:
+            _, rows = next(parsed)
+        else:
+            try:
+                rows = load_sheet_rows(cache_dir, key, WorkbookRow._fields, entry['checksum'], WorkbookRow)
+                log.debug(f"Loaded sheet from cache: {sheet_name}")
+                loaded_sheets += 1
+            except CacheError as e:
+                print(f"Rebuilding cache for sheet '{sheet_name}': {e}")
+                entry = None
+                _, rows = next(parse_sheets(file_path, [sheet_name]))
+
+        if entry is None:
+            log.debug(f"Processing sheet: {sheet_name}")
+            parsed_sheets += 1
+            try:
+                entry = {'checksum': save_sheet_rows(cache_dir, key, WorkbookRow._fields, rows), 'rows': len(rows)}
+            except CacheError as e:
+                # The rows are still good; the sheet is just parsed again next run
+                print(f"Not caching sheet '{sheet_name}': {e}")
+
+        if entry is not None:
+            entries[key] = entry
+        yield from rows
+
+    # Keep entries for sheets skipped this run so a later run can reuse them
+    for key in sheet_keys.values():
+        if key not in entries and key in cached_entries:
+            entries[key] = cached_entries[key]
+
+    write_manifest(cache_dir, {
+        'version': CACHE_VERSION,
+        'file_hash': file_hash,
+        'sheet_keys': sheet_keys,
+        'entries': entries,
+    })
+    prune_entries(cache_dir, entries)
+    print(f"Workbook: {len(included)} sheets ({loaded_sheets} from cache, {parsed_sheets} parsed)")
+
+def read_workbook_rows(file_path=WORKBOOK_PATH, excluded_sheets=EXCLUDED_SHEETS, cache_dir=CACHE_DIR, workers=1):
+    """Read the workbook once and return its rows so several consumers can share them"""
+    return list(iter_cached_workbook_rows(file_path, excluded_sheets, cache_dir, workers))
+
+def group_rows_by_sheet(rows):
+    """Yield (sheet_name, rows) pairs from a row stream, preserving sheet order"""
+    for sheet_name, sheet_rows in groupby(rows, key=attrgetter('sheet')):
+        yield sheet_name, sheet_rows
+
+def rows_digest(rows):
+    """Hash of a sheet's extracted row values
+
+    Unlike the cache keys, which hash the sheet XML and the workbook
+    styles, it only changes when a value the scripts read changes.
+    """
+    digest = hashlib.sha256()
+    for row in rows:
+        digest.update(repr(tuple(row)).encode('utf-8') + b'\n')
+    return digest.hexdigest()
+
+def benchmark_workers(file_path=WORKBOOK_PATH, excluded_sheets=EXCLUDED_SHEETS, worker_counts=None):
+    """Time an uncached parse of every sheet per worker count and report the speedup over one worker"""
+    if not worker_counts:
+        cpu_count = os.cpu_count() or 1
+        worker_counts = sorted({1, 2, 4, cpu_count} & set(range(1, cpu_count + 1)))
+    worker_counts = [1] + [workers for workers in worker_counts if workers != 1]
+    sheet_names = [sheet_name for sheet_name in read_sheet_names(file_path) if sheet_name not in excluded_sheets]
+
+    print(f"Parsing {len(sheet_names)} sheets from {file_path}")
+    results = []
+    baseline_rows = None
+    baseline_seconds = None
+    for workers in worker_counts:
+        start = time.perf_counter()
+        rows = [row for _, sheet_rows in parse_sheets(file_path, sheet_names, workers) for row in sheet_rows]
+        seconds = time.perf_counter() - start
+        if baseline_rows is None:
+            baseline_rows, baseline_seconds = rows, seconds
+        identical = rows == baseline_rows
+        speedup = baseline_seconds / seconds if seconds else float('inf')
+        print(f"  workers={workers:<3} {seconds:8.3f}s  speedup x{speedup:.2f}  rows={len(rows)}  {'identical' if identical else 'MISMATCH'}")
+        results.append({'workers': workers, 'seconds': seconds, 'speedup': speedup, 'rows': len(rows), 'identical': identical})
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark parallel sheet parsing of the macro workbook")
+    parser.add_argument('--file', default=WORKBOOK_PATH, help="Workbook to parse")
+    parser.add_argument('--benchmark-workers', type=int, nargs='*', metavar='N',
+                        help="Worker counts to time (default: 1, 2, 4 and all cores)")
+    args = parser.parse_args()
+    benchmark_workers(args.file, EXCLUDED_SHEETS, args.benchmark_workers)